@@ -0,0 +1,374 @@
+"""
+竞技场模块
+上百条机器人蛇在同一张大棋盘（如 300x300）上同时游走，是引擎与绘制路径的规模基准。
+
+复用 versus 的多蛇状态：所有蛇共用按归属记录的占用网格 `owner` 与空闲格子索引 FreeCells，
+每步先由机器人为全部蛇选好方向，再经 versus.resolve_moves 一次结算、同时前进。与对战不同的是：
+- 棋盘上同时保持多个食物（`food_at` 每格一字节，0 为无食物），在空闲格子中 O(1) 生成，
+  并按 BUCKET x BUCKET 的分块登记，机器人只在附近的分块中找最近的食物
+- 撞死的蛇立即从棋盘上清除，RESPAWN_TICKS 步后在随机空位重生，对局不会结束
+- 机器人是廉价的贪心策略：朝最近的食物走，避开占用格和四周已无空位的死路
+
+不依赖 Tk，绘制由 main.ArenaGame 负责（只绘制可见窗口内的格子）。
+
+    python arena.py --snakes 150 --cols 300 --rows 300 --ticks 2000
+"""
+
+import argparse
+import time
+from itertools import groupby
+
+import versus
+from engine import session_rngs
+from foods import FOOD_SPECS, pick_food_type
+from versus import EMPTY, Snake, VersusState
+
+ARENA_COLS = 300
+ARENA_ROWS = 300
+ARENA_CELL_SIZE = 8
+ARENA_SNAKES = 150
+# 棋盘上保持的食物数（默认每条蛇一个）
+FOOD_PER_SNAKE = 1
+# 撞死后等待几步重生
+RESPAWN_TICKS = 20
+# 出生时的蛇长
+SPAWN_LENGTH = 3
+# 竞技场的时间步（毫秒），比单人模式快以便观察
+ARENA_SPEED = 50
+# 食物空间分块的边长（格）
+BUCKET = 16
+
+
+class ArenaState(VersusState):
+    """竞技场状态：在对战状态之上加入多食物与重生"""
+    __slots__ = ('food_at', 'food_count', 'food_target', 'bucket_cols', 'bucket_rows',
+                 'food_buckets', 'targets', 'respawn_at', 'deaths', 'eaten')
+
+    def __init__(self, cols=ARENA_COLS, rows=ARENA_ROWS, mode="Pass", rng=None, seed=None,
+                 food_target=0):
+        super().__init__(cols, rows, mode, rng, seed)
+        # food_at[cell] 为食物类型 + 1（0 为无食物）；food_buckets 按分块登记食物格子
+        self.food_at = bytearray(cols * rows)
+        self.food_count = 0
+        self.food_target = food_target
+        self.bucket_cols = -(-cols // BUCKET)
+        self.bucket_rows = -(-rows // BUCKET)
+        self.food_buckets = [set() for _ in range(self.bucket_cols * self.bucket_rows)]
+        # 与 snakes 对齐：每条蛇当前追逐的食物格子、重生的步数（存活时为 -1）
+        self.targets = []
+        self.respawn_at = []
+        self.deaths = 0
+        self.eaten = 0
+
+    def bucket_of(self, cell):
+        row, col = divmod(cell, self.cols)
+        return row // BUCKET * self.bucket_cols + col // BUCKET
+
+    def place_food(self):
+        """在一个随机空闲格子上放置食物；没有空位时返回 False"""
+        cell = self.free.choice(self.rng)
+        if cell < 0 or self.food_at[cell]:
+            return False
+        self.food_at[cell] = pick_food_type(self.rng) + 1
+        self.food_buckets[self.bucket_of(cell)].add(cell)
+        self.food_count += 1
+        return True
+
+    def take_food(self, cell):
+        """移除 cell 上的食物，返回食物类型"""
+        food_type = self.food_at[cell] - 1
+        self.food_at[cell] = 0
+        self.food_buckets[self.bucket_of(cell)].discard(cell)
+        self.food_count -= 1
+        return food_type
+
+    def spawn_food(self):
+        """补足食物数；空闲格子抽到已有食物时跳过，下一步再补"""
+        for _ in range(self.food_target - self.food_count):
+            self.place_food()
+        return bool(self.free)
+
+    def spawn_cells(self):
+        """为新蛇随机挑选一段空闲的直线格子，返回 (尾 -> 头的格子, 方向)；找不到时返回 None"""
+        neighbors = self.neighbors
+        owner = self.owner
+        food_at = self.food_at
+        for _ in range(8):
+            head = self.free.choice(self.rng)
+            if head < 0:
+                return None
+            direction = self.rng.randrange(4)
+            cells = [head]
+            cell = head
+            while len(cells) < SPAWN_LENGTH:
+                # 沿反方向向后铺出蛇身
+                cell = neighbors[cell * 4 + (direction ^ 1)]
+                if cell < 0 or owner[cell] != EMPTY or food_at[cell] or cell in cells:
+                    break
+                cells.append(cell)
+            else:
+                if not food_at[head]:
+                    cells.reverse()
+                    return cells, direction
+        return None
+
+    def add_bot(self):
+        """加入一条机器人蛇；棋盘过满放不下时返回 None"""
+        spawn = self.spawn_cells()
+        if spawn is None:
+            return None
+        snake = self.add_snake(*spawn)
+        self.targets.append(-1)
+        self.respawn_at.append(-1)
+        return snake
+
+    def clear_snake(self, index):
+        """把撞死的蛇从棋盘上移除，并安排重生"""
+        snake = self.snakes[index]
+        while snake.length:
+            self._pop_tail(snake)
+        self.targets[index] = -1
+        self.respawn_at[index] = self.ticks + RESPAWN_TICKS
+        self.deaths += 1
+
+    def respawn(self, index):
+        """在随机空位重生第 index 条蛇（沿用编号与得分）；放不下时顺延一步"""
+        spawn = self.spawn_cells()
+        if spawn is None:
+            self.respawn_at[index] = self.ticks + 1
+            return False
+        cells, direction = spawn
+        old = self.snakes[index]
+        snake = Snake(old.owner, 16, direction)
+        snake.score = old.score
+        self.snakes[index] = snake
+        for cell in cells:
+            self._push_head(snake, cell)
+        self.respawn_at[index] = -1
+        return True
+
+    @property
+    def alive_count(self):
+        return sum(snake.alive for snake in self.snakes)
+
+
+def new_arena(snakes=ARENA_SNAKES, cols=ARENA_COLS, rows=ARENA_ROWS, mode="Pass", seed=None,
+              foods=None):
+    """创建竞技场：snakes 条机器人蛇随机分布，食物数默认与蛇数相同"""
+    seed, rng, _ = session_rngs(seed)
+    if foods is None:
+        foods = snakes * FOOD_PER_SNAKE
+    state = ArenaState(cols, rows, mode, rng, seed, foods)
+    for _ in range(snakes):
+        if state.add_bot() is None:
+            raise ValueError(f"{cols}x{rows} 的棋盘放不下 {snakes} 条蛇")
+    state.spawn_food()
+    return state
+
+
+def _ring(radius):
+    """与中心分块的切比雪夫距离恰为 radius 的分块偏移 (drow, dcol)"""
+    if radius == 0:
+        yield 0, 0
+        return
+    for dcol in range(-radius, radius + 1):
+        yield -radius, dcol
+        yield radius, dcol
+    for drow in range(1 - radius, radius):
+        yield drow, -radius
+        yield drow, radius
+
+
+def _nearest_food(state, head):
+    """离 head 最近（穿墙时按环面距离）的食物格子；没有食物时返回 -1。
+
+    由近及远逐圈查看食物分块：第 r 圈分块中的食物至少相距 (r - 1) * BUCKET + 1 格，
+    已找到的食物不比这更远时即可停止，通常只需查看中心附近的几个分块。
+    """
+    cols, rows = state.cols, state.rows
+    bucket_cols, bucket_rows = state.bucket_cols, state.bucket_rows
+    buckets = state.food_buckets
+    wrap = state.mode == "Pass"
+    half_cols, half_rows = cols // 2, rows // 2
+    row, col = divmod(head, cols)
+    brow, bcol = row // BUCKET, col // BUCKET
+    best, best_dist = -1, cols + rows
+    seen = set()
+    for radius in range(max(bucket_cols, bucket_rows)):
+        if best >= 0 and best_dist <= (radius - 1) * BUCKET:
+            break
+        for drow, dcol in _ring(radius):
+            r, c = brow + drow, bcol + dcol
+            if wrap:
+                r %= bucket_rows
+                c %= bucket_cols
+            elif not (0 <= r < bucket_rows and 0 <= c < bucket_cols):
+                continue
+            bucket = r * bucket_cols + c
+            if bucket in seen:
+                continue
+            seen.add(bucket)
+            for cell in buckets[bucket]:
+                frow, fcol = divmod(cell, cols)
+                dx = abs(fcol - col)
+                dy = abs(frow - row)
+                if wrap:
+                    if dx > half_cols:
+                        dx = cols - dx
+                    if dy > half_rows:
+                        dy = rows - dy
+                if dx + dy < best_dist:
+                    best, best_dist = cell, dx + dy
+    return best
+
+
+def bot_actions(state):
+    """为所有存活的蛇选择本步方向（贪心：朝目标食物，避开占用格与死路）"""
+    cols, rows = state.cols, state.rows
+    half_cols, half_rows = cols // 2, rows // 2
+    wrap = state.mode == "Pass"
+    neighbors = state.neighbors
+    owner = state.owner
+    food_at = state.food_at
+    targets = state.targets
+    actions = []
+    for index, snake in enumerate(state.snakes):
+        if not snake.alive:
+            actions.append(None)
+            continue
+        head = snake.body[snake.head_idx]
+        target = targets[index]
+        if target < 0 or not food_at[target]:
+            target = targets[index] = _nearest_food(state, head)
+        trow, tcol = divmod(target, cols) if target >= 0 else divmod(head, cols)
+        reverse = snake.direction ^ 1
+        best, best_score = None, None
+        for code in range(4):
+            if code == reverse:
+                continue
+            cell = neighbors[head * 4 + code]
+            if cell < 0 or owner[cell] != EMPTY:
+                continue
+            row, col = divmod(cell, cols)
+            dx = abs(col - tcol)
+            dy = abs(row - trow)
+            if wrap:
+                if dx > half_cols:
+                    dx = cols - dx
+                if dy > half_rows:
+                    dy = rows - dy
+            score = dx + dy
+            # 下一格四周已无空位（只剩来路）时尽量不进去
+            base = cell * 4
+            for k in range(4):
+                nxt = neighbors[base + k]
+                if nxt >= 0 and owner[nxt] == EMPTY:
+                    break
+            else:
+                score += cols + rows
+            if best_score is None or score < best_score:
+                best, best_score = code, score
+        actions.append(best)
+    return actions
+
+
+def step(state, actions=None):
+    """推进一步：机器人决策、碰撞结算、前进与吃食物、清除死蛇、重生与补充食物。
+
+    actions 不传时由 bot_actions 为全部蛇决策。返回本步撞死的蛇数。
+    """
+    if actions is None:
+        actions = bot_actions(state)
+    food_at = state.food_at
+    for snake, target in versus.resolve_moves(state, actions):
+        state._push_head(snake, target)
+        snake.moved = True
+        if food_at[target]:
+            snake.score += FOOD_SPECS[state.take_food(target)].score
+            state.eaten += 1
+        else:
+            snake.last_tail = state._pop_tail(snake)
+    state.ticks += 1
+
+    died = 0
+    respawn_at = state.respawn_at
+    for index, snake in enumerate(state.snakes):
+        if snake.alive:
+            continue
+        if snake.length:
+            state.clear_snake(index)
+            died += 1
+        elif respawn_at[index] <= state.ticks:
+            state.respawn(index)
+    state.spawn_food()
+    return died
+
+
+def run(snakes=ARENA_SNAKES, cols=ARENA_COLS, rows=ARENA_ROWS, mode="Pass", seed=0,
+        ticks=1000, foods=None):
+    """无界面跑 ticks 步并打印引擎吞吐（ticks/s 与蛇步/s），返回 ArenaState"""
+    start = time.perf_counter()
+    state = new_arena(snakes, cols, rows, mode, seed, foods)
+    setup = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(ticks):
+        step(state)
+    elapsed = time.perf_counter() - start
+    moves = ticks * snakes
+    print(f"{snakes} snakes on {cols}x{rows} {mode} (setup {setup * 1e3:.1f} ms)")
+    print(f"  {ticks} ticks in {elapsed:.2f} s -> {ticks / elapsed:,.1f} ticks/s, "
+          f"{moves / elapsed:,.0f} snake-steps/s ({elapsed / ticks * 1e3:.2f} ms/tick)")
+    print(f"  alive {state.alive_count}, deaths {state.deaths}, eaten {state.eaten}, "
+          f"longest {max(len(snake) for snake in state.snakes)}")
+    return state
+
+
+def visible_cells(viewport, cell_size, cols, rows):
+    """可见窗口覆盖的格子矩形 (col0, row0, col1, row1)，夹在棋盘范围内"""
+    col0, row0, col1, row1 = viewport.cell_bounds(cell_size)
+    return max(0, col0), max(0, row0), min(cols, col1), min(rows, row1)
+
+
+def visible_runs(state, col0, row0, col1, row1):
+    """矩形内的蛇身按行合并：产生 (行, 起始列, 格数, 蛇的编号)。
+
+    每行只取 owner 的一段切片，同一条蛇在一行中相邻的格子合并为一段，
+    绘制层每段只需一个矩形，开销只与可见面积有关。
+    """
+    owner = state.owner
+    cols = state.cols
+    for row in range(row0, row1):
+        base = row * cols
+        col = col0
+        for value, run in groupby(owner[base + col0:base + col1]):
+            length = len(list(run))
+            if value:
+                yield row, col, length, value
+            col += length
+
+
+def visible_foods(state, col0, row0, col1, row1):
+    """矩形内的食物：产生 (行, 列, 食物类型)；没有食物的行只做一次切片判断"""
+    food_at = state.food_at
+    cols = state.cols
+    for row in range(row0, row1):
+        base = row * cols
+        foods = food_at[base + col0:base + col1]
+        if not foods.strip(b'\0'):
+            continue
+        for offset, food in enumerate(foods):
+            if food:
+                yield row, col0 + offset, food - 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="多机器人竞技场的无界面吞吐基准")
+    parser.add_argument('--snakes', type=int, default=ARENA_SNAKES)
+    parser.add_argument('--cols', type=int, default=ARENA_COLS)
+    parser.add_argument('--rows', type=int, default=ARENA_ROWS)
+    parser.add_argument('--mode', choices=("Pass", "Forbid"), default="Pass")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--ticks', type=int, default=1000)
+    parser.add_argument('--foods', type=int, default=None, help="棋盘上保持的食物数（默认与蛇数相同）")
+    args = parser.parse_args()
+    run(args.snakes, args.cols, args.rows, args.mode, args.seed, args.ticks, args.foods)
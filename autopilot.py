@@ -0,0 +1,377 @@
+"""
+自动驾驶模块
+在占用位图上寻路，让蛇自动去吃食物：支持 BFS 与 A*（穿墙模式下启发函数按环面上的曼哈顿距离计算）。
+规划出的路径会一直沿用，只有食物换了位置、蛇头偏离了路径或下一格被占用时才重新规划；
+找不到安全路径时退而选择可到达空间最大的方向保命。
+
+HamiltonPilot 则沿一条覆盖全棋盘的哈密顿回路行走并在安全时抄近路，能稳定地把棋盘填满，
+用于后期（蛇长 350~400）的性能测试。
+
+不依赖 Tk：Tk 游戏中由它代替键盘调用 change_direction（F6 开关，或 `--autopilot`），
+也可以无界面连续对局，作为长时间运行的压力测试：
+
+    python autopilot.py --games 100 --algorithm astar   # 连续对局并统计每次决策耗时
+"""
+
+import argparse
+import time
+from functools import lru_cache
+from heapq import heappop, heappush
+
+import engine
+from grid import GRID_COLS, GRID_ROWS, neighbor_table
+
+SEARCH_ALGORITHMS = ("astar", "bfs")
+ALGORITHMS = SEARCH_ALGORITHMS + ("hamilton",)
+
+# 搜索标记使用递增的代数，超过上限时整体清零一次
+_STAMP_LIMIT = 1 << 30
+
+# 哈密顿回路抄近路的条件：蛇长不超过棋盘的这个比例，且抄近路后蛇头与蛇尾之间至少留出这么多空格
+SHORTCUT_MAX_FILL = 0.5
+SHORTCUT_MIN_GAP = 4
+
+
+@lru_cache(maxsize=None)
+def hamiltonian_cycle(cols, rows):
+    """覆盖整个棋盘的闭合回路，返回 (按行走顺序排列的格子, 每格在回路中的序号)；同一尺寸只构建一次。
+
+    行数为偶数时第 0 列留作回程通道、其余列按行来回扫描，否则按转置的方式构造；
+    开局的三节蛇身（第 1 列第 1~3 行，向下）在回路中的序号递增，可以直接沿回路出发。
+    行列都为奇数时不存在这样的回路。
+    """
+    if rows % 2 == 0:
+        cycle = []
+        for row in range(rows):
+            cycle.extend(row * cols + col for col in (range(1, cols) if row % 2 == 0 else range(cols - 1, 0, -1)))
+        cycle.extend(row * cols for row in range(rows - 1, -1, -1))
+    elif cols % 2 == 0:
+        # 转置后反向，使第 1 列自上而下
+        cycle = []
+        for col in range(cols):
+            cycle.extend(row * cols + col for row in (range(1, rows) if col % 2 == 0 else range(rows - 1, 0, -1)))
+        cycle.extend(range(cols - 1, -1, -1))
+        cycle.reverse()
+    else:
+        raise ValueError(f"{cols}x{rows} 棋盘没有哈密顿回路")
+    order = [0] * (cols * rows)
+    for index, cell in enumerate(cycle):
+        order[cell] = index
+    return tuple(cycle), tuple(order)
+
+
+def create_pilot(cols=GRID_COLS, rows=GRID_ROWS, mode="Pass", algorithm="astar"):
+    """按算法名创建驾驶员；两种驾驶员的 next_direction / decide / reset 接口相同"""
+    if algorithm == "hamilton":
+        return HamiltonPilot(cols, rows, mode)
+    return Autopilot(cols, rows, mode, algorithm)
+
+
+class Autopilot:
+    """沿用上次规划路径的寻路驾驶员。
+
+    `next_direction` 每步调用一次，只要路径仍然有效就只做 O(1) 的检查；
+    路径保存为格子下标列表，末尾是下一步要进入的格子。
+    """
+    __slots__ = ('cols', 'rows', 'wrap', 'algorithm', 'neighbors', 'path', 'target',
+                 'expected', 'plans', '_mark', '_parent', '_cost', '_stamp')
+
+    def __init__(self, cols=GRID_COLS, rows=GRID_ROWS, mode="Pass", algorithm="astar"):
+        if algorithm not in SEARCH_ALGORITHMS:
+            raise ValueError(f"未知的寻路算法: {algorithm}")
+        self.cols = cols
+        self.rows = rows
+        self.wrap = mode == "Pass"
+        self.algorithm = algorithm
+        self.neighbors = neighbor_table(cols, rows, self.wrap)
+        cells = cols * rows
+        self._mark = [0] * cells
+        self._parent = [-1] * cells
+        self._cost = [0] * cells
+        self._stamp = 0
+        self.plans = 0
+        self.reset()
+
+    def reset(self):
+        """丢弃当前路径（新开一局或被外部接管方向后调用）"""
+        self.path = []
+        self.target = -1
+        self.expected = -1
+
+    def next_direction(self, occupied, head, tail, food, direction, length):
+        """返回下一步的方向编码。
+
+        occupied 为每格一个字节的占用位图（非零即被蛇身占用），head / tail / food 为格子下标
+        （没有食物时 food 为 -1），direction 为当前方向编码，length 为蛇长。
+        """
+        path = self.path
+        if not (path and food == self.target and head == self.expected and not occupied[path[-1]]):
+            path = self._plan(occupied, head, food, length)
+        if path:
+            cell = path.pop()
+            self.expected = cell
+            return self.neighbors.index(cell, head * 4, head * 4 + 4) - head * 4
+        # 没有安全路径：选可到达空间最大的方向
+        self.reset()
+        return self._survive(occupied, head, direction, length)
+
+    def decide(self, state):
+        """engine.GameState 的便捷入口，返回可直接传给 engine.step 的方向编码"""
+        return self.next_direction(state.occupied, state.head, state.body[state.tail_idx],
+                                   state.food, state.direction, state.length)
+
+    def _next_stamp(self):
+        self._stamp += 1
+        if self._stamp >= _STAMP_LIMIT:
+            self._mark = [0] * len(self._mark)
+            self._stamp = 1
+        return self._stamp
+
+    def _plan(self, occupied, head, food, length):
+        """重新规划到食物的路径；路径会把蛇引入过小的封闭区域时视为没有路径"""
+        self.plans += 1
+        self.reset()
+        if food < 0:
+            return None
+        if self.algorithm == "bfs":
+            found = self._bfs(occupied, head, food)
+        else:
+            found = self._astar(occupied, head, food)
+        if not found:
+            return None
+        path = []
+        parent = self._parent
+        cell = food
+        while cell != head:
+            path.append(cell)
+            cell = parent[cell]
+        # 吃完后蛇头（即食物格）所在区域至少要容得下蛇身（或剩余的全部空格）：
+        # 蛇身沿路径长到食物格，路径上的格子都按占用处理；途中腾出的尾部格子不计，判断偏保守
+        limit = min(length, len(occupied) - length - len(path) + 1)
+        if len(path) > 1 and self._region(occupied, food, limit, path) < limit:
+            return None
+        self.path = path
+        self.target = food
+        return path
+
+    def _bfs(self, occupied, head, food):
+        neighbors = self.neighbors
+        mark = self._mark
+        parent = self._parent
+        stamp = self._next_stamp()
+        mark[head] = stamp
+        frontier = [head]
+        while frontier:
+            next_frontier = []
+            for cell in frontier:
+                base = cell * 4
+                for i in range(base, base + 4):
+                    n = neighbors[i]
+                    if n < 0 or mark[n] == stamp or occupied[n]:
+                        continue
+                    mark[n] = stamp
+                    parent[n] = cell
+                    if n == food:
+                        return True
+                    next_frontier.append(n)
+            frontier = next_frontier
+        return False
+
+    def _astar(self, occupied, head, food):
+        neighbors = self.neighbors
+        mark = self._mark
+        parent = self._parent
+        cost = self._cost
+        cols, rows, wrap = self.cols, self.rows, self.wrap
+        food_row, food_col = divmod(food, cols)
+
+        def heuristic(cell):
+            row, col = divmod(cell, cols)
+            dx = abs(col - food_col)
+            dy = abs(row - food_row)
+            if wrap:
+                # 穿墙时从另一侧绕过去可能更近
+                dx = min(dx, cols - dx)
+                dy = min(dy, rows - dy)
+            return dx + dy
+
+        stamp = self._next_stamp()
+        mark[head] = stamp
+        cost[head] = 0
+        h = heuristic(head)
+        heap = [(h, h, head)]
+        while heap:
+            f, h, cell = heappop(heap)
+            if cell == food:
+                return True
+            g = f - h
+            if g > cost[cell]:
+                continue  # 过期的堆条目
+            g += 1
+            base = cell * 4
+            for i in range(base, base + 4):
+                n = neighbors[i]
+                if n < 0 or occupied[n]:
+                    continue
+                if mark[n] == stamp and cost[n] <= g:
+                    continue
+                mark[n] = stamp
+                cost[n] = g
+                parent[n] = cell
+                nh = heuristic(n)
+                heappush(heap, (g + nh, nh, n))
+        return False
+
+    def _region(self, occupied, start, limit, blocked=()):
+        """从 start 出发可到达的空格数，数到 limit 即停止；blocked 中的格子同样视为占用"""
+        neighbors = self.neighbors
+        mark = self._mark
+        stamp = self._next_stamp()
+        for cell in blocked:
+            mark[cell] = stamp
+        mark[start] = stamp
+        stack = [start]
+        count = 0
+        while stack:
+            cell = stack.pop()
+            count += 1
+            if count >= limit:
+                return count
+            base = cell * 4
+            for i in range(base, base + 4):
+                n = neighbors[i]
+                if n >= 0 and mark[n] != stamp and not occupied[n]:
+                    mark[n] = stamp
+                    stack.append(n)
+        return count
+
+    def _survive(self, occupied, head, direction, length):
+        best, best_size = direction, -1
+        limit = len(occupied) - length
+        base = head * 4
+        for code in range(4):
+            n = self.neighbors[base + code]
+            if code == direction ^ 1 or n < 0 or occupied[n]:
+                continue
+            size = self._region(occupied, n, limit)
+            if size > best_size:
+                best, best_size = code, size
+        return best
+
+
+class HamiltonPilot:
+    """沿哈密顿回路行走、在安全时抄近路的驾驶员。
+
+    只要蛇身各节在回路中的序号从尾到头递增（开局即满足），蛇头沿回路向前、且不越过蛇尾时
+    经过的格子必然空闲。因此每步只需比较 4 个相邻格子到蛇头、蛇尾与食物的回路距离，
+    不查询占用位图也不搜索，为 O(1)。
+    """
+    __slots__ = ('cols', 'rows', 'neighbors', 'cycle', 'order', 'size', 'plans')
+    algorithm = "hamilton"
+
+    def __init__(self, cols=GRID_COLS, rows=GRID_ROWS, mode="Pass"):
+        self.cols = cols
+        self.rows = rows
+        self.neighbors = neighbor_table(cols, rows, mode == "Pass")
+        self.cycle, self.order = hamiltonian_cycle(cols, rows)
+        self.size = cols * rows
+        self.plans = 0  # 与 Autopilot 接口一致；沿回路行走不需要规划
+
+    def reset(self):
+        pass
+
+    def next_direction(self, occupied, head, tail, food, direction, length):
+        """返回下一步的方向编码，参数同 Autopilot.next_direction（occupied 不会被用到）"""
+        order = self.order
+        size = self.size
+        base = order[head]
+        # 蛇尾之前的格子都空闲；蛇长为 1 时整个回路都空闲
+        tail_distance = (order[tail] - base) % size or size
+        limit = tail_distance - 1
+        if length <= size * SHORTCUT_MAX_FILL:
+            # 抄近路：跳过的格子不能越过食物，且要给之后的增长留出余量
+            limit = min(limit, tail_distance - SHORTCUT_MIN_GAP)
+            if food >= 0:
+                limit = min(limit, (order[food] - base) % size)
+            limit = max(limit, 1)
+        else:
+            limit = min(limit, 1)
+        best, best_distance = -1, 0
+        cell_base = head * 4
+        for code in range(4):
+            n = self.neighbors[cell_base + code]
+            if n < 0:
+                continue
+            distance = (order[n] - base) % size
+            if best_distance < distance <= limit:
+                best, best_distance = code, distance
+        # 无路可走（只会在顺序被外部打乱时发生）：保持方向
+        return direction if best < 0 else best
+
+    def decide(self, state):
+        return self.next_direction(state.occupied, state.head, state.body[state.tail_idx],
+                                   state.food, state.direction, state.length)
+
+    def can_follow(self, state):
+        """engine.GameState 的蛇身各节在回路中的序号是否从尾到头递增（开局即满足）。
+
+        不满足时（对局中途接手、读档）沿回路前进会撞上自己的身体，应改用寻路驾驶员。
+        """
+        order = self.order
+        size = self.size
+        tail = order[state.body[state.tail_idx]]
+        previous = -1
+        for cell in state.cells():
+            distance = (order[cell] - tail) % size
+            if distance <= previous:
+                return False
+            previous = distance
+        return True
+
+
+def soak(games=10, algorithm="astar", mode="Pass", cols=GRID_COLS, rows=GRID_ROWS,
+         seed=0, max_ticks=200000):
+    """用自动驾驶连续无界面对局，统计分数与每次决策耗时"""
+    scores = []
+    lengths = []
+    decisions = []
+    ticks = 0
+    plans = 0
+    start = time.perf_counter()
+    for game in range(games):
+        state = engine.new_game(mode, seed + game, cols, rows)
+        pilot = create_pilot(cols, rows, mode, algorithm)
+        clock = time.perf_counter
+        step = engine.step
+        while state.alive and state.ticks < max_ticks:
+            t0 = clock()
+            action = pilot.decide(state)
+            decisions.append(clock() - t0)
+            step(state, action)
+        scores.append(state.score)
+        lengths.append(state.length)
+        ticks += state.ticks
+        plans += pilot.plans
+    elapsed = time.perf_counter() - start
+
+    decisions.sort()
+    count = len(decisions)
+    print(f"{games} games on {cols}x{rows} {mode} ({algorithm}): {ticks} ticks in {elapsed:.1f} s")
+    print(f"score avg {sum(scores) / games:.1f}, max {max(scores)}; "
+          f"length avg {sum(lengths) / games:.1f}, max {max(lengths)}")
+    print(f"replanned {plans} times ({plans / max(count, 1):.1%} of decisions)")
+    print(f"decision {sum(decisions) / count * 1e3:.3f} ms avg, "
+          f"{decisions[int(count * 0.99)] * 1e3:.3f} ms p99, {decisions[-1] * 1e3:.3f} ms max")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="自动驾驶连续对局（压力测试）")
+    parser.add_argument('--games', type=int, default=10)
+    parser.add_argument('--algorithm', choices=ALGORITHMS, default="astar")
+    parser.add_argument('--mode', choices=("Pass", "Forbid"), default="Pass")
+    parser.add_argument('--cols', type=int, default=GRID_COLS)
+    parser.add_argument('--rows', type=int, default=GRID_ROWS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-ticks', type=int, default=200000, help="单局步数上限")
+    args = parser.parse_args()
+    soak(args.games, args.algorithm, args.mode, args.cols, args.rows, args.seed, args.max_ticks)
@@ -0,0 +1,190 @@
+"""
+NumPy 批量模拟模块
+把 N 局游戏保存为数组，每次 `step` 用一组数组运算同时推进所有棋盘，
+规则与 engine.step 一致，用于大规模评估自动驾驶策略。
+"""
+
+import numpy as np
+
+import engine
+from foods import FOOD_TYPES
+from grid import DELTAS, DOWN, GRID_COLS, GRID_ROWS
+
+# 方向编码与 engine.step 相同（grid.DIRECTION_CODES），相反方向为 code ^ 1
+NO_ACTION = -1
+_DX = np.array([dx for dx, _ in DELTAS], dtype=np.int32)
+_DY = np.array([dy for _, dy in DELTAS], dtype=np.int32)
+
+# 食物类型表（按 FOOD_TYPES 的顺序编码）
+_FOOD_SCORES = np.array([engine.FOOD_SCORES[t] for t in FOOD_TYPES], dtype=np.int32)
+_FOOD_CUM_WEIGHTS = np.cumsum(engine.FOOD_WEIGHTS)
+_EFFECT_CODES = {engine.FOOD_EFFECTS[t]: code for code, t in enumerate(FOOD_TYPES)}
+_SPEED_UP = _EFFECT_CODES['speed_up']
+_SLOW_DOWN = _EFFECT_CODES['slow_down']
+_RAINBOW = _EFFECT_CODES['rainbow']
+_STAR_CANDY = _EFFECT_CODES['star_candy']
+
+
+class BatchEngine:
+    """N 个棋盘的批量模拟器。
+
+    每个棋盘的蛇身存放在长度为 cols*rows 的环形缓冲区中，
+    `head_idx` / `tail_idx` 分别指向头和尾在缓冲区中的位置。
+    """
+
+    def __init__(self, n, mode="Pass", seed=None, cols=GRID_COLS, rows=GRID_ROWS):
+        self.n = n
+        self.mode = mode
+        self.cols = cols
+        self.rows = rows
+        self.cells = cols * rows
+        self.rng = np.random.default_rng(seed)
+        self._boards = np.arange(n)
+
+        self.occupied = np.zeros((n, self.cells), dtype=np.uint8)
+        self.body = np.zeros((n, self.cells), dtype=np.int32)
+        self.head_idx = np.zeros(n, dtype=np.int32)
+        self.tail_idx = np.zeros(n, dtype=np.int32)
+        self.length = np.zeros(n, dtype=np.int32)
+        self.direction = np.zeros(n, dtype=np.int8)
+        self.food = np.zeros(n, dtype=np.int32)
+        self.food_type = np.zeros(n, dtype=np.int8)
+        self.score = np.zeros(n, dtype=np.int32)
+        self.speed = np.zeros(n, dtype=np.int32)
+        self.color_chose = np.zeros(n, dtype=np.int8)
+        self.background = np.zeros(n, dtype=np.int8)
+        self.alive = np.zeros(n, dtype=bool)
+        self.won = np.zeros(n, dtype=bool)
+        self.ticks = np.zeros(n, dtype=np.int64)
+        self.reset()
+
+    def reset(self, boards=None):
+        """把指定棋盘（默认全部）恢复为开局布局"""
+        if boards is None:
+            boards = self._boards
+        boards = np.asarray(boards)
+        if boards.size == 0:
+            return
+        cols = self.cols
+        start = np.array([1 * cols + 1, 2 * cols + 1, 3 * cols + 1], dtype=np.int32)
+
+        self.occupied[boards] = 0
+        self.occupied[boards[:, None], start[None, :]] = 1
+        self.body[boards, :3] = start
+        self.tail_idx[boards] = 0
+        self.head_idx[boards] = 2
+        self.length[boards] = 3
+        self.direction[boards] = DOWN
+        self.score[boards] = 0
+        self.speed[boards] = engine.INITIAL_SPEED
+        self.color_chose[boards] = self.rng.integers(3, 6, boards.size)
+        self.background[boards] = self.rng.integers(0, engine.BACKGROUND_COUNT, boards.size)
+        self.alive[boards] = True
+        self.won[boards] = False
+        self.ticks[boards] = 0
+        self._spawn_food(boards)
+
+    def heads(self):
+        """每个棋盘的蛇头格子下标"""
+        return self.body[self._boards, self.head_idx]
+
+    def _spawn_food(self, boards):
+        """为指定棋盘在空闲格子中均匀抽取新食物；无空位的棋盘记为通关"""
+        free_count = self.cells - self.length[boards]
+        full = free_count <= 0
+        if full.any():
+            done = boards[full]
+            self.won[done] = True
+            self.alive[done] = False
+            self.food[done] = -1
+            boards = boards[~full]
+            free_count = free_count[~full]
+            if boards.size == 0:
+                return
+        # 第 k 个空闲格子：对空闲位图做前缀和后取第一个超过 k 的位置
+        k = (self.rng.random(boards.size) * free_count).astype(np.int32)
+        free_prefix = np.cumsum(self.occupied[boards] == 0, axis=1)
+        self.food[boards] = np.argmax(free_prefix > k[:, None], axis=1)
+        self.food_type[boards] = np.searchsorted(
+            _FOOD_CUM_WEIGHTS, self.rng.random(boards.size) * _FOOD_CUM_WEIGHTS[-1], side='right'
+        )
+
+    def step(self, actions=None):
+        """所有存活棋盘同时推进一步。
+
+        actions 为长度 N 的方向编码数组（NO_ACTION 表示保持方向），
+        返回本步吃到食物与死亡的布尔掩码 (ate, died)。
+        """
+        boards = self._boards
+        alive = self.alive
+        direction = self.direction
+        if actions is not None:
+            actions = np.asarray(actions)
+            turn = (actions >= 0) & (actions != (direction ^ 1))
+            direction[turn] = actions[turn]
+
+        head = self.body[boards, self.head_idx]
+        row, col = np.divmod(head, self.cols)
+        col = col + _DX[direction]
+        row = row + _DY[direction]
+        if self.mode == "Pass":
+            col %= self.cols
+            row %= self.rows
+            hit = np.zeros(self.n, dtype=bool)
+        else:
+            hit = (col < 0) | (col >= self.cols) | (row < 0) | (row >= self.rows)
+            np.clip(col, 0, self.cols - 1, out=col)
+            np.clip(row, 0, self.rows - 1, out=row)
+        new_head = row * self.cols + col
+        # 与 move_snake 一致：在尾巴移动之前检查碰撞
+        hit |= self.occupied[boards, new_head].astype(bool)
+
+        died = alive & hit
+        moving = alive & ~hit
+        alive &= ~hit
+
+        # 推进蛇头
+        moved = boards[moving]
+        moved_head = new_head[moving]
+        head_idx = (self.head_idx[moved] + 1) % self.cells
+        self.head_idx[moved] = head_idx
+        self.body[moved, head_idx] = moved_head
+        self.occupied[moved, moved_head] = 1
+        self.ticks[moved] += 1
+
+        # 没吃到食物的棋盘缩短尾巴
+        ate = np.zeros(self.n, dtype=bool)
+        ate[moved] = moved_head == self.food[moved]
+        shrink = boards[moving & ~ate]
+        tail_idx = self.tail_idx[shrink]
+        self.occupied[shrink, self.body[shrink, tail_idx]] = 0
+        self.tail_idx[shrink] = (tail_idx + 1) % self.cells
+
+        if ate.any():
+            self._apply_food(boards[ate])
+        return ate, died
+
+    def _apply_food(self, eaters):
+        """结算吃到的食物：加分、速度、配色与背景，并重新生成食物"""
+        food_type = self.food_type[eaters]
+        self.length[eaters] += 1
+        self.score[eaters] += _FOOD_SCORES[food_type]
+
+        speed = self.speed[eaters]
+        speed = np.where(food_type == _SPEED_UP, np.maximum(engine.MIN_SPEED, speed - 10), speed)
+        speed = np.where(food_type == _SLOW_DOWN, np.minimum(engine.MAX_SPEED, speed + 10), speed)
+        speed = np.where(food_type == _RAINBOW, np.maximum(engine.MIN_SPEED, speed - 5), speed)
+        speed = np.where(food_type == _STAR_CANDY, np.maximum(engine.MIN_SPEED, speed - 2), speed)
+        self.speed[eaters] = speed
+
+        # 彩虹糖：切换到不同的配色；星星糖：切换到不同的背景
+        rainbow = eaters[food_type == _RAINBOW]
+        if rainbow.size:
+            shift = self.rng.integers(1, engine.COLOR_SCHEME_COUNT, rainbow.size)
+            self.color_chose[rainbow] = (self.color_chose[rainbow] + shift) % engine.COLOR_SCHEME_COUNT
+        star = eaters[food_type == _STAR_CANDY]
+        if star.size:
+            shift = self.rng.integers(1, engine.BACKGROUND_COUNT, star.size)
+            self.background[star] = (self.background[star] + shift) % engine.BACKGROUND_COUNT
+
+        self._spawn_food(eaters)
@@ -0,0 +1,737 @@
+"""
+性能基准脚本
+不依赖 Tk / pygame，直接在命令行运行：
+
+    python benchmark.py body      # 蛇身数据结构：列表 vs GameState 环形缓冲区 + 占用位图
+    python benchmark.py food      # 食物生成：随机重试 vs 空闲格子索引
+    python benchmark.py engine    # 无界面引擎吞吐量（步/秒）
+    python benchmark.py batch     # NumPy 批量模拟 vs 逐局循环（需要 numpy）
+    python benchmark.py board     # 200x200 大棋盘上 10000 节长蛇的单步与可见区域裁剪耗时
+    python benchmark.py loop      # 绘制耗时下的实际步长：after(speed) 链式调度 vs 固定时间步
+    python benchmark.py state     # GameState.clone/restore vs 深拷贝元组列表快照
+    python benchmark.py save      # 二进制存档：400 节蛇的打包 / 解包 / 读盘耗时与文件大小
+    python benchmark.py archive   # 10 万步回放归档的随机跳转耗时
+    python benchmark.py autopilot # 300 节长蛇上自动驾驶的单次决策耗时（BFS / A*）
+    python benchmark.py late      # 哈密顿回路驾驶员填满 20x20 棋盘，按蛇长分段统计单步耗时
+    python benchmark.py versus    # 两条 200 节长蛇的对战单步耗时与每步需要更新的画布项数
+    python benchmark.py arena     # 300x300 棋盘上 150 条机器人蛇的单步耗时与可见窗口的绘制项数
+    python benchmark.py canvas    # 每步重建全部画布项 vs 常驻画布项增量移动：每步的画布调用次数（含大棋盘跟随视野）
+    python benchmark.py sprites   # 蛇身贴图：开局一套配色与整张图集（72 色 x 4 方向）的生成耗时（需要 PIL）
+    python benchmark.py compositor # 100 / 1000 / 5000 个粒子：Tk 画布项 vs 单张位图合成的每帧耗时（需要 PIL；
+                                   # 画布一列与 PhotoImage 推送需要图形界面）
+    python benchmark.py palette   # 每帧的动态颜色（食物呼吸光、分数金色、星星糖）：逐帧解析格式化 vs 查预计算颜色表
+"""
+
+import argparse
+import math
+import random
+import time
+
+import engine
+from grid import SnakeBody, GRID_COLS, GRID_ROWS, CELL_SIZE, DELTAS, neighbor_table
+
+
+def serpentine_cycle(cols=GRID_COLS, rows=GRID_ROWS, cell_size=CELL_SIZE):
+    """生成一条覆盖整个棋盘的闭合蛇形路径（像素坐标），用于构造不会撞死的长蛇。
+
+    第 0 列留作回程通道，其余列按行来回扫描；要求 rows 为偶数。
+    """
+    path = []
+    for row in range(rows):
+        cols_iter = range(1, cols) if row % 2 == 0 else range(cols - 1, 0, -1)
+        for col in cols_iter:
+            path.append((col * cell_size, row * cell_size))
+    for row in range(rows - 1, -1, -1):
+        path.append((0, row * cell_size))
+    return path
+
+
+def path_state(path, length, cols=GRID_COLS, rows=GRID_ROWS, cell_size=CELL_SIZE):
+    """把像素路径的前 length 格依次推入一局 GameState，返回 (state, 整条路径的格子下标)"""
+    cells = [y // cell_size * cols + x // cell_size for x, y in path]
+    state = engine.GameState(cols, rows, rng=random.Random(0))
+    for cell in cells[:length]:
+        state.push_head(cell)
+    return state, cells
+
+
+def _time_ticks(tick, ticks):
+    start = time.perf_counter()
+    for _ in range(ticks):
+        tick()
+    return (time.perf_counter() - start) / ticks * 1e9
+
+
+def bench_body(lengths=(3, 50, 100, 200, 300, 399), ticks=20000):
+    """对比旧的列表实现与 GameState 蛇身在不同蛇长下的单步耗时（纳秒/步）"""
+    cycle = serpentine_cycle()
+    total = len(cycle)
+    print(f"{'length':>8} {'list ns/tick':>14} {'GameState ns/tick':>18}")
+    for length in lengths:
+        # 旧实现：Python 列表 + `in` 线性扫描 + pop(0)
+        snake_list = cycle[:length]
+        cursor = [length]
+
+        def list_tick():
+            new_head = cycle[cursor[0] % total]
+            if new_head in snake_list:
+                raise RuntimeError("unexpected collision")
+            snake_list.append(new_head)
+            snake_list.pop(0)
+            cursor[0] += 1
+
+        # 新实现：环形缓冲区 + 占用位图
+        state, cells = path_state(cycle, length)
+        body_cursor = [length]
+
+        def body_tick():
+            new_head = cells[body_cursor[0] % total]
+            if state.occupied[new_head]:
+                raise RuntimeError("unexpected collision")
+            state.push_head(new_head)
+            state.pop_tail()
+            body_cursor[0] += 1
+
+        list_ns = _time_ticks(list_tick, ticks)
+        body_ns = _time_ticks(body_tick, ticks)
+        print(f"{length:>8} {list_ns:>14.0f} {body_ns:>18.0f}")
+
+
+def bench_food(lengths=(3, 200, 360, 399), spawns=2000):
+    """对比随机重试与空闲格子索引在不同占用率下的单次生成耗时（微秒/次）"""
+    cycle = serpentine_cycle()
+    rng = random.Random(0)
+    print(f"{'length':>8} {'retry us/spawn':>16} {'free-cell us/spawn':>20}")
+    for length in lengths:
+        snake_list = cycle[:length]
+        state, _ = path_state(cycle, length)
+
+        def retry_spawn():
+            # 旧实现：随机格子 + 列表线性查重
+            pos = (rng.randint(0, 19) * 20, rng.randint(0, 19) * 20)
+            while pos in snake_list:
+                pos = (rng.randint(0, 19) * 20, rng.randint(0, 19) * 20)
+            return pos
+
+        def free_cell_spawn():
+            return state.free.choice(rng)
+
+        retry_us = _time_ticks(retry_spawn, spawns) / 1000
+        free_us = _time_ticks(free_cell_spawn, spawns) / 1000
+        print(f"{length:>8} {retry_us:>16.2f} {free_us:>20.2f}")
+
+
+def bench_engine(ticks=500000, seed=0):
+    """随机转向的无界面对局，死亡后立即重开，统计每秒推进的步数"""
+    rng = random.Random(seed)
+    state = engine.new_game(seed=seed)
+    games = 1
+    step = engine.step
+    start = time.perf_counter()
+    for _ in range(ticks):
+        action = rng.randrange(4) if rng.random() < 0.2 else None
+        if step(state, action) >= engine.STEP_DIED:
+            state = engine.new_game(seed=seed + games)
+            games += 1
+    elapsed = time.perf_counter() - start
+    print(f"{ticks} ticks in {elapsed:.3f}s -> {ticks / elapsed:,.0f} ticks/s ({games} games)")
+
+
+def bench_batch(boards=4096, steps=200, seed=0):
+    """同样推进 boards 个棋盘 steps 步：逐局调用 engine.step 与 BatchEngine.step 对比"""
+    import numpy as np
+    from batch_engine import BatchEngine, NO_ACTION
+
+    rng = random.Random(seed)
+    # 预先生成相同分布的随机转向，避免把随机数开销算进被测部分
+    plan = [[rng.randrange(4) if rng.random() < 0.2 else None
+             for _ in range(boards)] for _ in range(steps)]
+
+    games = [engine.new_game(seed=seed + i) for i in range(boards)]
+    step = engine.step
+    start = time.perf_counter()
+    for actions in plan:
+        for i, state in enumerate(games):
+            if step(state, actions[i]) >= engine.STEP_DIED:
+                games[i] = engine.new_game(seed=seed + i)
+    loop_elapsed = time.perf_counter() - start
+
+    code_plan = [np.array([NO_ACTION if a is None else a for a in actions], dtype=np.int8)
+                 for actions in plan]
+    batch = BatchEngine(boards, seed=seed)
+    start = time.perf_counter()
+    for actions in code_plan:
+        batch.step(actions)
+        if not batch.alive.all():
+            batch.reset(np.flatnonzero(~batch.alive))
+    batch_elapsed = time.perf_counter() - start
+
+    print(f"{boards} boards x {steps} steps")
+    print(f"  per-game loop : {loop_elapsed / steps * 1e3:8.3f} ms/step")
+    print(f"  BatchEngine   : {batch_elapsed / steps * 1e3:8.3f} ms/step")
+    print(f"  speedup       : {loop_elapsed / batch_elapsed:8.1f}x")
+
+
+def bench_board(cols=200, rows=200, cell_size=10, length=10000, ticks=20000):
+    """大棋盘长蛇：单步推进耗时与按可见窗口裁剪蛇身的耗时（微秒）"""
+    from grid import Viewport
+
+    cycle = serpentine_cycle(cols, rows, cell_size)
+    total = len(cycle)
+    state, cells = path_state(cycle, length, cols, rows, cell_size)
+    body = SnakeBody(state, cell_size)
+    cursor = [length]
+
+    def body_tick():
+        new_head = cells[cursor[0] % total]
+        if state.occupied[new_head]:
+            raise RuntimeError("unexpected collision")
+        state.push_head(new_head)
+        state.pop_tail()
+        cursor[0] += 1
+
+    viewport = Viewport(cols * cell_size, rows * cell_size)
+
+    def cull():
+        viewport.follow(body.head)
+        return body.segments_in_view(*viewport.cell_bounds(cell_size))
+
+    tick_us = _time_ticks(body_tick, ticks) / 1000
+    cull_us = _time_ticks(cull, ticks // 20) / 1000
+    print(f"{cols}x{rows} board, {length} segments, cell {cell_size}px")
+    print(f"  tick          : {tick_us:8.2f} us")
+    print(f"  viewport cull : {cull_us:8.2f} us ({len(cull())} visible segments)")
+
+
+def bench_loop(interval_ms=50, render_ms=15, ticks=60):
+    """用 time.sleep 模拟 window.after，比较两种调度在每帧绘制耗时 render_ms 下的实际步长"""
+    from game_loop import FixedTimestep
+
+    def render():
+        # 忙等模拟绘制与粒子特效的耗时
+        end = time.perf_counter() + render_ms / 1000
+        while time.perf_counter() < end:
+            pass
+
+    # 旧实现：模拟 + 绘制后再 after(snake_speed)，绘制耗时叠加到每一步
+    start = time.perf_counter()
+    for _ in range(ticks):
+        render()
+        time.sleep(interval_ms / 1000)
+    chained_ms = (time.perf_counter() - start) / ticks * 1000
+
+    clock = FixedTimestep(interval_ms)
+    while clock.ticks < ticks:
+        if clock.due():
+            render()
+        time.sleep(clock.delay_ms() / 1000)
+    fixed_ms = clock.average_interval_ms()
+
+    print(f"nominal {interval_ms} ms/tick, render {render_ms} ms/frame")
+    print(f"  chained after : {chained_ms:8.2f} ms/tick ({(chained_ms / interval_ms - 1) * 100:+.1f}%)")
+    print(f"  FixedTimestep : {fixed_ms:8.2f} ms/tick ({(fixed_ms / interval_ms - 1) * 100:+.1f}%)")
+
+
+def bench_state(sizes=((20, 20, 200), (200, 200, 10000)), copies=2000):
+    """对比 GameState.clone / restore 与深拷贝（像素元组列表 + 字典）快照的单次耗时（微秒）"""
+    import copy
+
+    print(f"{'board':>9} {'length':>7} {'deepcopy us':>12} {'clone us':>10} {'restore us':>11}")
+    for cols, rows, length in sizes:
+        state = engine.GameState(cols, rows, rng=random.Random(0))
+        cycle = serpentine_cycle(cols, rows, 1)
+        for x, y in cycle[:length]:
+            state.push_head(y * cols + x)
+        engine.spawn_food(state)
+        # 旧做法：把闭包变量收集成字典再整体深拷贝
+        legacy = {
+            'snake': [(x * CELL_SIZE, y * CELL_SIZE) for x, y in cycle[:length]],
+            'snake_direction': engine.DOWN, 'food': (0, 0), 'current_score': 0, 'snake_speed': 100,
+            'rng': state.rng.getstate(),
+        }
+        target = state.clone()
+
+        deep_us = _time_ticks(lambda: copy.deepcopy(legacy), copies // 10) / 1000
+        clone_us = _time_ticks(state.clone, copies) / 1000
+        restore_us = _time_ticks(lambda: target.restore(state), copies) / 1000
+        print(f"{cols:>4}x{rows:<4} {length:>7} {deep_us:>12.1f} {clone_us:>10.1f} {restore_us:>11.1f}")
+
+
+def bench_save(length=399, loads=2000):
+    """20x20 棋盘上 length 节长蛇的存档打包、解包与读盘耗时（微秒）"""
+    import os
+    import tempfile
+    import savegame
+
+    state = engine.GameState(rng=random.Random(0), seed=0)
+    for x, y in serpentine_cycle(GRID_COLS, GRID_ROWS, 1)[:length]:
+        state.push_head(y * GRID_COLS + x)
+    engine.spawn_food(state)
+    saved = savegame.saved_from_state(state, CELL_SIZE)
+    data = savegame.pack(saved)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'savegame.bin')
+        savegame.save_game(path, saved)
+        pack_us = _time_ticks(lambda: savegame.pack(saved), loads) / 1000
+        unpack_us = _time_ticks(lambda: savegame.unpack(data), loads) / 1000
+        load_us = _time_ticks(lambda: savegame.load_game(path), loads) / 1000
+    print(f"{length} segments, {len(data)} bytes")
+    print(f"  pack      : {pack_us:8.1f} us")
+    print(f"  unpack    : {unpack_us:8.1f} us")
+    print(f"  load_game : {load_us:8.1f} us")
+
+
+def cycle_replay(cols, rows, ticks, seed=0):
+    """沿蛇形哈密顿回路行走 ticks 步（不会撞死）并录制为 replay.Replay，用作长回放负载"""
+    from replay import ReplayRecorder
+
+    path = serpentine_cycle(cols, rows, 1)
+    next_cell = {}
+    for (x, y), (nx, ny) in zip(path, path[1:] + path[:1]):
+        next_cell[y * cols + x] = (nx - x, ny - y)
+    turn_for = {delta: code for code, delta in enumerate(DELTAS)}
+
+    state = engine.new_game("Pass", seed, cols, rows, color_chose=3, background=0)
+    recorder = ReplayRecorder(seed, "Pass", cols, rows, 3, 0)
+    while state.alive and state.ticks < ticks:
+        turn = turn_for[next_cell[state.head]]
+        if turn != state.direction:
+            recorder.record(state.ticks, turn)
+        engine.step(state, turn)
+    return recorder.finish(state.ticks, state.score, False)
+
+
+# 随机跳转的耗时预算（毫秒），按最坏情况（关键帧之前一步）的中位数检查
+SEEK_BUDGET_MS = 5.0
+
+
+def bench_archive(ticks=100000, interval=None, seeks=1000, seed=0):
+    """40x40 棋盘上 ticks 步的回放：构建归档并测量随机跳转的平均与最大耗时（毫秒）。
+
+    另外对每个关键帧跳转到它之后的第 K-1 步（复制一个关键帧再模拟 K-1 步，即最坏情况），
+    其中位数须在 SEEK_BUDGET_MS 之内；单次最大值还包含系统调度的抖动，只作参考。
+    """
+    import os
+    import statistics
+    import tempfile
+    from replay_archive import DEFAULT_INTERVAL, ReplayArchive, build_archive
+
+    interval = interval or DEFAULT_INTERVAL
+    replay = cycle_replay(40, 40, ticks, seed)
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'run.gsra')
+        start = time.perf_counter()
+        build_archive(path, replay, interval)
+        build_s = time.perf_counter() - start
+        size = os.path.getsize(path)
+        with ReplayArchive(path) as archive:
+            times = []
+            for _ in range(seeks):
+                tick = rng.randrange(archive.ticks + 1)
+                start = time.perf_counter()
+                state, _ = archive.seek(tick)
+                times.append(time.perf_counter() - start)
+                assert state.ticks == tick
+            worst = []
+            for keyframe in range(archive.keyframe_count):
+                tick = min(keyframe * interval + interval - 1, archive.ticks)
+                start = time.perf_counter()
+                archive.seek(tick)
+                worst.append(time.perf_counter() - start)
+    print(f"{replay.ticks} ticks, {replay.count} turns ({len(replay.inputs)} bytes), "
+          f"keyframe every {interval} ticks")
+    print(f"  build   : {build_s:8.2f} s, {size / 1024:,.0f} KiB")
+    times.sort()
+    print(f"  seek    : {sum(times) / seeks * 1e3:8.2f} ms avg, "
+          f"{times[int(seeks * 0.99)] * 1e3:.2f} ms p99, {times[-1] * 1e3:.2f} ms max")
+    worst_ms = statistics.median(worst) * 1e3
+    print(f"  worst   : {worst_ms:8.2f} ms median, {max(worst) * 1e3:.2f} ms max "
+          f"(keyframe + {interval - 1} ticks, budget {SEEK_BUDGET_MS:.0f} ms)")
+    if worst_ms > SEEK_BUDGET_MS:
+        raise RuntimeError(f"worst-case seek {worst_ms:.2f} ms exceeds the {SEEK_BUDGET_MS:.0f} ms budget")
+
+
+def bench_autopilot(sizes=((20, 20), (40, 40)), length=300, trials=200, seed=0):
+    """length 节长蛇上自动驾驶的决策耗时（毫秒）：每次都重新规划 vs 沿用路径连续行走"""
+    from autopilot import SEARCH_ALGORITHMS, Autopilot
+
+    rng = random.Random(seed)
+    print(f"{'board':>9} {'algorithm':>9} {'replan avg':>11} {'replan max':>11} "
+          f"{'play avg':>9} {'play max':>9}")
+    for cols, rows in sizes:
+        state = engine.GameState(cols, rows, rng=rng)
+        cycle = serpentine_cycle(cols, rows, 1)
+        for x, y in cycle[:length]:
+            state.push_head(y * cols + x)
+        (x0, y0), (x1, y1) = cycle[length - 2:length]
+        state.direction = DELTAS.index((x1 - x0, y1 - y0))
+        for algorithm in SEARCH_ALGORITHMS:
+            replans = []
+            plays = []
+            for _ in range(trials):
+                trial = state.clone()
+                engine.spawn_food(trial)
+                pilot = Autopilot(cols, rows, "Pass", algorithm)
+                start = time.perf_counter()
+                pilot.decide(trial)
+                replans.append(time.perf_counter() - start)
+                # 接着连续走 50 步（途中会吃到食物并重新规划）
+                for _ in range(50):
+                    start = time.perf_counter()
+                    action = pilot.decide(trial)
+                    plays.append(time.perf_counter() - start)
+                    if engine.step(trial, action) == engine.STEP_DIED:
+                        break
+            print(f"{cols:>4}x{rows:<4} {algorithm:>9} {sum(replans) / len(replans) * 1e3:>11.3f} "
+                  f"{max(replans) * 1e3:>11.3f} {sum(plays) / len(plays) * 1e3:>9.3f} "
+                  f"{max(plays) * 1e3:>9.3f}")
+
+
+def bench_late(games=3, bands=(100, 200, 300, 350, 400), seed=0):
+    """用 HamiltonPilot 把 20x20 棋盘填满（确定性的后期负载），按蛇长分段统计决策与单步耗时（微秒）"""
+    from bisect import bisect_left
+    from autopilot import HamiltonPilot
+
+    totals = [[0, 0.0, 0.0] for _ in bands]  # 步数、决策耗时、engine.step 耗时
+    full = 0
+    clock = time.perf_counter
+    for game in range(games):
+        state = engine.new_game("Pass", seed + game)
+        pilot = HamiltonPilot()
+        result = engine.STEP_MOVED
+        while result not in (engine.STEP_DIED, engine.STEP_FULL):
+            band = totals[bisect_left(bands, state.length)]
+            t0 = clock()
+            action = pilot.decide(state)
+            t1 = clock()
+            result = engine.step(state, action)
+            t2 = clock()
+            band[0] += 1
+            band[1] += t1 - t0
+            band[2] += t2 - t1
+        full += result == engine.STEP_FULL
+    print(f"{full}/{games} games filled the board")
+    print(f"{'length':>9} {'ticks':>8} {'decide us':>10} {'step us':>8}")
+    low = 0
+    for high, (ticks, decide_s, step_s) in zip(bands, totals):
+        if ticks:
+            print(f"{low:>4}-{high:<4} {ticks:>8} {decide_s / ticks * 1e6:>10.2f} {step_s / ticks * 1e6:>8.2f}")
+        low = high + 1
+
+
+def bench_versus(cols=40, rows=40, length=200, ticks=20000, seed=0):
+    """两条 length 节长蛇沿同一哈密顿回路的两端前进（不会相撞）：单步耗时与常驻画布项的更新次数"""
+    import versus
+    from autopilot import hamiltonian_cycle
+
+    cycle, order = hamiltonian_cycle(cols, rows)
+    size = len(cycle)
+    state = versus.VersusState(cols, rows, "Pass", random.Random(seed), seed)
+    neighbors = neighbor_table(cols, rows, True)
+    turn_for = {}
+    for cell, nxt in zip(cycle, cycle[1:] + cycle[:1]):
+        turn_for[cell] = neighbors.index(nxt, cell * 4, cell * 4 + 4) - cell * 4
+    for start in (0, size // 2):
+        cells = [cycle[(start + i) % size] for i in range(length)]
+        state.add_snake(cells, turn_for[cells[-2]])
+    state.spawn_food()
+
+    updates = 0
+    start = time.perf_counter()
+    for _ in range(ticks):
+        versus.step(state, [turn_for[snake.head] for snake in state.snakes])
+        # 绘制层每条移动的蛇：一次 coords（或新建一项）+ 一次蛇头 coords
+        updates += 2 * sum(snake.moved for snake in state.snakes)
+        if state.over:
+            raise RuntimeError("unexpected collision")
+        if min(len(snake) for snake in state.snakes) > size // 2 - 8:
+            break
+    elapsed = time.perf_counter() - start
+    done = state.ticks
+    print(f"{cols}x{rows}, 2 snakes from {length} to {[len(snake) for snake in state.snakes]} segments")
+    print(f"  step    : {elapsed / done * 1e6:8.1f} us/tick over {done} ticks")
+    print(f"  canvas  : {updates / done:8.1f} item updates/tick (independent of length)")
+
+
+def bench_arena(snakes=150, cols=300, rows=300, cell_size=8, ticks=1000, seed=0):
+    """竞技场：全部蛇一次推进的单步耗时，以及跟随一条蛇时 400x400 可见窗口的裁剪耗时与绘制项数"""
+    import arena
+    from grid import Viewport
+
+    state = arena.new_arena(snakes, cols, rows, "Pass", seed)
+    viewport = Viewport(cols * cell_size, rows * cell_size)
+    step_s = 0.0
+    cull_s = 0.0
+    items = cells = 0
+    clock = time.perf_counter
+    for _ in range(ticks):
+        start = clock()
+        arena.step(state)
+        step_s += clock() - start
+        start = clock()
+        leader = max(state.snakes, key=lambda snake: (snake.alive, snake.score))
+        row, col = divmod(leader.head, cols)
+        viewport.follow((col * cell_size, row * cell_size))
+        bounds = arena.visible_cells(viewport, cell_size, cols, rows)
+        runs = list(arena.visible_runs(state, *bounds))
+        foods = list(arena.visible_foods(state, *bounds))
+        cull_s += clock() - start
+        items += len(runs) + len(foods)
+        cells += sum(run[2] for run in runs) + len(foods)
+    print(f"{snakes} snakes on {cols}x{rows}, {ticks} ticks "
+          f"({state.deaths} deaths, {state.eaten} eaten)")
+    print(f"  step    : {step_s / ticks * 1e3:8.2f} ms/tick -> {ticks / step_s:,.0f} ticks/s")
+    print(f"  cull    : {cull_s / ticks * 1e3:8.2f} ms/frame for a {viewport.width}x{viewport.height} view")
+    print(f"  items   : {items / ticks:8.1f} per frame for {cells / ticks:.1f} visible cells")
+
+
+class _CountingCanvas:
+    """只计数的画布替身：每个方法调用算一次 Tcl 往返"""
+
+    def __init__(self):
+        self.calls = 0
+        self._last_item = 0
+
+    def _create(self, *args, **kwargs):
+        self.calls += 1
+        self._last_item += 1
+        return self._last_item
+
+    def _call(self, *args, **kwargs):
+        self.calls += 1
+
+    create_rectangle = create_oval = _create
+    coords = itemconfigure = move = tag_raise = tag_lower = delete = _call
+
+    def type(self, item):
+        return "rectangle"
+
+
+def bench_canvas(lengths=(10, 100, 399), ticks=2000):
+    """20x20 棋盘上不同蛇长：旧做法每步 delete("all") 后逐节重建，与 SnakeRenderer 增量同步的画布调用次数；
+    再在 200x200 棋盘上让可见窗口跟随 5000 节长蛇，统计常驻画布项数与每步的画布调用次数"""
+    from autopilot import hamiltonian_cycle
+    from renderer import EYE_OVALS, SnakeRenderer
+
+    cycle, _ = hamiltonian_cycle(GRID_COLS, GRID_ROWS)
+    positions = [(cell % GRID_COLS * CELL_SIZE, cell // GRID_COLS * CELL_SIZE) for cell in cycle]
+    colors = ("#FF80ED", "#FF50B8", "#FF2087", "#FF00AA")
+    print(f"{'length':>7} {'rebuild calls':>14} {'pooled calls':>13} {'pooled us':>10}")
+    for length in lengths:
+        state, cells = path_state(positions, length)
+        body = SnakeBody(state)
+        canvas = _CountingCanvas()
+        renderer = SnakeRenderer(canvas, CELL_SIZE)
+        renderer.sync(body, engine.DOWN, colors)
+        canvas.calls = 0
+        elapsed = 0.0
+        for tick in range(ticks):
+            state.push_head(cells[(length + tick) % len(cells)])
+            state.pop_tail()
+            start = time.perf_counter()
+            renderer.sync(body, engine.DOWN, colors)
+            elapsed += time.perf_counter() - start
+        # 旧做法：一次 delete("all")，每节蛇身一个矩形，蛇头一个矩形加四个眼睛椭圆
+        rebuild = 1 + length + 1 + len(EYE_OVALS[0])
+        print(f"{length:>7} {rebuild:>14} {canvas.calls / ticks:>13.1f} {elapsed / ticks * 1e6:>10.2f}")
+
+    # 大棋盘：可见窗口每步跟随蛇头移动，只有窗口内的蛇身节有画布项
+    from grid import Viewport
+    cols = rows = 200
+    path = serpentine_cycle(cols, rows)
+    length = 5000
+    state, cells = path_state(path, length, cols, rows)
+    body = SnakeBody(state)
+    viewport = Viewport(cols * CELL_SIZE, rows * CELL_SIZE)
+    canvas = _CountingCanvas()
+    renderer = SnakeRenderer(canvas, CELL_SIZE)
+    viewport.follow(body.head)
+    renderer.sync(body, engine.DOWN, colors, viewport)
+    canvas.calls = 0
+    elapsed = 0.0
+    max_items = 0
+    for tick in range(ticks):
+        state.push_head(cells[(length + tick) % len(cells)])
+        state.pop_tail()
+        start = time.perf_counter()
+        viewport.follow(body.head)
+        renderer.sync(body, engine.DOWN, colors, viewport)
+        elapsed += time.perf_counter() - start
+        max_items = max(max_items, len(renderer.items))
+    print(f"{cols}x{rows} board, {length} segments, viewport following the head:")
+    print(f"  pooled items : {max_items} max (visible segments only)")
+    print(f"  canvas calls : {canvas.calls / ticks:.1f}/tick, {elapsed / ticks * 1e6:.2f} us/tick")
+
+
+def bench_sprites(styles=("flat", "bevel", "glow", "rounded")):
+    """只计 PIL 绘制部分（转成 PhotoImage 需要 Tk）：开局按需生成的一套配色 vs 全部 6x3x4 色与四个方向"""
+    from sprites import head_image, segment_image
+
+    # 与游戏里的配色方案数量相同的 72 个不同颜色，每 4 个为一套渐变
+    colors = [f"#{(i * 37) % 256:02x}{(i * 91) % 256:02x}{(i * 53) % 256:02x}" for i in range(72)]
+    print(f"{'style':>8} {'one palette ms':>15} {'full atlas ms':>14}")
+    for style in styles:
+        segment_image.cache_clear()
+        head_image.cache_clear()
+        start = time.perf_counter()
+        for color in colors[:4]:
+            segment_image(color, CELL_SIZE, style)
+        head_image(colors[0], engine.DOWN, CELL_SIZE, style)
+        first = time.perf_counter() - start
+        segment_image.cache_clear()
+        head_image.cache_clear()
+        start = time.perf_counter()
+        for color in colors:
+            segment_image(color, CELL_SIZE, style)
+        for color in colors[::4]:
+            for direction in range(4):
+                head_image(color, direction, CELL_SIZE, style)
+        full = time.perf_counter() - start
+        print(f"{style:>8} {first * 1e3:>15.2f} {full * 1e3:>14.2f}")
+
+
+def bench_compositor(counts=(100, 1000, 5000), frames=30, seed=0):
+    """背景 + 100 节蛇 + N 个运动粒子：每帧逐个重建粒子画布项 vs 合成进一张位图"""
+    from PIL import Image, ImageTk
+    from compositor import FrameCompositor
+    from grid import CANVAS_HEIGHT, CANVAS_WIDTH, Viewport
+
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+        root.withdraw()
+    except Exception as e:  # 没有图形界面时只测位图合成本身
+        print(f"(no Tk display: {e.__class__.__name__}; canvas column and PhotoImage push skipped)")
+        root = None
+
+    background = Image.effect_noise((CANVAS_WIDTH, CANVAS_HEIGHT), 64).convert("RGB")
+    body = SnakeBody(path_state(serpentine_cycle(), 100)[0])
+    colors = ("#FF80ED", "#FF50B8", "#FF2087", "#FF00AA")
+    palette = ("#FF1493", "#FFD700", "#00FFFF", "#9932CC", "#32CD32", "#FF4500")
+    viewport = Viewport(GRID_COLS * CELL_SIZE, GRID_ROWS * CELL_SIZE)
+
+    def particles(count):
+        """与死亡粒子相同的运动规律：匀减速直线运动、逐渐缩小变淡"""
+        rand = random.Random(seed)
+        return [[rand.uniform(0, CANVAS_WIDTH), rand.uniform(0, CANVAS_HEIGHT), rand.uniform(0, 6.3),
+                 rand.uniform(3, 6), rand.uniform(3, 6), rand.choice(palette)] for _ in range(count)]
+
+    def move(p):
+        p[0] += math.cos(p[2]) * p[3]
+        p[1] += math.sin(p[2]) * p[3]
+        p[3] *= 0.98
+
+    print(f"{'particles':>9} {'canvas ms':>10} {'bitmap ms':>10} {'compose ms':>11}")
+    for count in counts:
+        canvas_ms = "-"
+        if root is not None:
+            canvas = tk.Canvas(root, width=CANVAS_WIDTH, height=CANVAS_HEIGHT)
+            canvas.pack()
+            photo = ImageTk.PhotoImage(background, master=root)
+            canvas.create_image(0, 0, anchor=tk.NW, image=photo)
+            for x, y in body:
+                canvas.create_rectangle(x, y, x + CELL_SIZE, y + CELL_SIZE, fill=colors[0], outline="")
+            moving = particles(count)
+            ids = []
+            start = time.perf_counter()
+            for _ in range(frames):
+                if ids:
+                    canvas.delete(*ids)
+                ids = []
+                for p in moving:
+                    move(p)
+                    ids.append(canvas.create_oval(p[0] - p[4], p[1] - p[4], p[0] + p[4], p[1] + p[4],
+                                                  fill=p[5], outline=""))
+                root.update_idletasks()
+            canvas_ms = f"{(time.perf_counter() - start) / frames * 1e3:.2f}"
+            canvas.destroy()
+
+        compositor = FrameCompositor(CANVAS_WIDTH, CANVAS_HEIGHT, CELL_SIZE)
+        compositor.set_background(background)
+        moving = particles(count)
+        compose_time = 0.0
+        start = time.perf_counter()
+        for _ in range(frames):
+            compositor.clear_splats()
+            for p in moving:
+                move(p)
+                compositor.splat(p[0], p[1], p[4], p[5])
+            t0 = time.perf_counter()
+            compositor.compose(body, engine.DOWN, colors, viewport)
+            compose_time += time.perf_counter() - t0
+            if root is not None:
+                compositor.present(root)
+                root.update_idletasks()
+            else:
+                compositor.frame.tobytes()  # 代替 PhotoImage.paste 的整帧拷贝
+        bitmap = (time.perf_counter() - start) / frames * 1e3
+        print(f"{count:>9} {canvas_ms:>10} {bitmap:>10.2f} {compose_time / frames * 1e3:>11.2f}")
+    if root is not None:
+        root.destroy()
+
+
+def bench_palette(frames=100000):
+    """食物呼吸光、分数金色渐变与星星糖三种动态颜色：原来逐帧解析 / 格式化十六进制 vs 查表"""
+    from palette import FOOD_GLOW, HUD_GOLD, STAR_CANDY_CYCLE, cycle_level, level, pulse_level
+
+    def adjust_color(hex_color, factor):
+        r = min(255, int(int(hex_color[1:3], 16) * factor))
+        g = min(255, int(int(hex_color[3:5], 16) * factor))
+        b = min(255, int(int(hex_color[5:7], 16) * factor))
+        return f'#{r:02x}{g:02x}{b:02x}'
+
+    def formatted(t):
+        food = adjust_color("#FF0033", abs(math.sin(t * 2)) * 0.2 + 0.8)
+        value = int(243 + 12 * math.sin(t * 2))
+        gold = f"#{value:02x}{int(value * 0.8):02x}00"
+        candy = '#' + ''.join(f'{int(128 + 127 * math.sin(t * 2.0 + shift)):02x}' for shift in (0.0, 2.0, 4.0))
+        return food, gold, candy
+
+    glow = FOOD_GLOW['normal']
+
+    def lookup(t):
+        return (glow[level(abs(math.sin(t * 2)))], HUD_GOLD[pulse_level(t, 2)],
+                STAR_CANDY_CYCLE[cycle_level(t, 2.0)])
+
+    times = [i / 60 for i in range(frames)]
+    print(f"{'method':>10} {'us/frame':>9}")
+    for name, fn in (("format", formatted), ("lookup", lookup)):
+        start = time.perf_counter()
+        for t in times:
+            fn(t)
+        print(f"{name:>10} {(time.perf_counter() - start) / frames * 1e6:>9.2f}")
+
+
+BENCHMARKS = {
+    'body': bench_body,
+    'food': bench_food,
+    'engine': bench_engine,
+    'batch': bench_batch,
+    'board': bench_board,
+    'loop': bench_loop,
+    'state': bench_state,
+    'save': bench_save,
+    'archive': bench_archive,
+    'autopilot': bench_autopilot,
+    'late': bench_late,
+    'versus': bench_versus,
+    'arena': bench_arena,
+    'canvas': bench_canvas,
+    'sprites': bench_sprites,
+    'compositor': bench_compositor,
+    'palette': bench_palette,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="贪吃蛇性能基准")
+    parser.add_argument('names', nargs='*', metavar='name',
+                        help=f"要运行的基准（默认全部）：{', '.join(BENCHMARKS)}")
+    args = parser.parse_args()
+    for name in args.names:
+        if name not in BENCHMARKS:
+            parser.error(f"未知基准: {name}")
+    for name in args.names or BENCHMARKS:
+        print(f"== {name} ==")
+        BENCHMARKS[name]()
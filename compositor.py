@@ -0,0 +1,114 @@
+"""
+位图合成模块
+画布之外的另一种绘制后端：每帧把背景、蛇（sprites 的缓存贴图块）与粒子合成到一张
+画布大小的 RGB 位图（PIL 图片），再整体贴进画布上唯一的一个 PhotoImage。
+
+Tk 画布的开销随画布项数量增长，死亡粒子这类同时有上千个粒子的场景会明显掉帧；
+位图后端每帧只有一次贴图，与粒子数无关。粒子以带透明度的实心圆按排入顺序逐个混合进位图
+（ImageDraw 的 RGBA 模式，逐像素的循环都在 PIL 的 C 代码里）。
+"""
+
+from functools import lru_cache
+
+from PIL import Image, ImageDraw, ImageTk
+
+from grid import CANVAS_HEIGHT, CANVAS_WIDTH, CELL_SIZE
+from palette import hex_to_rgb
+from sprites import head_image, segment_image
+
+
+@lru_cache(maxsize=None)
+def _tile(image):
+    """RGBA 小图 -> (RGB 图片, 透明度蒙版)；完全不透明时蒙版为 None，贴图直接覆盖"""
+    mask = image.getchannel("A")
+    return image.convert("RGB"), (None if mask.getextrema()[0] == 255 else mask)
+
+
+class FrameCompositor:
+    """把一帧合成进一张位图，并推送到同一个 PhotoImage。
+
+    用法：每帧 `clear_splats` 后用 `splat` 排入粒子，再 `render` 得到已更新的 PhotoImage。
+    """
+
+    def __init__(self, width=CANVAS_WIDTH, height=CANVAS_HEIGHT, cell_size=CELL_SIZE, style="flat"):
+        self.width = width
+        self.height = height
+        self.cell_size = cell_size
+        self.style = style
+        self.background = Image.new("RGB", (width, height))
+        self.frame = Image.new("RGB", (width, height))
+        self._draw = ImageDraw.Draw(self.frame, "RGBA")
+        self._background_source = None
+        self._segments = {}
+        self._heads = {}
+        self._splats = []
+        self.photo = None
+
+    def set_background(self, image):
+        """换背景图（PIL 图片）；与上次是同一个对象时什么也不做"""
+        if image is self._background_source:
+            return
+        self._background_source = image
+        if image.size != (self.width, self.height):
+            image = image.resize((self.width, self.height))
+        self.background = image.convert("RGB")
+
+    def _segment(self, color):
+        tile = self._segments.get(color)
+        if tile is None:
+            tile = self._segments[color] = _tile(segment_image(color, self.cell_size, self.style))
+        return tile
+
+    def _head(self, color, direction):
+        key = (color, direction)
+        tile = self._heads.get(key)
+        if tile is None:
+            tile = self._heads[key] = _tile(head_image(color, direction, self.cell_size, self.style))
+        return tile
+
+    def draw_snake(self, snake, direction, colors, viewport):
+        """画出 snake 落在 viewport 内的部分；颜色规则与 renderer.SnakeRenderer 相同（按推入序号取色）"""
+        paste = self.frame.paste
+        ox, oy = viewport.x, viewport.y
+        ncolors = len(colors)
+        tail_order = snake.pushed - len(snake) + 1
+        head_index = len(snake) - 1
+        for (x, y), index in snake.segments_in_view(*viewport.cell_bounds(self.cell_size)):
+            if index != head_index:
+                image, mask = self._segment(colors[(tail_order + index) % ncolors])
+                paste(image, (x - ox, y - oy), mask)
+        hx, hy = snake.head
+        image, mask = self._head(colors[0], direction)
+        paste(image, (hx - ox, hy - oy), mask)
+
+    def clear_splats(self):
+        self._splats.clear()
+
+    def splat(self, x, y, radius, color, alpha=1.0):
+        """排入一个圆形粒子（画布坐标、像素半径、#RRGGBB 颜色、不透明度 0~1）"""
+        if alpha > 0 and radius > 0:
+            self._splats.append(((x - radius, y - radius, x + radius, y + radius),
+                                 hex_to_rgb(color) + (min(255, int(alpha * 255)),)))
+
+    def compose(self, snake=None, direction=None, colors=None, viewport=None):
+        """合成一帧：背景、蛇（snake 为 None 时不画）、排队的粒子；返回位图"""
+        self.frame.paste(self.background)
+        if snake is not None:
+            self.draw_snake(snake, direction, colors, viewport)
+        ellipse = self._draw.ellipse
+        for box, fill in self._splats:
+            ellipse(box, fill=fill)
+        return self.frame
+
+    def present(self, master=None):
+        """把当前位图贴进同一个 PhotoImage（第一次调用时创建），返回该 PhotoImage"""
+        if self.photo is None:
+            self.photo = ImageTk.PhotoImage(self.frame, master=master)
+        else:
+            self.photo.paste(self.frame)
+        return self.photo
+
+    def render(self, snake=None, direction=None, colors=None, viewport=None, master=None):
+        """合成一帧并推送到 PhotoImage"""
+        self.compose(snake, direction, colors, viewport)
+        return self.present(master)
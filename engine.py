@@ -0,0 +1,329 @@
+"""
+无界面游戏引擎模块
+把 _start_main_game_impl 中的游戏规则抽离为纯数据操作：不导入 Tk / pygame / PIL，
+以 `step(state, action)` 推进一步，便于机器人、测试与性能基准在无窗口环境下运行。
+
+坐标统一使用格子下标 `cell = row * cols + col`，需要像素坐标时用 `cell_to_pos` 转换。
+"""
+
+import random
+from array import array
+from collections import deque
+
+from grid import FreeCells, GRID_COLS, GRID_ROWS, CELL_SIZE, DOWN, neighbor_table
+from foods import FOOD_SPECS, pick_food_type
+from events import Ate, SpeedChanged, Milestone, Died, BackgroundChanged, crossed_milestone
+
+# 速度（毫秒/步）与效果规则，与 move_snake 保持一致
+INITIAL_SPEED = 100
+MIN_SPEED = 70
+MAX_SPEED = 120
+
+# 食物类型：分数、效果、生成权重（由 foods.FOOD_SPECS 统一定义）
+FOOD_SCORES = {spec.name: spec.score for spec in FOOD_SPECS}
+FOOD_EFFECTS = {spec.name: spec.effect for spec in FOOD_SPECS}
+FOOD_WEIGHTS = tuple(spec.weight for spec in FOOD_SPECS)
+
+COLOR_SCHEME_COUNT = 6
+BACKGROUND_COUNT = 5
+
+# step() 的返回值
+STEP_MOVED = 0   # 正常移动
+STEP_ATE = 1     # 吃到食物
+STEP_DIED = 2    # 撞墙或撞到自己
+STEP_FULL = 3    # 蛇占满棋盘（完美通关）
+
+# 每步最多消费一个转向，最多缓存几个尚未生效的转向
+INPUT_QUEUE_SIZE = 3
+
+
+def session_rngs(seed=None):
+    """创建一局游戏的随机数流，返回 (seed, 玩法流, 外观流)。
+
+    玩法流只用于食物位置/类型与食物效果，外观流用于开局配色、背景与所有粒子特效，
+    两者互不干扰：特效多少不会改变食物序列。seed 为 None 时随机生成一个并返回，便于记录复现。
+    """
+    if seed is None:
+        seed = random.SystemRandom().randrange(1 << 32)
+    return seed, random.Random(seed), random.Random(f"cosmetic-{seed}")
+
+
+def effect_speed(effect, speed):
+    """返回食物效果作用后的速度"""
+    if effect == 'speed_up':
+        return max(MIN_SPEED, speed - 10)
+    if effect == 'slow_down':
+        return min(MAX_SPEED, speed + 10)
+    if effect == 'rainbow':
+        return max(MIN_SPEED, speed - 5)
+    if effect == 'star_candy':
+        return max(MIN_SPEED, speed - 2)
+    return speed
+
+
+class InputQueue:
+    """有界的转向输入队列（方向编码），每个时间步消费一个。
+
+    入队时与“轮到它生效时的方向”（队尾，队列为空则为当前方向）比较：
+    相同方向（按键连发）直接合并，反向转向直接丢弃，队列已满时丢弃新输入，
+    因此快速连按两个方向（如 上+左 掉头）不会丢失，也不会因反向而撞死自己。
+    """
+    __slots__ = ('pending', 'capacity')
+
+    def __init__(self, capacity=INPUT_QUEUE_SIZE):
+        self.pending = deque()
+        self.capacity = capacity
+
+    def heading(self, current):
+        """所有已缓存转向生效后的方向"""
+        return self.pending[-1] if self.pending else current
+
+    def push(self, direction, current):
+        """缓存一个转向，current 为蛇当前的移动方向；被合并或丢弃时返回 False"""
+        heading = self.pending[-1] if self.pending else current
+        if direction == heading or direction == heading ^ 1:
+            return False
+        if len(self.pending) >= self.capacity:
+            return False
+        self.pending.append(direction)
+        return True
+
+    def pop(self):
+        """取出本步要生效的转向；没有则返回 None"""
+        return self.pending.popleft() if self.pending else None
+
+    def clear(self):
+        self.pending.clear()
+
+    def __len__(self):
+        return len(self.pending)
+
+
+class GameState:
+    """一局游戏的全部可变状态，全部为标量或定长数组，便于快速复制。
+
+    - body：长度为 cols*rows 的环形缓冲区，`tail_idx` 到 `head_idx` 为蛇身（尾 -> 头）
+    - occupied：每格一个字节的占用位图；free：空闲格子索引
+    - direction：方向编码（见 grid.DIRECTION_CODES）；food_type：FOOD_TYPES 中的下标
+    - neighbors：本棋盘尺寸与模式的 grid.neighbor_table，各局共享
+
+    `clone()` / `restore()` 只做几次定长数组复制与随机数状态拷贝，
+    机器人搜索、回退与存档可以每秒复制数千次。
+    """
+    __slots__ = (
+        'cols', 'rows', 'mode', 'body', 'head_idx', 'tail_idx', 'length',
+        'occupied', 'free', 'direction', 'food', 'food_type', 'score', 'speed',
+        'color_chose', 'background', 'alive', 'ticks', 'rng', 'seed', 'inputs', 'neighbors',
+    )
+
+    def __init__(self, cols=GRID_COLS, rows=GRID_ROWS, mode="Pass", rng=None, seed=None):
+        self.cols = cols
+        self.rows = rows
+        self.mode = mode
+        self.neighbors = neighbor_table(cols, rows, mode == "Pass")
+        self.body = array('i', bytes(4 * cols * rows))
+        self.head_idx = -1
+        self.tail_idx = 0
+        self.length = 0
+        self.occupied = bytearray(cols * rows)
+        self.free = FreeCells(cols * rows)
+        self.direction = DOWN
+        self.food = -1
+        self.food_type = -1
+        self.score = 0
+        self.speed = INITIAL_SPEED
+        self.color_chose = 0
+        self.background = 0
+        self.alive = True
+        self.ticks = 0
+        self.rng = rng if rng is not None else random.Random(seed)
+        self.seed = seed
+        self.inputs = InputQueue()
+
+    def push_head(self, cell):
+        head_idx = self.head_idx + 1
+        if head_idx == len(self.body):
+            head_idx = 0
+        self.head_idx = head_idx
+        self.body[head_idx] = cell
+        self.length += 1
+        self.occupied[cell] = 1
+        self.free.remove(cell)
+
+    def pop_tail(self):
+        tail_idx = self.tail_idx
+        cell = self.body[tail_idx]
+        tail_idx += 1
+        self.tail_idx = 0 if tail_idx == len(self.body) else tail_idx
+        self.length -= 1
+        self.occupied[cell] = 0
+        self.free.add(cell)
+        return cell
+
+    @property
+    def head(self):
+        return self.body[self.head_idx]
+
+    def cells(self):
+        """蛇身格子下标迭代器（从尾到头）"""
+        body = self.body
+        size = len(body)
+        tail_idx = self.tail_idx
+        for i in range(self.length):
+            index = tail_idx + i
+            yield body[index - size if index >= size else index]
+
+    def clone(self):
+        """返回一份独立的副本（随机数流同样被复制，副本与原对局走出相同的食物序列）"""
+        clone = GameState.__new__(GameState)
+        clone.rng = random.Random(0)  # 固定种子避免读取系统熵，随后被 setstate 覆盖
+        clone.inputs = InputQueue()
+        clone.body = array('i', self.body)
+        clone.occupied = bytearray(self.occupied)
+        clone.free = self.free.copy()
+        clone._copy_scalars(self)
+        return clone
+
+    def restore(self, other):
+        """就地恢复为 other 的状态（两者须为同一棋盘尺寸），不分配新数组"""
+        self.body[:] = other.body
+        self.occupied[:] = other.occupied
+        self.free.restore(other.free)
+        self._copy_scalars(other)
+
+    def _copy_scalars(self, other):
+        self.cols = other.cols
+        self.rows = other.rows
+        self.mode = other.mode
+        self.neighbors = other.neighbors
+        self.head_idx = other.head_idx
+        self.tail_idx = other.tail_idx
+        self.length = other.length
+        self.direction = other.direction
+        self.food = other.food
+        self.food_type = other.food_type
+        self.score = other.score
+        self.speed = other.speed
+        self.color_chose = other.color_chose
+        self.background = other.background
+        self.alive = other.alive
+        self.ticks = other.ticks
+        self.seed = other.seed
+        self.rng.setstate(other.rng.getstate())
+        self.inputs.capacity = other.inputs.capacity
+        self.inputs.pending.clear()
+        self.inputs.pending.extend(other.inputs.pending)
+
+    def __len__(self):
+        return self.length
+
+
+def new_game(mode="Pass", seed=None, cols=GRID_COLS, rows=GRID_ROWS,
+             color_chose=None, background=None):
+    """按 _start_main_game_impl 的初始布局创建一局新游戏。
+
+    相同的 seed（以及相同的开局配色/背景）与相同的输入序列会得到完全相同的对局。
+    """
+    seed, rng, fx_rng = session_rngs(seed)
+    state = GameState(cols, rows, mode, rng, seed)
+    place_snake(state)
+    state.color_chose = fx_rng.randint(3, 5) if color_chose is None else color_chose
+    state.background = fx_rng.randrange(BACKGROUND_COUNT) if background is None else background
+    spawn_food(state)
+    return state
+
+
+def place_snake(state):
+    """放入开局的三节蛇身：第 1 列第 1 行到第 3 行（即 (20, 20) -> (20, 60)），向下移动"""
+    for row in (1, 2, 3):
+        state.push_head(row * state.cols + 1)
+    state.direction = DOWN
+
+
+def spawn_food(state):
+    """在空闲格子中生成食物；棋盘已满返回 False"""
+    cell = state.free.choice(state.rng)
+    if cell < 0:
+        state.food = -1
+        state.food_type = -1
+        return False
+    state.food = cell
+    state.food_type = pick_food_type(state.rng)
+    return True
+
+
+def apply_food(state, food_type, events=None):
+    """结算吃到的食物：加分、速度、配色与背景效果；food_type 为 FOOD_TYPES 中的下标。
+
+    传入 events（events.EventBus）时发出 Ate / Milestone / SpeedChanged / BackgroundChanged。
+    """
+    rng = state.rng
+    spec = FOOD_SPECS[food_type]
+    old_score = state.score
+    old_speed = state.speed
+    state.score += spec.score
+    effect = spec.effect
+    state.speed = effect_speed(effect, state.speed)
+    if events is not None:
+        events.emit(Ate(state.head, food_type, state.score))
+        if crossed_milestone(old_score, state.score):
+            events.emit(Milestone(state.score))
+        if state.speed != old_speed:
+            events.emit(SpeedChanged(state.speed))
+    if effect == 'rainbow':
+        # 随机切换配色，且不与当前相同
+        previous = state.color_chose
+        while state.color_chose == previous:
+            state.color_chose = rng.randint(0, COLOR_SCHEME_COUNT - 1)
+    elif effect == 'star_candy':
+        # 从其余背景中随机选择
+        choice = rng.randrange(BACKGROUND_COUNT - 1)
+        state.background = choice + (choice >= state.background)
+        if events is not None:
+            events.emit(BackgroundChanged(state.background))
+
+
+def step(state, action=None, events=None):
+    """推进一步。
+
+    action 为新的方向编码（UP/DOWN/LEFT/RIGHT）或 None（取 state.inputs 中缓存的转向，
+    没有则保持当前方向），与当前方向相反的输入会被忽略。返回 STEP_* 之一。
+    events 为可选的 events.EventBus，不传时不产生任何事件开销。
+    """
+    if not state.alive:
+        return STEP_DIED
+    if action is None:
+        action = state.inputs.pop()
+    if action is not None and action != state.direction ^ 1:
+        state.direction = action
+
+    # 查表得到下一格：穿墙已包含在表中，-1 为撞墙
+    new_head = state.neighbors[state.body[state.head_idx] * 4 + state.direction]
+    # 与 move_snake 一致：在尾巴移动之前检查碰撞
+    if new_head < 0 or state.occupied[new_head]:
+        return _die(state, events)
+
+    state.push_head(new_head)
+    state.ticks += 1
+    if new_head == state.food:
+        apply_food(state, state.food_type, events)
+        if not spawn_food(state):
+            state.alive = False
+            return STEP_FULL
+        return STEP_ATE
+
+    state.pop_tail()
+    return STEP_MOVED
+
+
+def _die(state, events):
+    state.alive = False
+    if events is not None:
+        events.emit(Died(state.head, state.score))
+    return STEP_DIED
+
+
+def cell_to_pos(state, cell, cell_size=CELL_SIZE):
+    """格子下标 -> 左上角像素坐标"""
+    row, col = divmod(cell, state.cols)
+    return (col * cell_size, row * cell_size)
@@ -0,0 +1,61 @@
+"""
+游戏事件模块
+模拟层只把发生的事情（吃到食物、速度变化、分数里程碑、死亡、背景切换）作为事件放进队列，
+音效、粒子特效、换背景与存档等表现层在时间步结束后统一处理，
+模拟本身不再等待音频、粒子分配与图片解码；无界面运行不传事件总线即可完全跳过。
+
+事件只由 engine 发出，位置字段为格子下标；Tk 游戏在处理时换算为棋盘像素坐标。
+"""
+
+from collections import deque, namedtuple
+
+Ate = namedtuple('Ate', 'position food_type score')            # food_type 为类型编号，score 为吃完后的总分
+SpeedChanged = namedtuple('SpeedChanged', 'speed')            # 新的步长（毫秒）
+Milestone = namedtuple('Milestone', 'score')                  # 分数跨过了 MILESTONE_INTERVAL 的整数倍
+Died = namedtuple('Died', 'position score')                   # 死亡前的蛇头位置与最终得分
+BackgroundChanged = namedtuple('BackgroundChanged', 'background')  # 新背景编号
+
+EVENT_TYPES = (Ate, SpeedChanged, Milestone, Died, BackgroundChanged)
+
+# 每得这么多分触发一次里程碑
+MILESTONE_INTERVAL = 20
+
+
+def crossed_milestone(old_score, new_score):
+    return new_score // MILESTONE_INTERVAL > old_score // MILESTONE_INTERVAL
+
+
+class EventBus:
+    """事件队列 + 按事件类型分发的订阅表。
+
+    `emit` 只把事件追加到队列；`drain` 在时间步之后按发出顺序把事件交给订阅者。
+    """
+    __slots__ = ('queue', 'handlers')
+
+    def __init__(self):
+        self.queue = deque()
+        self.handlers = {event_type: [] for event_type in EVENT_TYPES}
+
+    def subscribe(self, event_type, handler):
+        self.handlers[event_type].append(handler)
+
+    def unsubscribe(self, event_type, handler):
+        self.handlers[event_type].remove(handler)
+
+    def emit(self, event):
+        self.queue.append(event)
+
+    def drain(self):
+        """分发并清空队列；处理过程中新发出的事件同样会在本次被处理"""
+        queue = self.queue
+        handlers = self.handlers
+        while queue:
+            event = queue.popleft()
+            for handler in handlers[type(event)]:
+                handler(event)
+
+    def clear(self):
+        self.queue.clear()
+
+    def __len__(self):
+        return len(self.queue)
@@ -0,0 +1,67 @@
+"""
+食物表模块
+所有食物类型的颜色、分数、效果与生成权重只在这里定义一次（按类型编号排列），
+生成时用预先累加好的权重做一次二分查找，Food 对象只保存位置、类型编号与配色相位。
+"""
+
+from bisect import bisect
+from collections import namedtuple
+from itertools import accumulate
+
+# 单个食物类型的不可变描述
+FoodSpec = namedtuple('FoodSpec', 'name color score effect weight')
+
+# 按类型编号排列；权重之和为 1
+FOOD_SPECS = (
+    FoodSpec('normal', '#FF0033', 1, None, 0.59),              # 更鲜艳的红色
+    FoodSpec('golden', '#FFD700', 3, 'speed_up', 0.240),       # 更明亮的金色
+    FoodSpec('special', '#9400D3', 5, 'slow_down', 0.10),      # 更深邃的紫色
+    FoodSpec('rainbow', '#FF1493', 10, 'rainbow', 0.055),
+    FoodSpec('star_candy', '#FFD700', 6, 'star_candy', 0.015),
+)
+FOOD_TYPES = tuple(spec.name for spec in FOOD_SPECS)
+FOOD_TYPE_IDS = {name: type_id for type_id, name in enumerate(FOOD_TYPES)}
+FOOD_SPEC_BY_NAME = {spec.name: spec for spec in FOOD_SPECS}
+
+# 累积权重：与 random.choices(weights=...) 的抽样方式一致，同一随机数流得到相同的食物序列
+FOOD_CUM_WEIGHTS = tuple(accumulate(spec.weight for spec in FOOD_SPECS))
+_TOTAL_WEIGHT = FOOD_CUM_WEIGHTS[-1]
+_LAST_TYPE_ID = len(FOOD_SPECS) - 1
+
+# 彩色糖果的颜色列表
+RAINBOW_COLORS = (
+    '#FF1493',  # 亮粉红 - 甜蜜的草莓味
+    '#FF69B4',  # 粉红色 - 柔和的樱桃味
+    '#00FFFF',  # 青色 - 清爽的薄荷味
+    '#1E90FF',  # 道奇蓝 - 清凉的蓝莓味
+    '#9370DB',  # 中紫色 - 浪漫的葡萄味
+    '#FF6EB4',  # 热粉红 - 可爱的树莓味
+    '#40E0D0',  # 绿松石色 - 清新的薄荷味
+)
+
+
+def pick_food_type(rng):
+    """按权重随机抽取一个食物类型编号（消耗一次 rng.random()）"""
+    return bisect(FOOD_CUM_WEIGHTS, rng.random() * _TOTAL_WEIGHT, 0, _LAST_TYPE_ID)
+
+
+class Food:
+    """场上的一个食物：像素位置、类型编号与彩色糖果的配色相位"""
+    __slots__ = ('position', 'type_id', 'color_phase')
+
+    def __init__(self, position, type_id):
+        self.position = position
+        self.type_id = type_id
+        self.color_phase = 0
+
+    @property
+    def spec(self):
+        return FOOD_SPECS[self.type_id]
+
+    @property
+    def food_type(self):
+        """类型名称（'normal' / 'golden' / ...）"""
+        return FOOD_TYPES[self.type_id]
+
+    def __repr__(self):
+        return f"Food({self.position!r}, {self.food_type!r})"
@@ -0,0 +1,78 @@
+"""
+固定时间步主循环模块
+用 time.perf_counter 累积真实流逝时间，按固定间隔推进模拟，与绘制耗时解耦：
+每次唤醒时先补上所有到期的时间步，再只绘制一次，并根据定时器的实际延迟修正下一次唤醒时间。
+不依赖 Tk，调用方负责用 window.after(clock.delay_ms(), ...) 之类的方式调度。
+"""
+
+import math
+import time
+
+
+class FixedTimestep:
+    """固定时间步累加器。
+
+    用法::
+
+        clock = FixedTimestep(snake_speed)
+        for _ in range(clock.due()):
+            advance()
+        render()
+        window.after(clock.delay_ms(), loop)
+
+    `interval_ms` 可以随时修改（例如吃到食物改变速度），从下一次 `due()` 起按新间隔计算。
+    """
+    __slots__ = ('interval_ms', 'max_steps', 'clock', 'accumulator', 'last',
+                 'deadline', 'lateness', 'ticks', 'started')
+
+    # 定时器延迟的指数平均平滑系数
+    LATENESS_SMOOTHING = 0.1
+
+    def __init__(self, interval_ms, max_steps=5, clock=time.perf_counter):
+        self.interval_ms = interval_ms
+        # 单次唤醒最多补几步；卡顿过久时丢弃多余的积压，避免画面“快进”
+        self.max_steps = max_steps
+        self.clock = clock
+        self.reset()
+
+    def reset(self, interval_ms=None):
+        """从当前时刻重新计时（开局、暂停恢复后调用），清空积压时间"""
+        if interval_ms is not None:
+            self.interval_ms = interval_ms
+        now = self.clock()
+        self.accumulator = 0.0
+        self.last = now
+        self.deadline = now + self.interval_ms / 1000
+        self.lateness = 0.0
+        self.ticks = 0
+        self.started = now
+
+    def due(self):
+        """返回本次唤醒应推进的时间步数，并记录定时器的实际延迟"""
+        now = self.clock()
+        late = now - self.deadline
+        if late > 0:
+            self.lateness += (late - self.lateness) * self.LATENESS_SMOOTHING
+        self.accumulator += now - self.last
+        self.last = now
+        interval = self.interval_ms / 1000
+        steps = int(self.accumulator // interval)
+        if steps > self.max_steps:
+            steps = self.max_steps
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= steps * interval
+        self.ticks += steps
+        return steps
+
+    def delay_ms(self):
+        """距离下一个时间步到期的毫秒数（已扣除定时器的平均延迟），至少 1"""
+        remaining = self.interval_ms / 1000 - self.accumulator
+        self.deadline = self.last + remaining
+        return max(1, math.floor((remaining - self.lateness) * 1000))
+
+    def average_interval_ms(self):
+        """自上次 reset 以来的实际平均时间步间隔（毫秒）；尚无时间步时返回 None"""
+        if not self.ticks:
+            return None
+        return (self.last - self.started) / self.ticks * 1000
@@ -0,0 +1,295 @@
+"""
+棋盘网格模块
+FreeCells 维护空闲格子索引以便常数时间生成食物，SnakeBody 是 engine.GameState
+蛇身的像素坐标绘制视图，Viewport 负责大棋盘的可见区域裁剪。
+
+方向统一使用整数编码，下一格由每种棋盘尺寸与模式只构建一次的相邻格子表查出，
+穿墙与撞墙都已包含在表中，移动时不再做字符串比较与取模运算。
+"""
+
+from array import array
+from functools import lru_cache
+
+# 默认棋盘：20x20 格，每格 20 像素（即 400x400 画布）
+GRID_COLS = 20
+GRID_ROWS = 20
+CELL_SIZE = 20
+# 游戏画布尺寸（像素），棋盘大于画布时通过 Viewport 跟随蛇头
+CANVAS_WIDTH = 400
+CANVAS_HEIGHT = 400
+
+# 方向编码：相反方向为 code ^ 1，水平方向为 code >= LEFT
+UP, DOWN, LEFT, RIGHT = range(4)
+DIRECTION_NAMES = ("Up", "Down", "Left", "Right")
+DIRECTION_CODES = {name: code for code, name in enumerate(DIRECTION_NAMES)}
+DIRECTION_DELTAS = {
+    "Up": (0, -1),
+    "Down": (0, 1),
+    "Left": (-1, 0),
+    "Right": (1, 0),
+}
+DELTAS = tuple(DIRECTION_DELTAS[name] for name in DIRECTION_NAMES)
+
+
+@lru_cache(maxsize=None)
+def neighbor_table(cols, rows, wrap):
+    """相邻格子表：`table[cell * 4 + direction]` 为下一格的下标，越过墙壁为 -1。
+
+    wrap 为 True（Pass 模式）时从对面穿出；同一尺寸与模式只构建一次。
+    """
+    table = array('i')
+    for row in range(rows):
+        for col in range(cols):
+            for dx, dy in DELTAS:
+                ncol, nrow = col + dx, row + dy
+                if wrap:
+                    ncol %= cols
+                    nrow %= rows
+                elif not (0 <= ncol < cols and 0 <= nrow < rows):
+                    table.append(-1)
+                    continue
+                table.append(nrow * cols + ncol)
+    return table
+
+
+@lru_cache(maxsize=None)
+def cell_positions(cols, rows, cell_size):
+    """格子下标 -> 左上角像素坐标 (x, y) 的表；同一尺寸只构建一次"""
+    return tuple((col * cell_size, row * cell_size) for row in range(rows) for col in range(cols))
+
+
+class FreeCells:
+    """空闲格子集合：交换删除数组 + 位置映射。
+
+    `cells` 紧凑存放所有空闲格子下标，`slots[cell]` 记录该格子在 `cells`
+    中的位置（已占用为 -1）。加入、移除与随机抽取均为 O(1)。
+    """
+    __slots__ = ('cells', 'slots')
+
+    def __init__(self, size):
+        self.cells = array('i', range(size))
+        self.slots = array('i', range(size))
+
+    def remove(self, cell):
+        """将格子标记为占用（已占用时忽略）"""
+        slot = self.slots[cell]
+        if slot < 0:
+            return
+        last = self.cells.pop()
+        if last != cell:
+            self.cells[slot] = last
+            self.slots[last] = slot
+        self.slots[cell] = -1
+
+    def add(self, cell):
+        """将格子标记为空闲（已空闲时忽略）"""
+        if self.slots[cell] >= 0:
+            return
+        self.slots[cell] = len(self.cells)
+        self.cells.append(cell)
+
+    def choice(self, rng):
+        """随机抽取一个空闲格子；棋盘已满时返回 -1"""
+        if not self.cells:
+            return -1
+        return self.cells[rng.randrange(len(self.cells))]
+
+    def assign(self, cells):
+        """按给定顺序重设空闲格子（读档时恢复原来的排列，随机抽取的结果才与存档前一致）"""
+        self.cells[:] = array('i', cells)
+        slots = self.slots
+        slots[:] = array('i', [-1]) * len(slots)
+        for slot, cell in enumerate(self.cells):
+            slots[cell] = slot
+
+    def copy(self):
+        clone = FreeCells.__new__(FreeCells)
+        clone.cells = array('i', self.cells)
+        clone.slots = array('i', self.slots)
+        return clone
+
+    def restore(self, other):
+        """就地复制 other 的内容（两者须为同一棋盘尺寸）"""
+        self.cells[:] = other.cells
+        self.slots[:] = other.slots
+
+    def __contains__(self, cell):
+        return self.slots[cell] >= 0
+
+    def __len__(self):
+        return len(self.cells)
+
+
+class SnakeBody:
+    """蛇身的绘制视图：直接读取 engine.GameState 的环形缓冲区，按需换算为像素坐标 (x, y)。
+
+    蛇身、占用位图与空闲格子只由 GameState 维护，视图不保存蛇身副本，也不随每步更新。
+    视图自己只记一张 `order[cell]`（该格被蛇头进入时的推入序号），在绘制时追上
+    state 新推入的蛇头，用于在不遍历蛇身的情况下求出可见各节的位次；
+    两次读取之间推进的步数须少于棋盘格子数。
+    """
+    __slots__ = ('state', 'cell_size', 'positions', 'order', 'pushes', 'synced_idx')
+
+    def __init__(self, state, cell_size=CELL_SIZE):
+        self.state = state
+        self.cell_size = cell_size
+        self.positions = cell_positions(state.cols, state.rows, cell_size)
+        self.order = array('q', bytes(8 * state.cols * state.rows))
+        self.pushes = 0
+        for cell in state.cells():
+            self.pushes += 1
+            self.order[cell] = self.pushes
+        self.synced_idx = state.head_idx
+
+    @property
+    def cols(self):
+        return self.state.cols
+
+    @property
+    def rows(self):
+        return self.state.rows
+
+    def cell_index(self, pos):
+        """像素坐标 -> 格子下标；越界返回 -1"""
+        col = pos[0] // self.cell_size
+        row = pos[1] // self.cell_size
+        if 0 <= col < self.state.cols and 0 <= row < self.state.rows:
+            return row * self.state.cols + col
+        return -1
+
+    def _sync(self):
+        """追上 state 自上次读取以来推入的蛇头：累加推入序号，并记下仍在蛇身上的各格序号"""
+        state = self.state
+        body = state.body
+        size = len(body)
+        moved = (state.head_idx - self.synced_idx) % size
+        if not moved:
+            return
+        order = self.order
+        start = self.synced_idx
+        for step in range(max(0, moved - state.length) + 1, moved + 1):
+            order[body[(start + step) % size]] = self.pushes + step
+        self.pushes += moved
+        self.synced_idx = state.head_idx
+
+    @property
+    def pushed(self):
+        """蛇头累计推入的次数（开局的各节也计入），用于按推入序号给蛇身着色"""
+        self._sync()
+        return self.pushes
+
+    @property
+    def is_full(self):
+        """蛇已占满整个棋盘（完美通关）"""
+        return not self.state.free
+
+    @property
+    def head(self):
+        return self.positions[self.state.head]
+
+    @property
+    def tail(self):
+        state = self.state
+        return self.positions[state.body[state.tail_idx]]
+
+    def segments_in_view(self, col0, row0, col1, row1):
+        """返回落在格子矩形 [col0, col1) x [row0, row1) 内的 (像素坐标, 位次) 列表。
+
+        位次从尾部 0 开始计数（蛇头为 len - 1）。蛇比可见区域短时遍历蛇身，
+        否则扫描可见格子的占用位图，代价为 O(min(蛇长, 可见格子数))。
+        """
+        state = self.state
+        cols = state.cols
+        col0, row0 = max(0, col0), max(0, row0)
+        col1, row1 = min(cols, col1), min(state.rows, row1)
+        if col0 >= col1 or row0 >= row1:
+            return []
+        size = self.cell_size
+        positions = self.positions
+        if state.length <= (col1 - col0) * (row1 - row0):
+            visible = []
+            for i, cell in enumerate(state.cells()):
+                row, col = divmod(cell, cols)
+                if col0 <= col < col1 and row0 <= row < row1:
+                    visible.append((positions[cell], i))
+            return visible
+        self._sync()
+        tail_order = self.pushes - state.length + 1
+        occupied = state.occupied
+        order = self.order
+        visible = []
+        for row in range(row0, row1):
+            base = row * cols
+            for col in range(col0, col1):
+                if occupied[base + col]:
+                    visible.append(((col * size, row * size), order[base + col] - tail_order))
+        return visible
+
+    def __contains__(self, pos):
+        index = self.cell_index(pos)
+        return index >= 0 and self.state.occupied[index] != 0
+
+    def __len__(self):
+        return self.state.length
+
+    def __iter__(self):
+        positions = self.positions
+        return (positions[cell] for cell in self.state.cells())
+
+    def __getitem__(self, index):
+        # 下标从尾部 0 开始，负数从蛇头数起；换算为环形缓冲区下标，O(1)
+        state = self.state
+        if index < 0:
+            index += state.length
+        if not 0 <= index < state.length:
+            raise IndexError("snake segment index out of range")
+        body = state.body
+        return self.positions[body[(state.tail_idx + index) % len(body)]]
+
+    def __repr__(self):
+        return f"SnakeBody({list(self)!r})"
+
+
+class Viewport:
+    """画布在棋盘上的可见窗口（像素）。
+
+    棋盘不大于画布时固定在左上角；否则以跟随目标为中心并夹在棋盘范围内。
+    """
+    __slots__ = ('width', 'height', 'board_width', 'board_height', 'x', 'y')
+
+    def __init__(self, board_width, board_height, width=CANVAS_WIDTH, height=CANVAS_HEIGHT):
+        self.width = width
+        self.height = height
+        self.board_width = board_width
+        self.board_height = board_height
+        self.x = 0
+        self.y = 0
+
+    def follow(self, pos):
+        """把可见窗口移动到以 pos 为中心的位置"""
+        self.move_to(pos[0] - self.width // 2, pos[1] - self.height // 2)
+
+    def move_to(self, x, y):
+        self.x = max(0, min(x, self.board_width - self.width))
+        self.y = max(0, min(y, self.board_height - self.height))
+
+    def to_screen(self, pos):
+        """棋盘像素坐标 -> 画布坐标"""
+        return (pos[0] - self.x, pos[1] - self.y)
+
+    def to_board(self, x, y):
+        """画布坐标 -> 棋盘像素坐标"""
+        return (x + self.x, y + self.y)
+
+    def cell_bounds(self, cell_size):
+        """可见区域覆盖的格子矩形 (col0, row0, col1, row1)，右/下边界不含"""
+        return (
+            self.x // cell_size,
+            self.y // cell_size,
+            -(-(self.x + self.width) // cell_size),
+            -(-(self.y + self.height) // cell_size),
+        )
+
+    def is_visible(self, pos, cell_size):
+        return (self.x - cell_size < pos[0] < self.x + self.width
+                and self.y - cell_size < pos[1] < self.y + self.height)
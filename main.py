@@ -12,9 +12,26 @@ from collections import deque
 import ctypes
 import pywinstyles  # 导入窗口样式库
 import array
+import argparse
 from concurrent.futures import ThreadPoolExecutor
-last_direction_change_time = 0
-direction_change_interval = 0.125  # 0.125秒的时间间隔
+from grid import (SnakeBody, Viewport, GRID_COLS, GRID_ROWS, CELL_SIZE, CANVAS_WIDTH, CANVAS_HEIGHT,
+                  UP, DOWN, LEFT, RIGHT, DIRECTION_DELTAS)
+import engine
+from engine import session_rngs, InputQueue
+from game_loop import FixedTimestep
+from foods import Food, FOOD_SPECS, FOOD_TYPES, RAINBOW_COLORS
+from savegame import SaveError, save_game, load_game, saved_from_state, state_from_saved
+from replay import ReplayRecorder, InputCursor, save_replay, load_replay
+from autopilot import ALGORITHMS, create_pilot
+import selfplay
+import versus
+import arena
+from renderer import EYE_OVALS, EYE_COLORS, CanvasLayers, SnakeRenderer
+from sprites import SPRITE_STYLES, SpriteAtlas
+from compositor import FrameCompositor
+from palette import (SNAKE_COLOR_SCHEMES, FOOD_EFFECT_COLORS, MILESTONE_SCHEMES, FOOD_GLOW, STAR_CANDY_CYCLE,
+                     HUD_GOLD, PAUSE_BLINK, GAME_OVER_PINK, GAME_OVER_WHITE, level, pulse_level, cycle_level)
+from events import EventBus, Ate, SpeedChanged, Milestone, Died, BackgroundChanged
 # 窗口样式对照表
 WINDOW_STYLES = {
     0: "dark",       # 深色主题
@@ -31,17 +48,42 @@ WINDOW_STYLES = {
 }
 # For YOLO!!!!!!
 # 初始化 pygame
-# 在初始化 pygame 时设置更高的音频质量
-pygame.mixer.pre_init(44100, -16, 2, 2048)  # 设置更高的采样率和缓冲区
-pygame.mixer.init()
+def init_audio():
+    """初始化混音器；只在打开窗口前调用（--selfplay 的工作进程会重新导入本模块，不应占用音频设备）"""
+    # 在初始化 pygame 时设置更高的音频质量
+    pygame.mixer.pre_init(44100, -16, 2, 2048)  # 设置更高的采样率和缓冲区
+    pygame.mixer.init()
+
+    # 设置混音器质量
+    pygame.mixer.set_num_channels(32)  # 增加同时播放的声道数
 
-# 设置混音器质量
-pygame.mixer.set_num_channels(32)  # 增加同时播放的声道数
 # 获取当前脚本所在目录
 current_dir = os.path.dirname(os.path.abspath(__file__))
 
 Game_Mode = "Pass"  # 默认为 Pass 模式
 high_score = 0
+SESSION_SEED = None  # 由 --seed 指定时，每局都使用同一随机种子以便复现
+# 棋盘尺寸：格数与每格像素，可由 --cols/--rows/--cell-size 指定
+BOARD_COLS = GRID_COLS
+BOARD_ROWS = GRID_ROWS
+BOARD_CELL_SIZE = CELL_SIZE
+RESUME_GAME = False  # 由 --resume 指定时，开局读取上次退出时的存档
+PLAYBACK_REPLAY = None  # 由 --replay 指定时，按原速度播放该回放而不接受按键输入
+AUTOPILOT = None  # 由 --autopilot 指定寻路算法时，开局即由自动驾驶操控（F6 随时开关）
+VERSUS_GAME = False  # 由 --versus 指定时，跳过开始页面直接进入双人对战
+ARENA_SNAKES = None  # 由 --arena 指定蛇数时，跳过开始页面直接进入机器人竞技场
+SNAKE_SPRITES = None  # 由 --sprites 指定样式时，蛇身用 PIL 预渲染的贴图代替纯色矩形
+RENDER_BACKEND = "canvas"  # 由 --render bitmap 指定时，背景、蛇与粒子每帧合成为一张位图（F7 随时切换）
+# 存档在单独的后台线程中打包写盘，不占用 Tk 主线程
+SAVE_EXECUTOR = ThreadPoolExecutor(max_workers=1)
+
+
+def draw_eyes(canvas, x, y, direction, scale=1):
+    """在左上角为 (x, y) 的蛇头上按方向编码绘制眼睛；scale 为格子相对 CELL_SIZE 的缩放"""
+    for (x1, y1, x2, y2), color in zip(EYE_OVALS[direction], EYE_COLORS):
+        canvas.create_oval(x + x1 * scale, y + y1 * scale, x + x2 * scale, y + y2 * scale, fill=color)
+
+
 # 添加音效管理器类
 class SoundManager:
     def __init__(self):
@@ -182,6 +224,14 @@ def load_high_score():
         print(f"Error loading high score: {e}")
         return 0
 
+def get_save_path():
+    """进行中对局的存档路径"""
+    return os.path.join(get_data_dir(), 'savegame.bin')
+
+def get_replay_path():
+    """最近一局的输入回放路径"""
+    return os.path.join(get_data_dir(), 'last_run.replay')
+
 def save_high_score(score):
     """保存最高分"""
     data_dir = get_data_dir()
@@ -1419,6 +1469,8 @@ class StartPage:
         self.window.bind("<Control_R>", lambda event: self.toggle_music())  # 右Ctrl键
         #self.window.bind("<Tab>", lambda event: self.toggle_music())  # Tab键
         self.window.bind("<Return>", lambda event: self.start_game())   
+        self.window.bind("<v>", lambda event: self.start_versus())  # V 键进入双人对战
+        self.window.bind("<V>", lambda event: self.start_versus())
 
         # 在初始化方法中添加以下代码
         # 窗口移动步长
@@ -1857,15 +1909,9 @@ class StartPage:
     def move_snake(self, positions, direction):
         head_x, head_y = positions[-1]
         
-        # 计算新的蛇头位置
-        if direction == "Right":
-            new_head = (head_x + 3, head_y)
-        elif direction == "Left":
-            new_head = (head_x - 3, head_y)
-        elif direction == "Up":
-            new_head = (head_x, head_y - 3)
-        else:  # Down
-            new_head = (head_x, head_y + 3)
+        # 计算新的蛇头位置（每帧 3 像素）
+        dx, dy = DIRECTION_DELTAS[direction]
+        new_head = (head_x + 3 * dx, head_y + 3 * dy)
         
         positions.append(new_head)
         positions.pop(0)
@@ -2434,6 +2480,11 @@ class StartPage:
         # 开始动画
         animate_circle()
     
+    def start_versus(self):
+        """关闭开始页面，进入同一键盘的双人对战"""
+        self.window.destroy()
+        VersusGame().run()
+
     def on_hover(self, event, button):
         """鼠标悬停效果"""
         if button == self.music_button:
@@ -2587,10 +2638,19 @@ class MainGame:
 
     目前实现为轻量封装：`run()` 调用原实现 `_start_main_game_impl()`。
     之后可以将内部状态逐步迁移到此类的实例属性中。
+
+    cols / rows / cell_size 为棋盘格数与每格像素，默认取命令行或 grid 中的配置；
+    棋盘大于 400x400 画布时由 viewport 跟随蛇头并裁剪绘制。
     """
-    def __init__(self):
+    def __init__(self, cols=None, rows=None, cell_size=None):
+        self.cols = cols or BOARD_COLS
+        self.rows = rows or BOARD_ROWS
+        self.cell_size = cell_size or BOARD_CELL_SIZE
+        self.viewport = Viewport(self.cols * self.cell_size, self.rows * self.cell_size)
+        # 每局的随机数流：rng 决定食物与食物效果，fx_rng 只用于配色/背景/特效
+        self.seed, self.rng, self.fx_rng = session_rngs(SESSION_SEED)
         # 预置默认运行时状态，便于早期委派使用
-        self.color_chose = random.randint(3, 5)
+        self.color_chose = self.fx_rng.randint(3, 5)
         self.trail_windows = []
         self.sound_manager = SoundManager()
         self.sound_manager.enabled = StartPage.music_mode.get() != "off"
@@ -2603,8 +2663,10 @@ class MainGame:
         self.bg_image = None
 
         # 游戏状态
-        self.snake = [(20, 20), (20, 40), (20, 60)]
-        self.snake_direction = "Down"
+        self.game_state = engine.GameState(self.cols, self.rows, Game_Mode, self.rng, self.seed)
+        engine.place_snake(self.game_state)
+        self.snake = SnakeBody(self.game_state, self.cell_size)
+        self.snake_direction = DOWN
         self.food = None
         self.game_running = True
         self.game_paused = False
@@ -2629,226 +2691,74 @@ class MainGame:
             except Exception:
                 pass
 
-    def move_snake_core(self, snake, snake_direction, food, music_mode, background_images):
-        """核心数据更新：计算新蛇头、处理穿墙、碰撞与是否吃到食物。
-        仅修改/返回数据，不进行任何绘制或播放音效。
-
-        返回一个字典，包含需要的变更：
-        - skip: True 表示不进行任何移动（例如暂停或已停止）
-        - death: True 表示发生死亡碰撞，返回 'head'
-        - snake: 更新后的蛇列表
-        - ate: 是否吃到食物
-        - score_increase: 吃到食物增加的分数
-        - snake_speed: 新的 snake_speed（如果被效果修改）
-        - color_chose: 新的颜色方案（如果被效果修改）
-        - selected_bg: 新的背景文件名（只有在特殊效果下返回）
-        """
-        result = {}
-        if getattr(self, 'game_paused', False) or not getattr(self, 'game_running', True):
-            result['skip'] = True
-            return result
-
-        head_x, head_y = snake[-1]
-        if snake_direction == "Up":
-            new_head = (head_x, head_y - 20)
-        elif snake_direction == "Down":
-            new_head = (head_x, head_y + 20)
-        elif snake_direction == "Left":
-            new_head = (head_x - 20, head_y)
-        else:  # Right
-            new_head = (head_x + 20, head_y)
-
-        # 处理穿墙逻辑
-        global Game_Mode
-        if Game_Mode == "Pass":
-            new_head = (new_head[0] % 400, new_head[1] % 400)
-
-        # 撞墙或撞到自己判定
-        if new_head in snake or (
-            Game_Mode == "Forbid" and (
-                new_head[0] < 0 or new_head[0] >= 400 or new_head[1] < 0 or new_head[1] >= 400
-            )
-        ):
-            result['death'] = True
-            result['head'] = new_head
-            return result
-
-        # 否则推进蛇
-        new_snake = list(snake)
-        new_snake.append(new_head)
-
-        ate = False
-        score_increase = 0
-        new_snake_speed = getattr(self, 'snake_speed', 100)
-        new_color_chose = getattr(self, 'color_chose', None)
-        selected_bg = None
-
-        if food and new_head == food.position:
-            ate = True
-            # 读取食物配置以决定分数与效果
-            try:
-                score_increase = food.properties[food.food_type]['score']
-                effect = food.properties[food.food_type]['effect']
-            except Exception:
-                effect = None
-
-            if effect == 'speed_up':
-                new_snake_speed = max(70, new_snake_speed - 10)
-            elif effect == 'slow_down':
-                new_snake_speed = min(120, new_snake_speed + 10)
-            elif effect == 'rainbow':
-                new_snake_speed = max(70, new_snake_speed - 5)
-                nr = new_color_chose
-                # 随机但确保不与当前相同
-                new_color_chose = random.randint(0, 5)
-                while nr == new_color_chose:
-                    new_color_chose = random.randint(0, 5)
-            elif effect == 'star_candy':
-                new_snake_speed = max(70, new_snake_speed - 2)
-                # 选择新的背景文件名（延迟加载交由调用方完成）
-                try:
-                    current_bg = getattr(self, 'selected_bg', None)
-                    available = [bg for bg in background_images if bg != current_bg]
-                    if available:
-                        selected_bg = random.choice(available)
-                except Exception:
-                    selected_bg = None
-
-        else:
-            # 没吃到，缩短尾巴
-            new_snake.pop(0)
-
-        result.update({
-            'snake': new_snake,
-            'ate': ate,
-            'score_increase': score_increase,
-            'snake_speed': new_snake_speed,
-            'color_chose': new_color_chose,
-            'selected_bg': selected_bg,
-        })
-        return result
-
     def draw_snake(self, canvas, snake, snake_direction, color_chose):
         """只读绘制：在给定画布上绘制蛇（不修改任何游戏状态）。"""
         # 使用与原实现一致的渐变方案与随机选择逻辑
-        INTP = random.randint(0, 2)
-        color_schemes = [
-            
-            [
-                ["#FF80ED", "#FF50B8", "#FF2087", "#FF00AA"],
-                ["#80FFFF", "#40E5FF", "#00CCFF", "#00A8FF"],
-                ["#FFE566", "#FFD700", "#FFAD1F", "#FF9912"]
-            ],
-            [
-                ["#E680FF", "#D355FF", "#B82AFF", "#9900FF"],
-                ["#80FFE6", "#40FFD4", "#00FFB8", "#00E5A0"],
-                ["#80FF9E", "#40FF8A", "#00FF76", "#00E562"]
-            ],
-            [
-                ["#FF5555", "#FF2222", "#FF0000", "#CC0066"],
-                ["#DD66FF", "#BB33FF", "#9900FF", "#7700CC"],
-                ["#66FFFF", "#33FFFF", "#00FFFF", "#00CCFF"]
-            ],
-            [
-                ["#FF99FF", "#FF66FF", "#FF33FF", "#CC00FF"],
-                ["#99FFFF", "#66FFFF", "#33FFFF", "#00CCFF"],
-                ["#FFFF99", "#FFFF66", "#FFFF33", "#FFCC00"]
-            ],
-            [
-                ["#FF6699", "#FF3366", "#FF0033", "#CC0033"],
-                ["#66FF99", "#33FF66", "#00FF33", "#00CC33"],
-                ["#FF9966", "#FF6633", "#FF3300", "#CC3300"]
-            ],
-            [
-                ["#9999FF", "#6666FF", "#3333FF", "#0000CC"],
-                ["#99FF99", "#66FF66", "#33FF33", "#00CC00"],
-                ["#FF9999", "#FF6666", "#FF3333", "#CC0000"]
-            ]
-        ]
+        INTP = self.fx_rng.randint(0, 2)
 
         # 防御性检查
         if not snake:
             return
 
-        colors = color_schemes[color_chose][INTP]
+        colors = SNAKE_COLOR_SCHEMES[color_chose][INTP]
+        size = self.cell_size
+        s = size / CELL_SIZE
+        viewport = self.viewport
 
-        # 批量绘制蛇身（不绘制最后一段蛇头）
+        # 批量绘制可见区域内的蛇身（不绘制最后一段蛇头）
         color_len = len(colors)
-        for i, segment in enumerate(snake[:-1]):
+        head_order = len(snake) - 1
+        for segment, i in snake.segments_in_view(*viewport.cell_bounds(size)):
+            if i == head_order:
+                continue
             color = colors[i % color_len]
-            canvas.create_rectangle(segment[0], segment[1], segment[0] + 20, segment[1] + 20, fill=color, outline="")
+            x, y = viewport.to_screen(segment)
+            canvas.create_rectangle(x, y, x + size, y + size, fill=color, outline="")
 
         # 绘制蛇头及眼睛
-        head = snake[-1]
+        head = viewport.to_screen(snake.head)
         head_color = colors[0]
-        canvas.create_rectangle(head[0], head[1], head[0] + 20, head[1] + 20, fill=head_color, outline="")
+        canvas.create_rectangle(head[0], head[1], head[0] + size, head[1] + size, fill=head_color, outline="")
 
         # 眼睛位置根据方向调整（与原实现保持一致）
-        if snake_direction == "Right":
-            canvas.create_oval(head[0] + 12, head[1] + 5, head[0] + 16, head[1] + 8, fill="#F8F8F8")
-            canvas.create_oval(head[0] + 13, head[1] + 6, head[0] + 15, head[1] + 7, fill="#2196F3")
-            canvas.create_oval(head[0] + 12, head[1] + 12, head[0] + 16, head[1] + 15, fill="#F8F8F8")
-            canvas.create_oval(head[0] + 13, head[1] + 13, head[0] + 15, head[1] + 14, fill="#2196F3")
-        elif snake_direction == "Left":
-            canvas.create_oval(head[0] + 4, head[1] + 5, head[0] + 8, head[1] + 8, fill="#F8F8F8")
-            canvas.create_oval(head[0] + 5, head[1] + 6, head[0] + 7, head[1] + 7, fill="#2196F3")
-            canvas.create_oval(head[0] + 4, head[1] + 12, head[0] + 8, head[1] + 15, fill="#F8F8F8")
-            canvas.create_oval(head[0] + 5, head[1] + 13, head[0] + 7, head[1] + 14, fill="#2196F3")
-        elif snake_direction == "Up":
-            canvas.create_oval(head[0] + 5, head[1] + 4, head[0] + 8, head[1] + 8, fill="#F8F8F8")
-            canvas.create_oval(head[0] + 6, head[1] + 5, head[0] + 7, head[1] + 7, fill="#2196F3")
-            canvas.create_oval(head[0] + 12, head[1] + 4, head[0] + 15, head[1] + 8, fill="#F8F8F8")
-            canvas.create_oval(head[0] + 13, head[1] + 5, head[0] + 14, head[1] + 7, fill="#2196F3")
-        else:  # Down
-            canvas.create_oval(head[0] + 5, head[1] + 12, head[0] + 8, head[1] + 16, fill="#F8F8F8")
-            canvas.create_oval(head[0] + 6, head[1] + 13, head[0] + 7, head[1] + 15, fill="#2196F3")
-            canvas.create_oval(head[0] + 12, head[1] + 12, head[0] + 15, head[1] + 16, fill="#F8F8F8")
-            canvas.create_oval(head[0] + 13, head[1] + 13, head[0] + 14, head[1] + 15, fill="#2196F3")
+        draw_eyes(canvas, head[0], head[1], snake_direction, s)
 
     def draw_food(self, canvas, food):
         """只读绘制：在给定画布上绘制食物（不修改任何游戏状态）。"""
         if not food:
             return
 
-        x, y = food.position
-        base_color = food.properties[food.food_type]['color']
-
-        # 发光参数
-        glow = abs(math.sin(time.time() * 2)) * 0.2 + 0.8
-
-        def adjust_color(hex_color, factor):
-            r = int(hex_color[1:3], 16)
-            g = int(hex_color[3:5], 16)
-            b = int(hex_color[5:7], 16)
-            r = min(255, int(r * factor))
-            g = min(255, int(g * factor))
-            b = min(255, int(b * factor))
-            return f'#{r:02x}{g:02x}{b:02x}'
+        size = self.cell_size
+        if not self.viewport.is_visible(food.position, size):
+            return
+        x, y = self.viewport.to_screen(food.position)
+        s = size / CELL_SIZE
 
-        current_color = adjust_color(base_color, glow)
+        # 发光：亮度 0.8~1.0 倍的预计算颜色表
+        current_color = FOOD_GLOW[food.food_type][level(abs(math.sin(time.time() * 2)))]
 
         if food.food_type == 'normal':
-            canvas.create_rectangle(x, y, x + 20, y + 20, fill=current_color, outline="")
+            canvas.create_rectangle(x, y, x + 20 * s, y + 20 * s, fill=current_color, outline="")
         elif food.food_type == 'golden':
-            canvas.create_oval(x, y, x + 20, y + 20, fill=current_color, outline="")
+            canvas.create_oval(x, y, x + 20 * s, y + 20 * s, fill=current_color, outline="")
         elif food.food_type == 'special':
-            canvas.create_polygon(x + 10, y, x + 20, y + 10, x + 10, y + 20, x, y + 10, fill=current_color, outline="")
+            canvas.create_polygon(x + 10 * s, y, x + 20 * s, y + 10 * s, x + 10 * s, y + 20 * s, x, y + 10 * s, fill=current_color, outline="")
         elif food.food_type == 'rainbow':
-            canvas.create_oval(x + 5, y + 3, x + 15, y + 13, fill=food.rainbow_colors[food.color_index], outline="")
-            canvas.create_oval(x + 5, y + 7, x + 15, y + 17, fill=food.rainbow_colors[(food.color_index + 1) % len(food.rainbow_colors)], outline="")
-            canvas.create_polygon(x + 2, y + 5, x + 4, y + 7, x + 5, y + 10, x + 4, y + 13, x + 2, y + 15, fill=food.rainbow_colors[(food.color_index + 2) % len(food.rainbow_colors)], outline="")
-            canvas.create_polygon(x + 3, y + 7, x + 4.5, y + 8, x + 5, y + 10, x + 4.5, y + 12, x + 3, y + 13, fill=food.rainbow_colors[(food.color_index + 3) % len(food.rainbow_colors)], stipple='gray50', outline="")
-            canvas.create_polygon(x + 18, y + 5, x + 16, y + 7, x + 15, y + 10, x + 16, y + 13, x + 18, y + 15, fill=food.rainbow_colors[(food.color_index + 2) % len(food.rainbow_colors)], outline="")
+            canvas.create_oval(x + 5 * s, y + 3 * s, x + 15 * s, y + 13 * s, fill=RAINBOW_COLORS[food.color_phase], outline="")
+            canvas.create_oval(x + 5 * s, y + 7 * s, x + 15 * s, y + 17 * s, fill=RAINBOW_COLORS[(food.color_phase + 1) % len(RAINBOW_COLORS)], outline="")
+            canvas.create_polygon(x + 2 * s, y + 5 * s, x + 4 * s, y + 7 * s, x + 5 * s, y + 10 * s, x + 4 * s, y + 13 * s, x + 2 * s, y + 15 * s, fill=RAINBOW_COLORS[(food.color_phase + 2) % len(RAINBOW_COLORS)], outline="")
+            canvas.create_polygon(x + 3 * s, y + 7 * s, x + 4.5 * s, y + 8 * s, x + 5 * s, y + 10 * s, x + 4.5 * s, y + 12 * s, x + 3 * s, y + 13 * s, fill=RAINBOW_COLORS[(food.color_phase + 3) % len(RAINBOW_COLORS)], stipple='gray50', outline="")
+            canvas.create_polygon(x + 18 * s, y + 5 * s, x + 16 * s, y + 7 * s, x + 15 * s, y + 10 * s, x + 16 * s, y + 13 * s, x + 18 * s, y + 15 * s, fill=RAINBOW_COLORS[(food.color_phase + 2) % len(RAINBOW_COLORS)], outline="")
         elif food.food_type == 'star_candy':
-            canvas.create_rectangle(x, y, x + 20, y + 20, fill=current_color, outline="")
+            canvas.create_rectangle(x, y, x + 20 * s, y + 20 * s, fill=current_color, outline="")
 
     # 辅助只读绘制：为迁移粒子渲染提供小的封装，返回创建的画布 id
-    def draw_particle_oval(self, canvas, x1, y1, x2, y2, fill=None, stipple=None, width=0):
+    def draw_particle_oval(self, canvas, x1, y1, x2, y2, fill=None, stipple=None, width=0, tags=()):
         try:
-            return canvas.create_oval(x1, y1, x2, y2, fill=fill, stipple=stipple or '', width=width)
+            return canvas.create_oval(x1, y1, x2, y2, fill=fill, stipple=stipple or '', width=width, tags=tags)
         except Exception:
             # 回退——确保任何异常不会阻塞主流程
-            return canvas.create_oval(x1, y1, x2, y2, fill=fill, width=width)
+            return canvas.create_oval(x1, y1, x2, y2, fill=fill, width=width, tags=tags)
 
     def draw_particle_polygon(self, canvas, points, fill=None, outline=None, width=0, stipple=None):
         try:
@@ -2934,6 +2844,387 @@ class MainGame:
                 pass
 
 
+class VersusGame:
+    """同一键盘的双人对战窗口：WASD 控制 1 号蛇，方向键控制 2 号蛇。
+
+    规则与碰撞判定在 versus 模块中（共用按归属记录的占用网格，两条蛇原子地同时前进）；
+    这里只负责输入与绘制。棋盘能放进 400x400 画布时，每条蛇的每一节都是一个常驻的矩形画布项：
+    每步把尾巴那一项移到新蛇头（一次 coords），吃到食物时才新建一项，
+    因此每步的绘制开销与蛇长无关。
+
+    棋盘更大时画布只显示 400x400 的可见窗口（跟随两个蛇头的中点，穿墙模式下按环上的较近一侧），
+    与竞技场一样每帧按可见窗口裁剪、逐行合并同一条蛇的相邻格子绘制，开销只与可见面积有关。
+    """
+    # 每位玩家的 (名称, 蛇头颜色, 蛇身颜色)
+    PLAYERS = (
+        ("WASD", "#00A8FF", "#80FFFF"),
+        ("Arrows", "#FF2087", "#FF80ED"),
+    )
+    KEYS = (
+        {'w': UP, 's': DOWN, 'a': LEFT, 'd': RIGHT},
+        {'Up': UP, 'Down': DOWN, 'Left': LEFT, 'Right': RIGHT},
+    )
+    HUD_HEIGHT = 30
+
+    def __init__(self, cols=None, rows=None, cell_size=None, mode=None):
+        self.cols = cols or BOARD_COLS
+        self.rows = rows or BOARD_ROWS
+        self.cell_size = cell_size or BOARD_CELL_SIZE
+        self.mode = mode or Game_Mode
+        self.wins = [0] * len(self.PLAYERS)
+        self.sound_manager = SoundManager()
+        board_width = self.cols * self.cell_size
+        board_height = self.rows * self.cell_size
+        width = min(CANVAS_WIDTH, board_width)
+        height = min(CANVAS_HEIGHT, board_height)
+        self.viewport = Viewport(board_width, board_height, width, height)
+        # 棋盘大于画布时按可见窗口逐帧重绘，否则使用常驻画布项
+        self.culled = (width, height) != (board_width, board_height)
+        # 占用网格中的编号 -> 蛇身颜色（0 为空格）
+        self.colors = (None,) + tuple(body_color for _, _, body_color in self.PLAYERS)
+
+        self.window = tk.Tk()
+        self.window.title("Greedy Snake - Versus")
+        self.window.resizable(False, False)
+        self.canvas = tk.Canvas(self.window, width=width, height=height + self.HUD_HEIGHT,
+                                bg="#101020", highlightthickness=0)
+        self.canvas.pack()
+        self.window.bind("<KeyPress>", self.on_key)
+        self.window.bind("<Escape>", lambda event: self.window.destroy())
+        self.clock = FixedTimestep(versus.INITIAL_SPEED)
+        self.after_id = None
+        self.new_round()
+
+    def cell_rect(self, cell):
+        row, col = divmod(cell, self.cols)
+        size = self.cell_size
+        x = col * size - self.viewport.x
+        y = row * size + self.HUD_HEIGHT - self.viewport.y
+        return x + 1, y + 1, x + size - 1, y + size - 1
+
+    def new_round(self):
+        """开始新的一局：重建状态与全部常驻画布项"""
+        if self.after_id is not None:
+            self.window.after_cancel(self.after_id)
+            self.after_id = None
+        canvas = self.canvas
+        canvas.delete("all")
+        self.state = versus.new_versus(self.mode, SESSION_SEED, self.cols, self.rows)
+        self.segment_items = []
+        self.head_items = []
+        if not self.culled:
+            for snake, (_, head_color, body_color) in zip(self.state.snakes, self.PLAYERS):
+                # 蛇身各节按尾 -> 头排列，与 snake.cells() 的顺序一致
+                self.segment_items.append(deque(
+                    canvas.create_rectangle(*self.cell_rect(cell), fill=body_color, outline="")
+                    for cell in snake.cells()))
+                self.head_items.append(canvas.create_oval(*self.cell_rect(snake.head),
+                                                          fill=head_color, outline="white"))
+        self.food_item = canvas.create_oval(0, 0, 0, 0, fill="", outline="")
+        width, height = self.viewport.width, self.viewport.height
+        self.score_item = canvas.create_text(width / 2, self.HUD_HEIGHT / 2, fill="white",
+                                             font=("Impact", 14))
+        self.message_item = canvas.create_text(width / 2, height / 2 + self.HUD_HEIGHT,
+                                               fill="#FFD700", font=("Impact", 22),
+                                               justify=tk.CENTER)
+        self.render()
+        self.clock.reset(self.state.speed)
+        self.loop()
+
+    def on_key(self, event):
+        if self.state.over:
+            if event.keysym in ("space", "Return", "r", "R"):
+                self.new_round()
+            return
+        key = event.keysym if len(event.keysym) > 1 else event.keysym.lower()
+        for snake, keys in zip(self.state.snakes, self.KEYS):
+            if key in keys:
+                snake.turn(keys[key])
+                return
+
+    def loop(self):
+        """固定时间步：补上所有到期的时间步后只绘制一次"""
+        self.after_id = None
+        state = self.state
+        for _ in range(self.clock.due()):
+            food = state.food
+            versus.step(state)
+            if not self.culled:
+                for index, snake in enumerate(state.snakes):
+                    if snake.moved:
+                        self.advance_items(index, snake)
+            if state.food != food:
+                self.sound_manager.play('eat')
+            if state.over:
+                break
+        self.render()
+        if state.over:
+            self.finish_round()
+        else:
+            self.after_id = self.window.after(self.clock.delay_ms(), self.loop)
+
+    def advance_items(self, index, snake):
+        """一条蛇前进一步后的画布增量更新：O(1)，与蛇长无关"""
+        canvas = self.canvas
+        items = self.segment_items[index]
+        rect = self.cell_rect(snake.head)
+        if snake.last_tail >= 0:
+            item = items.popleft()
+            canvas.coords(item, *rect)
+        else:
+            item = canvas.create_rectangle(*rect, fill=self.PLAYERS[index][2], outline="")
+            canvas.tag_raise(self.head_items[index])
+        items.append(item)
+        canvas.coords(self.head_items[index], *rect)
+
+    def midpoint(self, a, b, count):
+        """两个蛇头在一个坐标轴上的中点（格）；穿墙模式下取环上较近的一侧"""
+        distance = b - a
+        if self.mode == "Pass" and abs(distance) > count // 2:
+            distance -= count if distance > 0 else -count
+        return (a + distance // 2) % count
+
+    def render_cells(self):
+        """大棋盘：可见窗口跟随两个蛇头的中点，按可见区域重绘蛇身与蛇头"""
+        state = self.state
+        canvas = self.canvas
+        size = self.cell_size
+        cols = state.cols
+        viewport = self.viewport
+        heads = [divmod(snake.head, cols) for snake in state.snakes]
+        (row_a, col_a), (row_b, col_b) = heads
+        viewport.follow((self.midpoint(col_a, col_b, cols) * size,
+                         self.midpoint(row_a, row_b, state.rows) * size))
+        canvas.delete("cells")
+        left = -viewport.x
+        top = self.HUD_HEIGHT - viewport.y
+        col0, row0, col1, row1 = bounds = arena.visible_cells(viewport, size, cols, state.rows)
+        for row, col, length, value in arena.visible_runs(state, *bounds):
+            x, y = col * size + left, row * size + top
+            canvas.create_rectangle(x, y, x + length * size, y + size, fill=self.colors[value],
+                                    outline="", tags="cells")
+        for (row, col), (_, head_color, _) in zip(heads, self.PLAYERS):
+            if col0 <= col < col1 and row0 <= row < row1:
+                x, y = col * size + left, row * size + top
+                canvas.create_oval(x + 1, y + 1, x + size - 1, y + size - 1, fill=head_color,
+                                   outline="white", tags="cells")
+
+    def render(self):
+        """每帧只更新食物与比分两个常驻项（大棋盘另按可见窗口重绘蛇）"""
+        state = self.state
+        canvas = self.canvas
+        if self.culled:
+            self.render_cells()
+        row, col = divmod(state.food, self.cols)
+        size = self.cell_size
+        if state.food >= 0 and self.viewport.is_visible((col * size, row * size), size):
+            canvas.coords(self.food_item, *self.cell_rect(state.food))
+            canvas.itemconfig(self.food_item, fill=FOOD_SPECS[state.food_type].color)
+        else:
+            canvas.itemconfig(self.food_item, fill="")
+        canvas.itemconfig(self.score_item, text="   ".join(
+            f"{name}: {snake.score} (wins {wins})"
+            for (name, _, _), snake, wins in zip(self.PLAYERS, state.snakes, self.wins)))
+        canvas.tag_raise(self.score_item)
+
+    def finish_round(self):
+        winner = self.state.winner()
+        if winner is None:
+            text = "Draw!"
+        else:
+            self.wins[winner.owner - 1] += 1
+            text = f"{self.PLAYERS[winner.owner - 1][0]} wins!"
+        self.sound_manager.play('death')
+        self.render()
+        self.canvas.itemconfig(self.message_item, text=f"{text}\nSpace / R: next round   Esc: quit")
+        self.canvas.tag_raise(self.message_item)
+
+    def run(self):
+        self.window.mainloop()
+
+
+class ArenaGame:
+    """多机器人竞技场窗口：上百条机器人蛇在大棋盘上同时游走，画布只显示 400x400 的可见窗口。
+
+    规则、机器人与碰撞都在 arena 模块中；这里每帧只遍历可见窗口内的格子：
+    逐行取出占用网格的一段切片，同一条蛇相邻的格子合并为一个矩形，
+    绘制开销只与可见面积有关，与棋盘大小和蛇的总数无关。
+
+    方向键 / WASD 或鼠标拖动平移视野，F 跟随得分最高的蛇，T 全速运行，空格暂停，Esc 退出。
+    """
+    # 按蛇的编号循环取色
+    COLORS = ("#FF80ED", "#80FFFF", "#FFE566", "#E680FF", "#80FFE6", "#80FF9E",
+              "#FF5555", "#DD66FF", "#66FFFF", "#FF9966", "#9999FF", "#99FF99")
+    PAN_KEYS = {
+        'Up': "Up", 'Down': "Down", 'Left': "Left", 'Right': "Right",
+        'w': "Up", 's': "Down", 'a': "Left", 'd': "Right",
+    }
+    HUD_HEIGHT = 30
+
+    def __init__(self, snakes=None, cols=None, rows=None, cell_size=None, mode=None):
+        self.state = arena.new_arena(snakes or arena.ARENA_SNAKES, cols or arena.ARENA_COLS,
+                                     rows or arena.ARENA_ROWS, mode or Game_Mode, SESSION_SEED)
+        state = self.state
+        self.cell_size = cell_size or arena.ARENA_CELL_SIZE
+        board_width = state.cols * self.cell_size
+        board_height = state.rows * self.cell_size
+        width = min(CANVAS_WIDTH, board_width)
+        height = min(CANVAS_HEIGHT, board_height)
+        self.viewport = Viewport(board_width, board_height, width, height)
+        # 占用网格中的编号 -> 颜色（0 为空格）
+        self.colors = (None,) + tuple(self.COLORS[i % len(self.COLORS)]
+                                      for i in range(len(state.snakes)))
+        self.follow = True
+        self.paused = False
+        self.drag = None
+
+        self.window = tk.Tk()
+        self.window.title(f"Greedy Snake - Arena ({len(state.snakes)} snakes, "
+                          f"{state.cols}x{state.rows})")
+        self.window.resizable(False, False)
+        self.canvas = tk.Canvas(self.window, width=width, height=height + self.HUD_HEIGHT,
+                                bg="#101020", highlightthickness=0)
+        self.canvas.pack()
+        self.hud_item = self.canvas.create_text(width / 2, self.HUD_HEIGHT / 2, fill="white",
+                                                font=("Consolas", 10))
+        self.window.bind("<KeyPress>", self.on_key)
+        self.window.bind("<Escape>", lambda event: self.window.destroy())
+        self.canvas.bind("<ButtonPress-1>", self.on_press)
+        self.canvas.bind("<B1-Motion>", self.on_drag)
+
+        self.clock = FixedTimestep(arena.ARENA_SPEED)
+        self.after_id = None
+        # 统计窗口（约 1 秒）内的步数、模拟耗时与帧数
+        self.window_start = time.perf_counter()
+        self.window_ticks = 0
+        self.window_frames = 0
+        self.step_time = 0.0
+        self.draw_time = 0.0
+        self.stats = "measuring..."
+        self.render()
+        self.loop()
+
+    def on_key(self, event):
+        key = event.keysym if len(event.keysym) > 1 else event.keysym.lower()
+        if key in self.PAN_KEYS:
+            dx, dy = DIRECTION_DELTAS[self.PAN_KEYS[key]]
+            viewport = self.viewport
+            viewport.move_to(viewport.x + dx * viewport.width // 4,
+                             viewport.y + dy * viewport.height // 4)
+            self.follow = False
+        elif key == 'f':
+            self.follow = not self.follow
+        elif key == 't':
+            # 全速：时间步 1 毫秒，每次唤醒最多补 max_steps 步，用于测引擎与绘制的上限
+            fast = self.clock.interval_ms != 1
+            self.clock.reset(1 if fast else arena.ARENA_SPEED)
+        elif key == 'space':
+            self.paused = not self.paused
+            if not self.paused:
+                # 暂停前排下的唤醒可能还没到期，先取消，避免同时跑两条循环
+                if self.after_id is not None:
+                    self.window.after_cancel(self.after_id)
+                    self.after_id = None
+                self.clock.reset()
+                self.loop()
+            return
+        else:
+            return
+        if self.paused:
+            self.render()
+
+    def on_press(self, event):
+        self.drag = (event.x, event.y, self.viewport.x, self.viewport.y)
+        self.follow = False
+
+    def on_drag(self, event):
+        x0, y0, view_x, view_y = self.drag
+        self.viewport.move_to(view_x - (event.x - x0), view_y - (event.y - y0))
+        if self.paused:
+            self.render()
+
+    def loop(self):
+        """固定时间步：补上所有到期的时间步后只绘制一次"""
+        self.after_id = None
+        if self.paused:
+            return
+        state = self.state
+        clock = time.perf_counter
+        start = clock()
+        steps = self.clock.due()
+        for _ in range(steps):
+            arena.step(state)
+        self.step_time += clock() - start
+        self.window_ticks += steps
+        if steps:
+            self.render()
+        self.after_id = self.window.after(self.clock.delay_ms(), self.loop)
+
+    def render(self):
+        """重绘可见窗口：逐行把同一条蛇的相邻格子合并为一个矩形"""
+        start = time.perf_counter()
+        state = self.state
+        canvas = self.canvas
+        size = self.cell_size
+        viewport = self.viewport
+        if self.follow:
+            leader = max(state.snakes, key=lambda snake: (snake.alive, snake.score))
+            if leader.alive:
+                row, col = divmod(leader.head, state.cols)
+                viewport.follow((col * size, row * size))
+        canvas.delete("cells")
+        cols = state.cols
+        colors = self.colors
+        create_rectangle = canvas.create_rectangle
+        left = -viewport.x
+        top = self.HUD_HEIGHT - viewport.y
+        bounds = arena.visible_cells(viewport, size, cols, state.rows)
+        col0, row0, col1, row1 = bounds
+        items = 0
+        for row, col, length, value in arena.visible_runs(state, *bounds):
+            x, y = col * size + left, row * size + top
+            create_rectangle(x, y, x + length * size, y + size, fill=colors[value], outline="",
+                             tags="cells")
+            items += 1
+        for row, col, food_type in arena.visible_foods(state, *bounds):
+            x, y = col * size + left, row * size + top
+            canvas.create_oval(x, y, x + size, y + size, fill=FOOD_SPECS[food_type].color,
+                               outline="", tags="cells")
+            items += 1
+        # 蛇头描白边，便于在密集处分辨方向
+        for snake in state.snakes:
+            if snake.alive:
+                row, col = divmod(snake.head, cols)
+                if col0 <= col < col1 and row0 <= row < row1:
+                    x, y = col * size + left, row * size + top
+                    create_rectangle(x, y, x + size, y + size, outline="white", tags="cells")
+                    items += 1
+        self.draw_time += time.perf_counter() - start
+        self.window_frames += 1
+        self.update_hud(items)
+
+    def update_hud(self, items):
+        """约每秒刷新一次吞吐统计：实际 ticks/s、纯引擎 ticks/s、帧率与每帧绘制耗时"""
+        now = time.perf_counter()
+        elapsed = now - self.window_start
+        if elapsed >= 1.0:
+            ticks, frames = self.window_ticks, self.window_frames
+            engine_rate = ticks / self.step_time if self.step_time else 0.0
+            self.stats = (f"{ticks / elapsed:.0f} ticks/s (engine {engine_rate:.0f}), "
+                          f"{frames / elapsed:.0f} fps, draw {self.draw_time / frames * 1e3:.1f} ms")
+            self.window_start = now
+            self.window_ticks = self.window_frames = 0
+            self.step_time = self.draw_time = 0.0
+        state = self.state
+        self.canvas.itemconfig(self.hud_item, text=(
+            f"tick {state.ticks}  alive {state.alive_count}/{len(state.snakes)}  "
+            f"{items} items  {self.stats}"))
+        self.canvas.tag_raise(self.hud_item)
+
+    def run(self):
+        self.window.mainloop()
+
+
 def start_main_game():
     """兼容函数，旧代码仍可调用。"""
     return MainGame().run()
@@ -2941,7 +3232,9 @@ def start_main_game():
 
 def _start_main_game_impl():
     
-    color_chose = random.randint(3, 5)
+    # 每局的随机数流：rng 决定食物与食物效果，fx_rng 只用于配色/背景/特效
+    session_seed, rng, fx_rng = session_rngs(SESSION_SEED)
+    color_chose = fx_rng.randint(3, 5)
     trail_windows = []  # 用于存储所有尾痕窗口
     # 如果通过 MainGame.run 调用，则把实例上的部分状态同步到本地变量，
     # 这样原有函数内使用 nonlocal 的代码无需大范围改动。
@@ -2949,6 +3242,8 @@ def _start_main_game_impl():
     if _runner is not None:
         try:
             # 有选择性地覆盖可能已在 runner 上存在的状态属性
+            if hasattr(_runner, 'rng'):
+                session_seed, rng, fx_rng = _runner.seed, _runner.rng, _runner.fx_rng
             if hasattr(_runner, 'color_chose'):
                 color_chose = _runner.color_chose
             if hasattr(_runner, 'trail_windows'):
@@ -2992,6 +3287,17 @@ def _start_main_game_impl():
         except Exception:
             # 保持向后兼容：如同步失败，则忽略并继续使用本地初始值
             pass
+    print(f"Session seed: {session_seed}")
+    # 棋盘尺寸（格数与每格像素），可通过 MainGame 参数或命令行配置
+    cols, rows, cell_size = BOARD_COLS, BOARD_ROWS, BOARD_CELL_SIZE
+    if _runner is not None and hasattr(_runner, 'cell_size'):
+        cols, rows, cell_size = _runner.cols, _runner.rows, _runner.cell_size
+    board_width = cols * cell_size
+    board_height = rows * cell_size
+    half_cell = cell_size / 2
+    cell_scale = cell_size / CELL_SIZE  # 相对默认 20 像素格子的缩放比例
+    # 画布可见区域：棋盘大于画布时跟随蛇头，只绘制可见部分
+    viewport = getattr(_runner, 'viewport', None) or Viewport(board_width, board_height)
     # 创建音效管理器（仅当本地未从 runner 同步时）
     if 'sound_manager' not in locals():
         sound_manager = SoundManager()
@@ -3003,7 +3309,7 @@ def _start_main_game_impl():
     # 初始化背景音乐
     if music_mode in ["always", "conditional"]:
         try:
-            bgm_name = random.choice(["background", "background2", "background3", "background4", "background5"])
+            bgm_name = fx_rng.choice(["background", "background2", "background3", "background4", "background5"])
             bgm_path = os.path.join(current_dir, "assets", "music", f"{bgm_name}.mp3")
             pygame.mixer.music.load(bgm_path)
             pygame.mixer.music.play(-1)
@@ -3090,10 +3396,10 @@ def _start_main_game_impl():
     except Exception as e:
         print(f"创建主窗口失败: {e}")
         sys.exit(1)
-    window.bind("<Left>", lambda event: change_direction("Left"))
-    window.bind("<Right>", lambda event: change_direction("Right"))
-    window.bind("<Up>", lambda event: change_direction("Up"))
-    window.bind("<Down>", lambda event: change_direction("Down"))
+    window.bind("<Left>", lambda event: change_direction(LEFT))
+    window.bind("<Right>", lambda event: change_direction(RIGHT))
+    window.bind("<Up>", lambda event: change_direction(UP))
+    window.bind("<Down>", lambda event: change_direction(DOWN))
     def move_window(direction, fast_mode=False):
         """移动窗口位置"""
         x = window.winfo_x()
@@ -3235,14 +3541,15 @@ def _start_main_game_impl():
     )
     # 修改背景图片加载径
     background_images = ['background.jpg', 'background2.jpg','background3.jpg','background4.jpg','background5.jpg']
-    selected_bg = random.choice(background_images)
+    selected_bg = fx_rng.choice(background_images)
     bg_image_path = os.path.join(current_dir, "assets", "images", selected_bg)
     image = Image.open(bg_image_path)
     image = image.resize((400, 400), Image.LANCZOS)
     bg_image = ImageTk.PhotoImage(image)
     
-    # 在 Canvas 上创建图像（背景）
-    canvas.create_image(0, 0, anchor=tk.NW, image=bg_image)
+    # 画布按标签分层（背景、食物、蛇、分数、特效），背景图只创建一次
+    layers = CanvasLayers(canvas)
+    layers.set_background(bg_image)
     # 确保景图片对象不会被垃圾回收
     canvas.bg_image = bg_image
 
@@ -3337,7 +3644,7 @@ def _start_main_game_impl():
                 "#9370DB",  # 中紫色
                 "#8A2BE2"   # 紫罗兰色
             ]
-        ][random.randint(0, 6)]  # 随机选择一种配色方案
+        ][fx_rng.randint(0, 6)]  # 随机选择一种配色方案
         
         # 预先计算所有颜色的RGB值
         rgb_colors = []
@@ -3441,12 +3748,22 @@ def _start_main_game_impl():
     # 启动颜色更新
     window.after(100, update_border_color)
     
-    # 定义蛇的初始状态
-    snake = [(20, 20), (20, 40), (20, 60)]
-    snake_direction = "Down"
+    # 蛇身的绘制视图（grid.SnakeBody），由 new_game_state 随 game_state 一起创建
+    snake = None
+    snake_direction = DOWN
+    # 蛇身画布项常驻，每步增量更新；snake_palette 为 (配色方案, 渐变套号)
+    # 贴图按需生成：开局只画当前配色用到的几张小图
+    snake_atlas = SpriteAtlas(cell_size, SNAKE_SPRITES, master=canvas) if SNAKE_SPRITES else None
+    snake_renderer = SnakeRenderer(canvas, cell_size, snake_atlas)
+    snake_palette = (None, 0)
+    # 位图后端：背景、蛇与粒子合成进一张位图，贴在背景项上；为 None 时使用画布项
+    compositor = (FrameCompositor(CANVAS_WIDTH, CANVAS_HEIGHT, cell_size, SNAKE_SPRITES or "flat")
+                  if RENDER_BACKEND == "bitmap" else None)
     
     # 修改物相关的变量声明
     food = None  # 始化为None
+    # 本局的模拟状态（engine.GameState），开局与重开时由 new_game_state 重建，读档时由存档恢复
+    game_state = None
     
     # 定义游戏态
     game_running = True
@@ -3462,11 +3779,11 @@ def _start_main_game_impl():
             self.x = x
             self.y = y
             self.color = color
-            self.size = random.randint(3, 6)
+            self.size = fx_rng.randint(3, 6)
             
             # 360度喷射
-            angle = random.uniform(-math.pi, math.pi)
-            speed = random.uniform(4.0, 7.0)
+            angle = fx_rng.uniform(-math.pi, math.pi)
+            speed = fx_rng.uniform(4.0, 7.0)
             
             # 添加向上的初始速度
             self.speed_x = math.cos(angle) * speed
@@ -3478,9 +3795,9 @@ def _start_main_game_impl():
             self.drag = 0.97      # 空气阻力
             
             # 闪烁效果
-            self.flicker_rate = random.uniform(0.05, 0.15)
+            self.flicker_rate = fx_rng.uniform(0.05, 0.15)
             self.base_alpha = 1.0
-            self.flicker_offset = random.uniform(0, math.pi * 2)
+            self.flicker_offset = fx_rng.uniform(0, math.pi * 2)
             
             # 尾迹效果
             self.trail = []
@@ -3501,8 +3818,8 @@ def _start_main_game_impl():
             self.x = x
             self.y = y
             self.size = 0
-            self.max_size = random.uniform(80, 100)  # 增加最大尺寸
-            self.speed = random.uniform(1.2, 1.5)    # 降低速度使动画更柔和
+            self.max_size = fx_rng.uniform(80, 100)  # 增加最大尺寸
+            self.speed = fx_rng.uniform(1.2, 1.5)    # 降低速度使动画更柔和
             self.alpha = 1.0
             # 增加更多的环来制造层次感
             self.rings = [
@@ -3513,9 +3830,9 @@ def _start_main_game_impl():
                 {"size": -40, "alpha": 0.6, "width": 1.2},
                 {"size": -50, "alpha": 0.5, "width": 1.0}
             ]
-            self.wave_offset = random.uniform(0, math.pi * 2)
-            self.wave_speed = random.uniform(0.08, 0.12)  # 降低波动速度
-            self.fade_speed = random.uniform(0.02, 0.03)  # 添加淡出速度
+            self.wave_offset = fx_rng.uniform(0, math.pi * 2)
+            self.wave_speed = fx_rng.uniform(0.08, 0.12)  # 降低波动速度
+            self.fade_speed = fx_rng.uniform(0.02, 0.03)  # 添加淡出速度
             
             # 播放水波声效
             if len(ripple_particles) < 3:  # 限制同时播放的声音数量
@@ -3529,92 +3846,19 @@ def _start_main_game_impl():
             self.speed_x = math.cos(angle) * speed
             self.speed_y = math.sin(angle) * speed
             self.life = 1.0
-            self.fade_speed = random.uniform(0.02, 0.04)
-            self.size = random.uniform(3, 5)
+            self.fade_speed = fx_rng.uniform(0.02, 0.04)
+            self.size = fx_rng.uniform(3, 5)
             self.gravity = 0.2
-            self.flicker_offset = random.uniform(0, math.pi * 2)
+            self.flicker_offset = fx_rng.uniform(0, math.pi * 2)
             self.base_alpha = 1.0
     
     milestone_particles = []  # 存储里程碑特效的粒子
     
     def create_milestone_effect(score):
         """创建现代霓虹风格的里程碑特效"""
-        # 预定义配色方案,避免每次重新创建字典
-        color_schemes = {
-            'cyber_pink': {
-                'primary': ["#FF1493", "#FF0090", "#FF0070", "#FF0050", "#FF0030"],  # 更鲜艳的粉红色
-                'glow': "#FF1493",
-                'accent': ["#FFFFFF", "#FF1493", "#FF0090"]
-            },
-            'quantum_blue': {
-                'primary': ["#00FFFF", "#00B7FF", "#0090FF", "#0066FF", "#003CFF"],  # 更明亮的蓝色
-                'glow': "#00FFFF", 
-                'accent': ["#FFFFFF", "#00FFFF", "#00B7FF"]
-            },
-            'neon_purple': {
-                'primary': ["#9932CC", "#8B00FF", "#7B00FF", "#6A00FF", "#5900FF"],  # 更深邃的紫色
-                'glow': "#9932CC",
-                'accent': ["#FFFFFF", "#9932CC", "#8B00FF"]
-            },
-            'toxic_green': {
-                'primary': ["#00FF00", "#00DD00", "#00BB00", "#009900", "#007700"],
-                'glow': "#00FF00",
-                'accent': ["#FFFFFF", "#00FF00", "#00DD00"]
-            },
-            'plasma_gold': {
-                'primary': ["#FFD700", "#FFC125", "#FFB90F", "#FFA500", "#FF8C00"],  # 更温暖的金色
-                'glow': "#FFD700",
-                'accent': ["#FFFFFF", "#FFD700", "#FFC125"]
-            },
-            'inferno_red': {
-                'primary': ["#FF3030", "#FF0000", "#CD0000", "#8B0000", "#800000"],  # 更热烈的红色
-                'glow': "#FF3030",
-                'accent': ["#FFFFFF", "#FF3030", "#FF0000"]
-            },
-            'ocean_blue': {
-                'primary': ["#00FFFF", "#00C0FF", "#0090FF", "#0060FF", "#0030FF"],
-                'glow': "#00FFFF",
-                'accent': ["#FFFFFF", "#00FFFF", "#00C0FF"]
-            },
-            'electric_blue': {
-                'primary': ["#87CEFA", "#1E90FF", "#0000FF", "#0000CD", "#00008B"],  # 更明亮的电光蓝
-                'glow': "#87CEFA",
-                'accent': ["#FFFFFF", "#87CEFA", "#1E90FF"]
-            },
-            'void_violet': {
-                'primary': ["#9400D3", "#8A2BE2", "#9370DB", "#7B68EE", "#6A5ACD"],  # 更神秘的紫罗兰
-                'glow': "#9400D3",
-                'accent': ["#FFFFFF", "#9400D3", "#8A2BE2"]
-            },
-            'solar_orange': {
-                'primary': ["#FFA500", "#FF8C00", "#FF7F00", "#FF6347", "#FF4500"],  # 更温暖的橙色
-                'glow': "#FFA500",
-                'accent': ["#FFFFFF", "#FFA500", "#FF8C00"]
-            },
-            'aqua_teal': {
-                'primary': ["#40E0D0", "#48D1CC", "#00CED1", "#20B2AA", "#008B8B"],  # 更清新的青色
-                'glow': "#40E0D0",
-                'accent': ["#FFFFFF", "#40E0D0", "#48D1CC"]
-            },
-            'acid_lime': {
-                'primary': ["#32CD32", "#98FB98", "#90EE90", "#7CCD7C", "#66CD00"],  # 更活力的青柠色
-                'glow': "#32CD32",
-                'accent': ["#FFFFFF", "#32CD32", "#98FB98"]
-            },
-            'rainbow_burst': {
-                'primary': ["#FF69B4", "#FF1493", "#FF00FF", "#9400D3", "#4B0082"],  # 更绚丽的彩虹色
-                'glow': "#FF69B4",
-                'accent': ["#FFFFFF", "#FF69B4", "#FF1493"]
-            },
-            'prismatic_flow': {
-                'primary': ["#FF00FF", "#EE00EE", "#CD00CD", "#8B008B", "#800080"],  # 更梦幻的棱镜色
-                'glow': "#FF00FF",
-                'accent': ["#FFFFFF", "#FF00FF", "#EE00EE"]
-            }
-        }
-        
-        scheme_name = random.choice(list(color_schemes.keys()))
-        colors = color_schemes[scheme_name]
+        # 配色方案在 palette 模块导入时建好
+        scheme_name = fx_rng.choice(list(MILESTONE_SCHEMES.keys()))
+        colors = MILESTONE_SCHEMES[scheme_name]
         sound_manager.play('milestone')
         center_x, center_y = 200, 200
         start_time = time.time()
@@ -3646,10 +3890,10 @@ def _start_main_game_impl():
                 center_y,  # y
                 cos_angles[i],  # cos_angle
                 sin_angles[i],  # sin_angle
-                random.uniform(3.0, 4.0),  # speed
-                random.uniform(1.5, 2.5),  # size
+                fx_rng.uniform(3.0, 4.0),  # speed
+                fx_rng.uniform(1.5, 2.5),  # size
                 primary_colors[color_indices[i]],  # color
-                random.uniform(0, TWO_PI)  # phase
+                fx_rng.uniform(0, TWO_PI)  # phase
             ))
         
         # 缓存常用值
@@ -3663,6 +3907,7 @@ def _start_main_game_impl():
             elapsed = current_time - start_time
             
             if elapsed >= 6.0:
+                canvas.delete("milestone")  # 画布不再每帧清空，最后一帧的特效项要自己删除
                 return
             
             # 使用列表存储绘图命令
@@ -3931,43 +4176,6 @@ def _start_main_game_impl():
     
     # 创建食物爆炸效果
     def create_food_effect(x, y, food_type):
-        # 使用渐变色方案
-        color_schemes = {
-            'normal': [
-                "#FF0000", "#FF3333", "#FF4444", "#FF6666",  # 红色渐变系
-                "#FF1111", "#FF2222", "#FF5555"
-            ],
-            'golden': [
-                "#FFD700", "#FFC125", "#FFB90F", "#FFA500",  # 金色渐变系
-                "#FFD800", "#FFB800", "#FFA200"
-            ],
-            'special': [
-                "#9400D3", "#8A2BE2", "#9370DB", "#8B00FF",  # 紫罗兰渐变系
-                "#9932CC", "#BA55D3", "#9B30FF"
-            ],
-            'rainbow': ['#FF1493',  # 亮粉红 - 甜蜜的草莓味
-                        '#FF69B4',  # 粉红色 - 柔和的樱桃味
-                        '#00FFFF',  # 青色 - 清爽的薄荷味
-                        '#1E90FF',  # 道奇蓝 - 清凉的蓝莓味
-                        '#9370DB',  # 中紫色 - 浪漫的葡萄味
-                        '#FF6EB4',  # 热粉红 - 可爱的树莓味
-                        '#40E0D0'   # 绿松石色 - 清新的薄荷味
-                        ]  # 添加彩虹颜色
-            ,
-            'star_candy': [
-                '#FF3366',  # 珊瑚玫瑰 - 充满活力不刺眼
-                '#00B8D4',  # 海洋蓝 - 清新深邃
-                '#7E57C2',  # 暮光紫 - 优雅神秘
-                '#26A69A',  # 青玉石 - 温和沉静
-                '#FF6B9C',  # 樱花粉 - 柔美甜蜜
-                '#5C6BC0',  # 星空蓝 - 深邃梦幻
-                '#2ECC71',  # 翡翠绿 - 生机盎然
-                '#9B59B6',  # 紫水晶 - 高贵典雅
-                '#16A085',  # 孔雀绿 - 沉稳优雅
-                '#F39C12'   # 琥珀金 - 温暖明亮
-            ]
-        }
-        
         # 不食物类型的粒子数量
         particle_counts = {
             'normal': 15,   # 红色食物
@@ -3977,18 +4185,13 @@ def _start_main_game_impl():
             'star_candy': 40
         }
         
-        colors = color_schemes[food_type]
+        # 使用渐变色方案
+        colors = FOOD_EFFECT_COLORS[food_type]
         particle_count = particle_counts[food_type]
         
         # 创建粒子
         for _ in range(particle_count):
-            particles.append(Particle(x + 10, y + 10, random.choice(colors)))
-        
-        # 在这里添加里程碑检查
-        score_ = current_score + food.properties[food_type]['score']  
-        if score_ // 20 > current_score // 20:  # 检查是否跨越了20的倍数
-            create_milestone_effect(score_)
-            #print(score_)
+            particles.append(Particle(x + half_cell, y + half_cell, fx_rng.choice(colors)))
     
     # 更新粒子效果
     def update_particles():
@@ -4003,8 +4206,14 @@ def _start_main_game_impl():
         current_time = time.time() * 10
         STIPPLE_GRAY50 = 'gray50'
         EMPTY_STR = ''
+        FX_TAG = 'fx'
         TRAIL_BATCH_SIZE = 4
         
+        # 位图后端：粒子排入合成器，不创建画布项
+        if compositor is not None:
+            compositor.clear_splats()
+            splat = compositor.splat
+        
         # 3. 使用数组替代列表来存储坐标
         coords_array = array.array('f', [0] * 4)
         
@@ -4081,15 +4290,18 @@ def _start_main_game_impl():
                             coords[2] = trail_x + half_size
                             coords[3] = trail_y + half_size
                             
-                            if _runner is not None and hasattr(_runner, 'draw_particle_oval'):
-                                trail_id = _runner.draw_particle_oval(canvas, coords[0], coords[1], coords[2], coords[3], fill=particle.color, stipple=(STIPPLE_GRAY50 if trail_alpha < 0.5 else EMPTY_STR), width=0)
+                            if compositor is not None:
+                                splat(trail_x, trail_y, half_size, particle.color, trail_alpha)
+                            elif _runner is not None and hasattr(_runner, 'draw_particle_oval'):
+                                trail_id = _runner.draw_particle_oval(canvas, coords[0], coords[1], coords[2], coords[3], fill=particle.color, stipple=(STIPPLE_GRAY50 if trail_alpha < 0.5 else EMPTY_STR), width=0, tags=FX_TAG)
                                 trail_ids_append(trail_id)
                             else:
                                 trail_ids_append(create_oval(
                                     *coords,
                                     fill=particle.color,
                                     stipple=STIPPLE_GRAY50 if trail_alpha < 0.5 else EMPTY_STR,
-                                    width=0
+                                    width=0,
+                                    tags=FX_TAG
                                 ))
                             trail_alpha *= 0.6
                     
@@ -4103,14 +4315,17 @@ def _start_main_game_impl():
                 coords_array[2] = particle.x + half_size
                 coords_array[3] = particle.y + half_size
                 
-                if _runner is not None and hasattr(_runner, 'draw_particle_oval'):
-                    particle.id = _runner.draw_particle_oval(canvas, coords_array[0], coords_array[1], coords_array[2], coords_array[3], fill=particle.color, stipple=(STIPPLE_GRAY50 if particle.alpha < 0.5 else EMPTY_STR), width=0)
+                if compositor is not None:
+                    splat(particle.x, particle.y, half_size, particle.color, particle.alpha)
+                elif _runner is not None and hasattr(_runner, 'draw_particle_oval'):
+                    particle.id = _runner.draw_particle_oval(canvas, coords_array[0], coords_array[1], coords_array[2], coords_array[3], fill=particle.color, stipple=(STIPPLE_GRAY50 if particle.alpha < 0.5 else EMPTY_STR), width=0, tags=FX_TAG)
                 else:
                     particle.id = create_oval(
                         *coords_array,
                         fill=particle.color,
                         stipple=STIPPLE_GRAY50 if particle.alpha < 0.5 else EMPTY_STR,
-                        width=0
+                        width=0,
+                        tags=FX_TAG
                     )
                 
                 active_particles_append(particle)
@@ -4122,30 +4337,24 @@ def _start_main_game_impl():
         nonlocal game_paused
         game_paused = not game_paused
         
-        # 无论是暂停还是继续，都重新绘制整个画面
-        canvas.delete("all")  # 清除所有内容
-        canvas.create_image(0, 0, anchor=tk.NW, image=bg_image)
-        if _runner is not None and hasattr(_runner, 'draw_snake'):
-            _runner.draw_snake(canvas, snake, snake_direction, color_chose)
-        else:
-            draw_snake()
-
-        if _runner is not None and hasattr(_runner, 'draw_food'):
-            _runner.draw_food(canvas, food)
-        else:
-            draw_food()
-        draw_score()
+        # 无论是暂停还是继续，都去掉暂停文字并按图层重画有变化的部分
+        canvas.delete("pause_text")
+        draw_layers()
         
         if not game_paused:
-            # 继续游戏时，直接调用 move_snake
-            move_snake()
+            # 继续游戏时重新计时，暂停期间的时间不计入
+            start_game_loop()
             pause_button.config(bg="#4CAF50")
         else:
             pause_button.config(bg="#9C27B0")
     
     def reset_game(event=None):
-        nonlocal snake, snake_direction, food, game_running, current_score, game_paused, snake_speed
+        nonlocal snake_direction, game_running, current_score, game_paused, snake_speed
         nonlocal color_chose,gradient_colors
+        nonlocal session_seed, rng, fx_rng
+        # 重新开局：重建随机数流，指定 --seed 时每局完全一致
+        session_seed, rng, fx_rng = session_rngs(SESSION_SEED)
+        print(f"Session seed: {session_seed}")
         gradient_colors = generate_gradient_colors(30)  # 30个渐变色
 
         for after_id in window.tk.eval('after info').split():
@@ -4153,10 +4362,17 @@ def _start_main_game_impl():
                 window.after_cancel(int(after_id))
             except ValueError:
                 continue
-        color_chose = random.randint(0, 5)
-        # 重置游戏状态
-        snake = [(20, 20), (20, 40), (20, 60)]
-        snake_direction = "Down"
+        color_chose = fx_rng.randint(0, 5)
+        # 重置游戏状态（蛇身随 game_state 在下面的 new_game_state 中重建）
+        snake_direction = DOWN
+        input_queue.clear()
+        game_events.clear()
+        if autopilot is not None:
+            autopilot.reset()
+        if PLAYBACK_REPLAY is not None:
+            begin_playback(PLAYBACK_REPLAY)
+        else:
+            begin_recording()
         current_score = 0
         snake_speed = 100
         game_running = True
@@ -4166,7 +4382,7 @@ def _start_main_game_impl():
         # 根据不同的音乐模式处理音乐
         if music_mode == "conditional":
             # 随机选择新的背景音乐
-            bgm_name = random.choice(["background", "background2","background3","background4","background5"])  # 随机选择文件名
+            bgm_name = fx_rng.choice(["background", "background2","background3","background4","background5"])  # 随机选择文件名
             bgm_path = os.path.join(current_dir, "assets", "music", f"{bgm_name}.mp3")
             pygame.mixer.music.load(bgm_path)
             pygame.mixer.music.play(-1)
@@ -4184,21 +4400,20 @@ def _start_main_game_impl():
             for widget in window.winfo_children():
                 if isinstance(widget, tk.Toplevel):
                     widget.destroy()
-            canvas.delete("all")  # 清除所有画布元素
-            canvas.create_image(0, 0, anchor=tk.NW, image=bg_image)  # 重新创建背景
+            canvas.delete("all")  # 清除所有画布元素（动画已取消，残留的特效项不会再被清理）
+            layers.ensure_background(bg_image)  # 重新创建背景
         
         # 清理动画和画布
         stop_animations()
         
-        canvas.create_image(0, 0, anchor=tk.NW, image=bg_image)
         window.unbind("<Left>")
         window.unbind("<Right>") 
         window.unbind("<Up>")
         window.unbind("<Down>")
-        window.bind("<Left>", lambda event: change_direction("Left"))
-        window.bind("<Right>", lambda event: change_direction("Right"))
-        window.bind("<Up>", lambda event: change_direction("Up"))
-        window.bind("<Down>", lambda event: change_direction("Down"))
+        window.bind("<Left>", lambda event: change_direction(LEFT))
+        window.bind("<Right>", lambda event: change_direction(RIGHT))
+        window.bind("<Up>", lambda event: change_direction(UP))
+        window.bind("<Down>", lambda event: change_direction(DOWN))
         # 添加更优雅的圆环特效
         def create_elegant_ripple(step=0, max_steps=30):
             if step < max_steps:
@@ -4273,22 +4488,13 @@ def _start_main_game_impl():
         create_elegant_ripple()
         
         # 生成新食物
+        new_game_state()
         generate_food()
         
         # 绘制游戏元素
-        if _runner is not None and hasattr(_runner, 'draw_snake'):
-            _runner.draw_snake(canvas, snake, snake_direction, color_chose)
-        else:
-            draw_snake()
-
-        if _runner is not None and hasattr(_runner, 'draw_food'):
-            _runner.draw_food(canvas, food)
-        else:
-            draw_food()
-        draw_score()
+        draw_layers()
         
-        # 直接调用 move_snake
-        move_snake()
+        start_game_loop()
     
     # 然后创建按框架按钮
     button_frame = tk.Frame(window)
@@ -4505,455 +4711,230 @@ def _start_main_game_impl():
     pause_button.bind("<Enter>", lambda e: pause_button.config(bg="#81C784"))  # 浅绿色
     pause_button.bind("<Leave>", lambda e: pause_button.config(bg="#4CAF50"))
     
+    def snake_colors():
+        """当前蛇身的渐变色"""
+        nonlocal snake_palette
+        # 每种配色有三套渐变，换配色时随机挑一套；不再每帧重抽，否则整条蛇每帧都要改色
+        if snake_palette[0] != color_chose:
+            snake_palette = (color_chose, fx_rng.randint(0, 2))
+        return SNAKE_COLOR_SCHEMES[color_chose][snake_palette[1]]
+    
     def draw_snake():
-        # 使用渐变效果，从到尾颜色逐渐变化
-        INTP = random.randint(0, 2)
-        
-        color_schemes = [
-            [   # 第一组：梦幻晨曦组
-                [   # 晨曦粉紫
-                    "#FF80ED",  # 梦幻起始粉
-                    "#FF50B8",  # 晨曦过渡粉
-                    "#FF2087",  # 玫瑰魅色
-                    "#FF00AA"   # 魅影终点色
-                ],
-                [   # 晨曦青蓝
-                    "#80FFFF",  # 晶莹起始青
-                    "#40E5FF",  # 碧海过渡色
-                    "#00CCFF",  # 深海梦境色
-                    "#00A8FF"   # 深邃终点色
-                ],
-                [   # 晨曦金色
-                    "#FFE566",  # 晨光起始金
-                    "#FFD700",  # 璀璨过渡金                
-                    "#FFAD1F",  # 琥珀过渡色
-                    "#FF9912"   # 落日终点色
-                ]
-            ],
-            [   # 第二组：梦幻极光组（重新优化）
-                [   # 梦幻紫罗
-                    "#E680FF",  # 梦幻起始紫
-                    "#D355FF",  # 极光过渡紫
-                    "#B82AFF",  # 魅影紫霞
-                    "#9900FF"   # 深邃紫梦
-                ],
-                [   # 梦幻青碧
-                    "#80FFE6",  # 梦幻起始青
-                    "#40FFD4",  # 极光碧波
-                    "#00FFB8",  # 深海之梦
-                    "#00E5A0"   # 碧波尽头
-                ],
-                [   # 梦幻翠绿
-                    "#80FF9E",  # 梦幻嫩绿
-                    "#40FF8A",  # 极光翠绿
-                    "#00FF76",  # 翡翠之梦
-                    "#00E562"   # 碧绿深邃
-                ]
-            ],
-            [   # 第三组：赛博霓虹组（强对比版）
-                [   # 等离子脉冲
-                    "#FF5555",  # 等离子起始（明亮赛博红）
-                    "#FF2222",  # 脉冲过渡
-                    "#FF0000",  # 能量聚焦
-                    "#CC0066"   # 核心迸发（深邃玫红）
-                ],
-                [   # 量子极光
-                    "#DD66FF",  # 量子起始（通透量子紫）
-                    "#BB33FF",  # 极光弧光
-                    "#9900FF",  # 量子跃迁
-                    "#7700CC"   # 虚空之境
-                ],
-                [   # 全息青焰
-                    "#66FFFF",  # 全息起始（明亮赛博青）
-                    "#33FFFF",  # 离子之光
-                    "#00FFFF",  # 数据流束
-                    "#00CCFF"   # 矩阵深邃
-                ]
-            ],
-            [   # 第一组：梦幻星空
-                [   # 星云幻彩
-                    "#FF99FF",  # 星云粉紫
-                    "#FF66FF",  # 星尘闪烁
-                    "#FF33FF",  # 星际光芒
-                    "#CC00FF"   # 深空魔力
-                ],
-                [   # 银河之流
-                    "#99FFFF",  # 银河起点
-                    "#66FFFF",  # 星河波动
-                    "#33FFFF",  # 星际之流
-                    "#00CCFF"   # 深空之渊
-                ],
-                [   # 恒星之光
-                    "#FFFF99",  # 恒星光辉
-                    "#FFFF66",  # 星光闪耀
-                    "#FFFF33",  # 光芒万丈
-                    "#FFCC00"   # 永恒之星
-                ]
-            ],
-            [   # 第二组：霓虹都市
-                [   # 霓虹之夜
-                    "#FF6699",  # 霓虹玫瑰
-                    "#FF3366",  # 城市脉动
-                    "#FF0033",  # 都市之心
-                    "#CC0033"   # 暗夜之魂
-                ],
-                [   # 电子光辉
-                    "#66FF99",  # 电子光芒
-                    "#33FF66",  # 数据流光
-                    "#00FF33",  # 矩阵能量
-                    "#00CC33"   # 科技深邃
-                ],
-                [   # 赛博之焰
-                    "#FF9966",  # 赛博烈焰
-                    "#FF6633",  # 数码燃烧
-                    "#FF3300",  # 信息之火
-                    "#CC3300"   # 核心之炎
-                ]
-            ],
-            [   # 第三组：量子领域
-                [   # 量子之舞
-                    "#9999FF",  # 量子起点
-                    "#6666FF",  # 虚拟律动
-                    "#3333FF",  # 数据洪流
-                    "#0000CC"   # 信息之海
-                ],
-                [   # 矩阵绿光
-                    "#99FF99",  # 矩阵光束
-                    "#66FF66",  # 程序之光
-                    "#33FF33",  # 代码闪耀
-                    "#00CC00"   # 系统之芯
-                ],
-                [   # 超维空间
-                    "#FF9999",  # 维度之门
-                    "#FF6666",  # 空间涟漪
-                    "#FF3333",  # 现实折射
-                    "#CC0000"   # 终极真理
-                ]
-            ]
-        ]
-        
-        colors = color_schemes[color_chose][INTP]  # 随机选择一种颜色方案
-        
-        # 先制蛇身
-        # 假设蛇身部分是由列表坐标组成，colors 是颜色列表
-        block_size = 20  # 每个蛇身块的大小
-        shadow_offset = 5  # 阴影偏移量
-
-        def draw_segment(canvas, segment, color):
-            """
-            绘制蛇身方块,终极优化版本
-            """
-            # 直接使用列表索引,避免任何变量赋值和计算
-            canvas.create_rectangle(
-                segment[0], segment[1],
-                segment[0] + 20, segment[1] + 20,
-                fill=color,
-                outline=""
-            )
-
-        def draw_snake(canvas, snake, colors):
-            """
-            批量绘制整条蛇,终极优化版本
-            """
-            # 预计算颜色列表长度,避免重复计算
-            color_len = len(colors)
-            
-            # 使用列表推导式一次性生成所有绘图命令
-            commands = [(
-                segment[0], segment[1],
-                segment[0] + 20, segment[1] + 20,
-                colors[i % color_len]
-            ) for i, segment in enumerate(snake[:-1])]
-            
-            # 批量执行所有绘图命令
-            for x1, y1, x2, y2, color in commands:
-                canvas.create_rectangle(x1, y1, x2, y2, fill=color, outline="")
+        """把蛇的可见部分同步到常驻画布项上（见 renderer.SnakeRenderer），画布项数与每步的画布操作次数都与蛇长无关"""
+        if compositor is not None:
+            present_frame()
+        elif snake_renderer.sync(snake, snake_direction, snake_colors(), viewport):
+            layers.mark_restack()
+    
+    def present_frame():
+        """位图后端：背景、蛇与已排入的粒子合成一帧，贴到背景项上（整帧一次贴图）"""
+        compositor.set_background(image)
+        layers.set_background(compositor.render(snake, snake_direction, snake_colors(), viewport, master=canvas))
+    
+    def new_game_state():
+        """按开局布局与当前的分数、配色与背景重建 engine.GameState（与界面共用 rng）。
 
-        # 直接调用优化后的绘制函数
-        draw_snake(canvas, snake, colors)
+        规则全部由 engine.step 在 game_state 上执行；snake 是它的绘制视图，food 等变量只是绘制副本。
+        """
+        nonlocal game_state, snake
+        game_state = engine.GameState(cols, rows, Game_Mode, rng, session_seed)
+        engine.place_snake(game_state)
+        snake = SnakeBody(game_state, cell_size)
+        viewport.follow(snake.head)
+        game_state.direction = snake_direction
+        game_state.score = current_score
+        game_state.speed = snake_speed
+        game_state.color_chose = color_chose
+        game_state.background = background_images.index(selected_bg)
+        game_state.ticks = sim_ticks
 
+    def sync_food():
+        """把 game_state 中的食物同步为绘制用的 Food；棋盘已满时返回 False"""
+        nonlocal food
+        if game_state.food < 0:
+            food = None
+            return False
+        food = Food(snake.positions[game_state.food], game_state.food_type)
+        return True
 
-        
-        # 单独处理蛇头
-        head = snake[-1]
-        head_color = colors[0]  # 使用第一个颜色作为基础头部颜色
-        
-        # 正常绘制蛇头
-        canvas.create_rectangle(
-            head[0], head[1],
-            head[0] + 20, head[1] + 20,
-            fill=head_color,
-            outline=""
-        )
-        
-        # 在蛇头上添加眼睛
-        head = snake[-1]  # 蛇头是列表的最后一个元素
-        # 根据蛇的方向调整眼睛位置
-        if snake_direction == "Right":
-            # 右眼
-            canvas.create_oval(head[0] + 12, head[1] + 5, head[0] + 16, head[1] + 8, fill="#F8F8F8")
-            canvas.create_oval(head[0] + 13, head[1] + 6, head[0] + 15, head[1] + 7, fill="#2196F3")
-            # 左眼
-            canvas.create_oval(head[0] + 12, head[1] + 12, head[0] + 16, head[1] + 15, fill="#F8F8F8")
-            canvas.create_oval(head[0] + 13, head[1] + 13, head[0] + 15, head[1] + 14, fill="#2196F3")
-            
-        elif snake_direction == "Left":
-            # 右眼
-            canvas.create_oval(head[0] + 4, head[1] + 5, head[0] + 8, head[1] + 8, fill="#F8F8F8")
-            canvas.create_oval(head[0] + 5, head[1] + 6, head[0] + 7, head[1] + 7, fill="#2196F3")
-            # 左眼
-            canvas.create_oval(head[0] + 4, head[1] + 12, head[0] + 8, head[1] + 15, fill="#F8F8F8")
-            canvas.create_oval(head[0] + 5, head[1] + 13, head[0] + 7, head[1] + 14, fill="#2196F3")
-            
-        elif snake_direction == "Up":
-            # 右眼
-            canvas.create_oval(head[0] + 5, head[1] + 4, head[0] + 8, head[1] + 8, fill="#F8F8F8")
-            canvas.create_oval(head[0] + 6, head[1] + 5, head[0] + 7, head[1] + 7, fill="#2196F3")
-            # 左眼
-            canvas.create_oval(head[0] + 12, head[1] + 4, head[0] + 15, head[1] + 8, fill="#F8F8F8")
-            canvas.create_oval(head[0] + 13, head[1] + 5, head[0] + 14, head[1] + 7, fill="#2196F3")
-            
-        else:  # Down
-            # 右眼
-            canvas.create_oval(head[0] + 5, head[1] + 12, head[0] + 8, head[1] + 16, fill="#F8F8F8")
-            canvas.create_oval(head[0] + 6, head[1] + 13, head[0] + 7, head[1] + 15, fill="#2196F3")
-            # 左眼
-            canvas.create_oval(head[0] + 12, head[1] + 12, head[0] + 15, head[1] + 16, fill="#F8F8F8")
-            canvas.create_oval(head[0] + 13, head[1] + 13, head[0] + 14, head[1] + 15, fill="#2196F3")
-    
-    class Food:
-        def __init__(self, position, food_type):
-            self.position = position
-            self.food_type = food_type
-            # 不同食物的属性，调整了颜色使其更鲜明
-            self.properties = {
-                'normal': {
-                    'color': '#FF0033',  # 更鲜艳的红色
-                    'score': 1,
-                    'effect': None,
-                    'probability': 0.60
-                },
-                'golden': {
-                    'color': '#FFD700',  # 更明亮的金色
-                    'score': 3,
-                    'effect': 'speed_up',
-                    'probability': 0.235
-                },
-                'special': {
-                    'color': '#9400D3',  # 更深邃的紫色
-                    'score': 5,
-                    'effect': 'slow_down',
-                    'probability': 0.10
-                },
-                'rainbow': {
-                    'color': '#FF1493',
-                    'score': 10,
-                    'effect': 'rainbow',
-                    'probability': 0.055
-                },
-                'star_candy': {
-                    'color': '#FFD700',
-                    'score': 6,
-                    'effect': 'star_candy',
-                    'probability': 0.015
-                }
-            }
-            
-            # 彩色糖果的颜色列表
-            self.rainbow_colors = [
-                '#FF1493',  # 亮粉红 - 甜蜜的草莓味
-                '#FF69B4',  # 粉红色 - 柔和的樱桃味
-                '#00FFFF',  # 青色 - 清爽的薄荷味
-                '#1E90FF',  # 道奇蓝 - 清凉的蓝莓味
-                '#9370DB',  # 中紫色 - 浪漫的葡萄味
-                '#FF6EB4',  # 热粉红 - 可爱的树莓味
-                '#40E0D0'   # 绿松石色 - 清新的薄荷味
-            ]
-            self.color_index = 0
-    
     def generate_food():
-        nonlocal food  
-        new_position = (random.randint(0, 19) * 20, random.randint(0, 19) * 20)
-        while new_position in snake:
-            new_position = (random.randint(0, 19) * 20, random.randint(0, 19) * 20)
-        
-        # 使用权重随机选择食物类型
-        food_types = ['normal', 'golden', 'special', 'rainbow', 'star_candy']
-        weights = [0.59, 0.240, 0.10, 0.055, 0.015]  # 概率权重
-        
-        # 使用random.choices进行加权随机选择
-        food_type = random.choices(
-            food_types,
-            weights=weights,
-            k=1
-        )[0]
-        
-        food = Food(new_position, food_type)
+        """在空闲格子中生成食物；棋盘已满时返回 False（完美通关）"""
+        # 从空闲格子索引中一次抽取，食物类型按 foods 模块预先累加的权重二分抽取
+        engine.spawn_food(game_state)
+        return sync_food()
     
+    def star_candy_color():
+        """星星糖随时间循环变换的颜色"""
+        return STAR_CANDY_CYCLE[cycle_level(time.time(), 2.0)]
+
     def draw_food():
-        if not food:
+        """食物图层：换了食物或可见窗口移动时重画，否则只按呼吸光效改颜色"""
+        if not food or not viewport.is_visible(food.position, cell_size):
+            if layers.changed("food", None):
+                layers.clear("food")
             return
-        
-        x, y = food.position
-        base_color = food.properties[food.food_type]['color']
-        
-        # 使用更温和的明暗变化参数：
-        # - 使用较慢的变化速度(2)
-        # - 使用适中的振幅(0.2)
-        # - 使用较高的基础亮度(0.8)
-        glow = abs(math.sin(time.time() * 2)) * 0.2 + 0.8
-        
-        # 调整颜色亮度
-        def adjust_color(hex_color, factor):
-            # 将颜色转换RGB
-            r = int(hex_color[1:3], 16)
-            g = int(hex_color[3:5], 16)
-            b = int(hex_color[5:7], 16)
-            
-            # 调整亮度
-            r = min(255, int(r * factor))
-            g = min(255, int(g * factor))
-            b = min(255, int(b * factor))
-            
-            return f'#{r:02x}{g:02x}{b:02x}'
-        
-        # 获取当前颜色
-        current_color = adjust_color(base_color, glow)
+        x, y = viewport.to_screen(food.position)
+        s = cell_scale  # 形状偏移按格子大小缩放
+        
+        # 使用更温和的明暗变化：较慢的变化速度(2)，亮度在 0.8~1.0 倍之间，
+        # 颜色取自 palette 预先量化好的颜色表
+        current_color = FOOD_GLOW[food.food_type][level(abs(math.sin(time.time() * 2)))]
+        
+        # 彩色糖果每次绘制都换相位，总会整层重画；其余食物形状不变时只改填充色
+        if not layers.changed("food", (food, x, y, food.color_phase)):
+            color = star_candy_color() if food.food_type == 'star_candy' else current_color
+            if layers.changed("food_color", color):
+                canvas.itemconfigure("food", fill=color)
+            return
+        layers.clear("food")
         
         # 据食物类型绘制不同形状
         if food.food_type == 'normal':
             # 普通食物：方块
             canvas.create_rectangle(
-                x, y, x + 20, y + 20,
+                x, y, x + 20 * s, y + 20 * s,
                 fill=current_color,
-                outline=""
+                outline="",
+                tags="food"
             )
         elif food.food_type == 'golden':
             # 金色食物：圆
             canvas.create_oval(
-                x, y, x + 20, y + 20,
+                x, y, x + 20 * s, y + 20 * s,
                 fill=current_color,
-                outline=""
+                outline="",
+                tags="food"
             )
         elif food.food_type == 'special':  # special
             # 特殊食物：菱形
             canvas.create_polygon(
-                x + 10, y,      # 上
-                x + 20, y + 10, # 右
-                x + 10, y + 20, # 下
-                x, y + 10,      # 左
+                x + 10 * s, y,      # 上
+                x + 20 * s, y + 10 * s, # 右
+                x + 10 * s, y + 20 * s, # 下
+                x, y + 10 * s,      # 左
                 fill=current_color,
-                outline=""
+                outline="",
+                tags="food"
             )
         elif food.food_type == 'rainbow':
                 # 绘制糖果形状
                 # 糖果主体(两个圆形)
             # 主体圆形部分(稍微调整位置和大小)
             canvas.create_oval(
-                x + 5, y + 3,  
-                x + 15, y + 13,  
-                fill=food.rainbow_colors[food.color_index],
-                outline=""
+                x + 5 * s, y + 3 * s,  
+                x + 15 * s, y + 13 * s,  
+                fill=RAINBOW_COLORS[food.color_phase],
+                outline="",
+                tags="food"
             )
             canvas.create_oval(
-                x + 5, y + 7,
-                x + 15, y + 17,
-                fill=food.rainbow_colors[(food.color_index + 1) % len(food.rainbow_colors)],
-                outline=""
+                x + 5 * s, y + 7 * s,
+                x + 15 * s, y + 17 * s,
+                fill=RAINBOW_COLORS[(food.color_phase + 1) % len(RAINBOW_COLORS)],
+                outline="",
+                tags="food"
             )
 
             # 包装纸褶皱效果增强
             # 左侧包装纸 - 多层次设计
             canvas.create_polygon(
-                x + 2, y + 5,    # 外尖
-                x + 4, y + 7,    # 内上
-                x + 5, y + 10,   # 内中
-                x + 4, y + 13,   # 内下
-                x + 2, y + 15,   # 外尖
-                fill=food.rainbow_colors[(food.color_index + 2) % len(food.rainbow_colors)],
-                outline=""
+                x + 2 * s, y + 5 * s,    # 外尖
+                x + 4 * s, y + 7 * s,    # 内上
+                x + 5 * s, y + 10 * s,   # 内中
+                x + 4 * s, y + 13 * s,   # 内下
+                x + 2 * s, y + 15 * s,   # 外尖
+                fill=RAINBOW_COLORS[(food.color_phase + 2) % len(RAINBOW_COLORS)],
+                outline="",
+                tags="food"
             )
 
             # 左侧内层褶皱
             canvas.create_polygon(
-                x + 3, y + 7,    # 内尖上
-                x + 4.5, y + 8,  # 褶皱上
-                x + 5, y + 10,   # 中点
-                x + 4.5, y + 12, # 褶皱下
-                x + 3, y + 13,   # 内尖下
-                fill=food.rainbow_colors[(food.color_index + 3) % len(food.rainbow_colors)],
+                x + 3 * s, y + 7 * s,    # 内尖上
+                x + 4.5 * s, y + 8 * s,  # 褶皱上
+                x + 5 * s, y + 10 * s,   # 中点
+                x + 4.5 * s, y + 12 * s, # 褶皱下
+                x + 3 * s, y + 13 * s,   # 内尖下
+                fill=RAINBOW_COLORS[(food.color_phase + 3) % len(RAINBOW_COLORS)],
                 stipple='gray50',
-                outline=""
+                outline="",
+                tags="food"
             )
 
             # 右侧包装纸 - 对称的多层次设计
             canvas.create_polygon(
-                x + 18, y + 5,   # 外尖
-                x + 16, y + 7,   # 内上
-                x + 15, y + 10,  # 内中
-                x + 16, y + 13,  # 内下
-                x + 18, y + 15,  # 外尖
-                fill=food.rainbow_colors[(food.color_index + 2) % len(food.rainbow_colors)],
-                outline=""
+                x + 18 * s, y + 5 * s,   # 外尖
+                x + 16 * s, y + 7 * s,   # 内上
+                x + 15 * s, y + 10 * s,  # 内中
+                x + 16 * s, y + 13 * s,  # 内下
+                x + 18 * s, y + 15 * s,  # 外尖
+                fill=RAINBOW_COLORS[(food.color_phase + 2) % len(RAINBOW_COLORS)],
+                outline="",
+                tags="food"
             )
 
             # 右侧内层褶皱
             canvas.create_polygon(
-                x + 17, y + 7,   # 内尖上
-                x + 15.5, y + 8, # 褶皱上
-                x + 15, y + 10,  # 中点
-                x + 15.5, y + 12,# 褶皱下
-                x + 17, y + 13,  # 内尖下
-                fill=food.rainbow_colors[(food.color_index + 3) % len(food.rainbow_colors)],
+                x + 17 * s, y + 7 * s,   # 内尖上
+                x + 15.5 * s, y + 8 * s, # 褶皱上
+                x + 15 * s, y + 10 * s,  # 中点
+                x + 15.5 * s, y + 12 * s,# 褶皱下
+                x + 17 * s, y + 13 * s,  # 内尖下
+                fill=RAINBOW_COLORS[(food.color_phase + 3) % len(RAINBOW_COLORS)],
                 stipple='gray50',
-                outline=""
+                outline="",
+                tags="food"
             )
 
             # 包装纸光泽效果
             # 左侧高光
             canvas.create_line(
-                x + 3, y + 7,
-                x + 4, y + 10,
-                x + 3, y + 13,
+                x + 3 * s, y + 7 * s,
+                x + 4 * s, y + 10 * s,
+                x + 3 * s, y + 13 * s,
                 fill="white",
                 width=1,
-                stipple='gray25'
+                stipple='gray25',
+                tags="food"
             )
 
             # 右侧高光
             canvas.create_line(
-                x + 17, y + 7,
-                x + 16, y + 10,
-                x + 17, y + 13,
+                x + 17 * s, y + 7 * s,
+                x + 16 * s, y + 10 * s,
+                x + 17 * s, y + 13 * s,
                 fill="white",
                 width=1,
-                stipple='gray25'
+                stipple='gray25',
+                tags="food"
             )
 
             # 糖果表面点缀
             # 上部光点
             canvas.create_oval(
-                x + 9, y + 5,
-                x + 11, y + 7,
+                x + 9 * s, y + 5 * s,
+                x + 11 * s, y + 7 * s,
                 fill="white",
                 stipple='gray50',
-                outline=""
+                outline="",
+                tags="food"
             )
 
             # 下部光点
             canvas.create_oval(
-                x + 9, y + 13,
-                x + 11, y + 15,
+                x + 9 * s, y + 13 * s,
+                x + 11 * s, y + 15 * s,
                 fill="white",
                 stipple='gray50',
-                outline=""
+                outline="",
+                tags="food"
             )
                             
             # 更新颜色索引使糖果变色
-            food.color_index = (food.color_index + 1) % len(food.rainbow_colors)
+            food.color_phase = (food.color_phase + 1) % len(RAINBOW_COLORS)
         elif food.food_type == 'star_candy':
-            center_x, center_y = x + 10, y + 10
-            size = 30
+            center_x, center_y = x + 10 * s, y + 10 * s
+            size = 30 * s
             
             # 计算五角星的点
             points = []
@@ -4972,34 +4953,31 @@ def _start_main_game_impl():
                     center_y + r * math.sin(angle)
                 ])
             
-            t = time.time()
-            r = int(128 + 127 * math.sin(t * 2.0))
-            g = int(128 + 127 * math.sin(t * 2.0 + 2.0))
-            b = int(128 + 127 * math.sin(t * 2.0 + 4.0))
-            dynamic_color = f'#{r:02x}{g:02x}{b:02x}'
+            dynamic_color = star_candy_color()
             
             # 绘制五角星
             canvas.create_polygon(
                 points,
                 fill=dynamic_color,  # 使用动态颜色
-                outline=''
+                outline='',
+                tags="food"
             )
     class StarParticle:
         def __init__(self, x, y):
             self.x = x
             self.y = y
-            self.size = random.randint(10, 15)
-            self.angle = random.uniform(0, math.pi * 2)
-            self.speed = random.uniform(2, 4)
-            self.rotation = random.uniform(0, math.pi * 2)
-            self.rotation_speed = random.uniform(-0.1, 0.1)
+            self.size = fx_rng.randint(10, 15)
+            self.angle = fx_rng.uniform(0, math.pi * 2)
+            self.speed = fx_rng.uniform(2, 4)
+            self.rotation = fx_rng.uniform(0, math.pi * 2)
+            self.rotation_speed = fx_rng.uniform(-0.1, 0.1)
             self.alpha = 1.0
             # 使用预定义的颜色列表以提高性能
             self._colors = (
                 "#FFD700", "#FFC125", "#FFE4B5", 
                 "#FFDF00", "#FFB90F"
             )
-            self.color = random.choice(self._colors)
+            self.color = fx_rng.choice(self._colors)
             # 使用deque优化轨迹存储
             self.trail = deque(maxlen=5)
 
@@ -5107,10 +5085,10 @@ def _start_main_game_impl():
             }
             
             # 预计算角度和速度范围
-            main_angles = [random.uniform(0, TWO_PI) for _ in range(100)]
-            main_speeds = [random.uniform(4, 10) for _ in range(100)]
-            trail_angles = [random.uniform(0, TWO_PI) for _ in range(20)]
-            trail_speeds = [random.uniform(2, 5) for _ in range(20)]
+            main_angles = [fx_rng.uniform(0, TWO_PI) for _ in range(100)]
+            main_speeds = [fx_rng.uniform(4, 10) for _ in range(100)]
+            trail_angles = [fx_rng.uniform(0, TWO_PI) for _ in range(20)]
+            trail_speeds = [fx_rng.uniform(2, 5) for _ in range(20)]
             
             # 批量创建主要爆炸效果粒子
             for angle, speed in zip(main_angles, main_speeds):
@@ -5119,8 +5097,8 @@ def _start_main_game_impl():
                 dx = cos_angle * speed
                 dy = sin_angle * speed
                 
-                color = random.choice(self.colors)
-                size = random.uniform(2, 6)
+                color = fx_rng.choice(self.colors)
+                size = fx_rng.uniform(2, 6)
                 
                 # 立即创建画布元素（保留原始详细参数以恢复视觉效果）
                 glow_id = self.canvas.create_oval(
@@ -5140,7 +5118,7 @@ def _start_main_game_impl():
                     'color': color,
                     'size': size,
                     'type': 'main',
-                    'sparkle_timer': random.uniform(0, math.pi),
+                    'sparkle_timer': fx_rng.uniform(0, math.pi),
                     'glow_id': glow_id,
                     'core_id': core_id
                 })
@@ -5153,7 +5131,7 @@ def _start_main_game_impl():
                 dx = cos_angle * speed
                 dy = sin_angle * speed
                 
-                color = random.choice(self.colors)
+                color = fx_rng.choice(self.colors)
                 
                 # 预创建9段线段用于轨迹
                 segment_ids = []
@@ -5169,7 +5147,7 @@ def _start_main_game_impl():
                     'dx': dx,
                     'dy': dy,
                     'color': color,
-                    'size': random.uniform(3, 8),
+                    'size': fx_rng.uniform(3, 8),
                     'type': 'trail',
                     'trail': [],
                     'segment_ids': segment_ids
@@ -5264,7 +5242,8 @@ def _start_main_game_impl():
         firework = CelebrationFirework(canvas, 200, 150)
         
         def animate_firework():
-            if game_running and firework.update_and_draw():
+            # 完美通关时游戏已停止，但烟花仍需播完
+            if (game_running or snake.is_full) and firework.update_and_draw():
                 window.after(16, animate_firework)
         
         # 播放烟花音效
@@ -5277,571 +5256,608 @@ def _start_main_game_impl():
         animate_firework()
     
     def move_snake():
-        nonlocal snake, food, game_running, current_score, snake_speed
+        """固定时间步主循环：补上所有到期的时间步后只重绘一次，再按真实时间安排下一次唤醒。
+
+        绘制耗时不再叠加到每一步上，实际步长与 snake_speed 保持一致。
+        """
+        nonlocal loop_after_id
+        loop_after_id = None
         if game_paused or not game_running:
             return
-            
-        head_x, head_y = snake[-1]
-        if snake_direction == "Up":
-            new_head = (head_x, head_y - 20)
-        elif snake_direction == "Down":
-            new_head = (head_x, head_y + 20)
-        elif snake_direction == "Left":
-            new_head = (head_x - 20, head_y)
-        elif snake_direction == "Right":
-            new_head = (head_x + 20, head_y)
-            
-        # 处理穿墙逻辑
-        global Game_Mode
-        if Game_Mode == "Pass":  # 可以穿墙
-            # 如果超出边界,从对面出现
-            new_head = (
-                new_head[0] % 400,  # x坐标取余
-                new_head[1] % 400   # y坐标取余
-            )
-        
-        # 检查是否撞到墙壁或自己
-        if new_head in snake or (
-            Game_Mode == "Forbid" and (  # 不能穿墙时才检查边界
-                new_head[0] < 0 or 
-                new_head[0] >= 400 or 
-                new_head[1] < 0 or 
-                new_head[1] >= 400
-            )
-        ):
+        steps = game_clock.due()
+        alive = True
+        for _ in range(steps):
+            if not advance_snake():
+                alive = False
+                break
+            if not game_running:
+                break
+        # 模拟结束后再统一处理音效、特效、换背景等表现层事件
+        game_events.drain()
+        if not alive:
+            return  # 死亡动画接管画布
+        if steps:
+            render_frame()
+        if game_running:
+            loop_after_id = window.after(game_clock.delay_ms(), move_snake)
+
+    def start_game_loop():
+        """（重新）启动主循环：取消尚未触发的唤醒，并从当前时刻重新计时"""
+        nonlocal loop_after_id
+        if loop_after_id is not None:
+            window.after_cancel(loop_after_id)
+            loop_after_id = None
+        game_clock.reset(snake_speed)
+        move_snake()
+
+    def advance_snake():
+        """推进一个时间步的模拟（不重绘）；蛇死亡时返回 False。
+
+        规则由 engine.step 在 game_state 上执行，这里只把结果同步到绘制用的蛇身、食物与分数。
+        """
+        nonlocal game_running, current_score, snake_speed, snake_direction, sim_ticks, color_chose
+        # 每步只消费一个转向：回放时取自回放，否则取自输入队列
+        if replay_cursor is not None:
+            turn = replay_cursor.turn_at(sim_ticks)
+        else:
+            if autopilot is not None:
+                steer_autopilot()
+            turn = input_queue.pop()
+        if turn is not None and replay_recorder is not None:
+            replay_recorder.record(sim_ticks, turn)
+        # 音效、粒子与换背景在时间步结束后由事件订阅者处理
+        result = engine.step(game_state, turn, game_events)
+        snake_direction = game_state.direction
+        if result == engine.STEP_DIED:
             game_running = False
+            return False
+
+        sim_ticks += 1
+        if result == engine.STEP_MOVED:
+            return True
+
+        current_score = game_state.score
+        snake_speed = game_state.speed
+        color_chose = game_state.color_chose
+        if not sync_food():
+            # 蛇已占满棋盘：完美通关，结束本局并放烟花庆祝
+            game_running = False
+            if current_score > load_high_score():
+                save_high_score(current_score)
+            finish_recording(False)
+            show_celebration_firework()
+        return True
+
+    def on_ate(event):
+        """吃到食物：音效与粒子特效"""
+        sound_manager.play('eat')
+        create_food_effect(*viewport.to_screen(snake.positions[event.position]), FOOD_TYPES[event.food_type])
+
+    def on_milestone(event):
+        create_milestone_effect(event.score)
+
+    def on_speed_changed(event):
+        # 新速度从下一次唤醒起生效
+        game_clock.interval_ms = event.speed
+
+    def set_background(index):
+        """切换到第 index 张背景图（解码并缩放到画布大小）"""
+        nonlocal selected_bg, bg_image_path, bg_image, image
+        selected_bg = background_images[index]
+        bg_image_path = os.path.join(current_dir, "assets", "images", selected_bg)
+        
+        # 使用 with 语句确保文件正确关闭
+        with Image.open(bg_image_path) as img:
+            # 使用 LANCZOS 重采样进行高质量缩放
+            image = img.resize((400, 400), Image.LANCZOS)
+            bg_image = ImageTk.PhotoImage(image)
+        
+        # 保持对背景图片的引用以防止垃圾回收
+        canvas.bg_image = bg_image
+
+    def on_background_changed(event):
+        """星星糖：加载并切换到新背景"""
+        try:
+            set_background(event.background)
             
-            # 只在条件模式下停止音乐
-            if music_mode == "conditional":
-                pygame.mixer.music.stop()
-                pygame.mixer.music.unload()
-            
-            # 创建死亡动画
-            stars = [StarParticle(head_x + 10, head_y + 10) for _ in range(5)]
+            # 只替换背景项的图片，其余图层与进行中的特效保持不动
+            if compositor is None:
+                layers.set_background(bg_image)
+            else:
+                present_frame()
             
-            def animate_death():
-                nonlocal stars
-                canvas.delete("all")  # 删除所有元素
-                canvas.create_image(0, 0, anchor=tk.NW, image=bg_image)
-                sound_manager.play('death')
+            # 播放背景切换音效（如果有）
+            try:
+                sound_manager.play('background_change')
+            except Exception as e:
+                print(f"Sound play failed: {e}")
+
                 
-                # 继续绘制蛇的最后一帧
-                draw_snake()  # 保持蛇的图像
+        except Exception as e:
+            print(f"背景切换失败: {str(e)}")
+            # 如果切换失败，保持原有背景
+            layers.set_background(canvas.bg_image)
+
+    def on_died(event):
+        """死亡：停止音乐并播放死亡动画"""
+        # 只在条件模式下停止音乐
+        if music_mode == "conditional":
+            pygame.mixer.music.stop()
+            pygame.mixer.music.unload()
+        
+        # 创建死亡动画
+        head_screen_x, head_screen_y = viewport.to_screen(snake.positions[event.position])
+        if compositor is not None:
+            compositor.clear_splats()
+        stars = [StarParticle(head_screen_x + half_cell, head_screen_y + half_cell) for _ in range(5)]
+        
+        def animate_death():
+            nonlocal stars
+            canvas.delete("all")  # 删除所有元素
+            layers.ensure_background(bg_image)
+            sound_manager.play('death')
+            
+            # 继续绘制蛇的最后一帧
+            draw_snake()  # 保持蛇的图像
+            
+            # 更新和绘制星星
+            new_stars = []
+            for star in stars:
+                if star.move():
+                    star.draw(canvas)
+                    new_stars.append(star)
+            stars = new_stars
+            
+            # 只有在所有星星消失后才开始粒子特效
+            if not stars:
+                # 创建死亡粒子效果
+                death_particles = []
+                colors = [
+                    "#FF1493", "#FF69B4", "#FFB6C1",  # 梦幻糖果粉（甜美梦境）
+                    "#FFD700", "#FFC125", "#FFE4B5",  # 皇室尊贵金（奢华璀璨）
+                    "#00FFFF", "#40E0D0", "#7FFFD4",  # 海洋之心蓝（深邃神秘）
+                    "#9932CC", "#BA55D3", "#DDA0DD",  # 魔法星空紫（浪漫迷离）
+                    "#32CD32", "#98FB98", "#90EE90",  # 生命翡翠绿（自然灵动）
+                    "#FF4500", "#FF6347", "#FFA07A",  # 熔岩之光橙（热情似火）
+                    "#FF0033", "#FF3366", "#FF6699",  # 玫瑰之恋红（浪漫绽放）
+                    "#00FA9A", "#00FF7F", "#7CCD7C",  # 春之精灵绿（生机盎然）
+                    "#4169E1", "#1E90FF", "#87CEEB",  # 深海宝石蓝（深邃优雅）
+                    "#9400D3", "#8A2BE2", "#9370DB",  # 暮光魔法紫（神秘梦幻）
+                ]
                 
-                # 更新和绘制星星
-                new_stars = []
-                for star in stars:
-                    if star.move():
-                        star.draw(canvas)
-                        new_stars.append(star)
-                stars = new_stars
+                # 只为可见区域内的蛇段生成粒子，超长蛇也不会产生海量粒子
+                visible_segments = snake.segments_in_view(*viewport.cell_bounds(cell_size))
+                for board_pos, _order in visible_segments:
+                    segment = viewport.to_screen(board_pos)
+                    for _ in range(12):  # 每个蛇段生成12个粒子
+                        angle = fx_rng.uniform(0, 2 * math.pi)
+                        speed = fx_rng.uniform(3, 6)
+                        color = fx_rng.choice(colors)
+                        death_particles.append({
+                            'x': segment[0] + half_cell,
+                            'y': segment[1] + half_cell,
+                            'angle': angle,
+                            'speed': speed,
+                            'color': color,
+                            'size': fx_rng.uniform(3, 6),
+                            'alpha': 1.0,
+                            'type': fx_rng.choice(['circle', 'star', 'spark'])
+                        })
                 
-                # 只有在所有星星消失后才开始粒子特效
-                if not stars:
-                    # 创建死亡粒子效果
-                    death_particles = []
-                    colors = [
-                        "#FF1493", "#FF69B4", "#FFB6C1",  # 梦幻糖果粉（甜美梦境）
-                        "#FFD700", "#FFC125", "#FFE4B5",  # 皇室尊贵金（奢华璀璨）
-                        "#00FFFF", "#40E0D0", "#7FFFD4",  # 海洋之心蓝（深邃神秘）
-                        "#9932CC", "#BA55D3", "#DDA0DD",  # 魔法星空紫（浪漫迷离）
-                        "#32CD32", "#98FB98", "#90EE90",  # 生命翡翠绿（自然灵动）
-                        "#FF4500", "#FF6347", "#FFA07A",  # 熔岩之光橙（热情似火）
-                        "#FF0033", "#FF3366", "#FF6699",  # 玫瑰之恋红（浪漫绽放）
-                        "#00FA9A", "#00FF7F", "#7CCD7C",  # 春之精灵绿（生机盎然）
-                        "#4169E1", "#1E90FF", "#87CEEB",  # 深海宝石蓝（深邃优雅）
-                        "#9400D3", "#8A2BE2", "#9370DB",  # 暮光魔法紫（神秘梦幻）
-                    ]
-                    
-                    for segment in snake:
-                        for _ in range(12):  # 每个蛇段生成12个粒子
-                            angle = random.uniform(0, 2 * math.pi)
-                            speed = random.uniform(3, 6)
-                            color = random.choice(colors)
-                            death_particles.append({
-                                'x': segment[0] + 10,
-                                'y': segment[1] + 10,
-                                'angle': angle,
-                                'speed': speed,
-                                'color': color,
-                                'size': random.uniform(3, 6),
-                                'alpha': 1.0,
-                                'type': random.choice(['circle', 'star', 'spark'])
-                            })
+                def update_death_particles():
+                    nonlocal death_particles
+                    runner = getattr(MainGame, '_RUN_SELF', None)
+                    canvas.delete("all")  # 清除所有元素
+                    layers.ensure_background(bg_image)
                     
-                    def update_death_particles():
-                        nonlocal death_particles
-                        runner = getattr(MainGame, '_RUN_SELF', None)
-                        canvas.delete("all")  # 清除所有元素
-                        canvas.create_image(0, 0, anchor=tk.NW, image=bg_image)
-                        
-                        # 重新绘制蛇
+                    # 重新绘制蛇；位图后端等粒子全部排入后与蛇一起合成
+                    if compositor is None:
                         draw_snake()
-                        
-                        # 显示长度和分数
-                        def create_glowing_text(x, y, text, main_color="#FFD700", glow_color="#FFA500"):
-                            # 外发光效果
-                            for offset in range(1, 3):
-                                canvas.create_text(
-                                    x, y,
-                                    text=text,
-                                    fill=glow_color,
-                                    font=("Impact", 16),
-                                    activefill="#FFFFFF"
-                                )
-                            # 主文本
+                    else:
+                        compositor.clear_splats()
+                        splat = compositor.splat
+                    
+                    # 显示长度和分数
+                    def create_glowing_text(x, y, text, main_color="#FFD700", glow_color="#FFA500"):
+                        # 外发光效果
+                        for offset in range(1, 3):
                             canvas.create_text(
                                 x, y,
                                 text=text,
-                                fill=main_color,
-                                font=("Impact", 16)
+                                fill=glow_color,
+                                font=("Impact", 16),
+                                activefill="#FFFFFF"
                             )
-                            
-                        create_glowing_text(50, 20, f"Length: {len(snake)}")
-                        create_glowing_text(180, 20, f"Score: {current_score}")
+                        # 主文本
+                        canvas.create_text(
+                            x, y,
+                            text=text,
+                            fill=main_color,
+                            font=("Impact", 16)
+                        )
+                        
+                    create_glowing_text(50, 20, f"Length: {len(snake)}")
+                    create_glowing_text(180, 20, f"Score: {current_score}")
+                    
+                    new_particles = []
+                    for p in death_particles:
+                        p['x'] += math.cos(p['angle']) * p['speed']
+                        p['y'] += math.sin(p['angle']) * p['speed']
+                        p['speed'] *= 0.94
+                        p['size'] *= 0.96
+                        p['alpha'] -= 0.015
                         
-                        new_particles = []
-                        for p in death_particles:
-                            p['x'] += math.cos(p['angle']) * p['speed']
-                            p['y'] += math.sin(p['angle']) * p['speed']
-                            p['speed'] *= 0.94
-                            p['size'] *= 0.96
-                            p['alpha'] -= 0.015
+                        if p['size'] > 0.5:
+                            new_particles.append(p)
                             
-                            if p['size'] > 0.5:
-                                new_particles.append(p)
-                                
+                            if compositor is not None:
+                                # 位图后端：光晕为半透明大圆，星星近似为圆点，火花为沿运动方向的三个小圆点
                                 if p['type'] == 'circle':
-                                    # 发光效果
-                                    glow_size = p['size'] * 1.8
-                                    # 绘制光晕：使用填充并取消 outline，以避免出现可见黑色边环
-                                    if runner is not None and hasattr(runner, 'draw_particle_oval'):
-                                        runner.draw_particle_oval(canvas, p['x'] - glow_size, p['y'] - glow_size, p['x'] + glow_size, p['y'] + glow_size, fill=p['color'], stipple='gray50', width=0)
-                                    else:
-                                        canvas.create_oval(
-                                            p['x'] - glow_size, p['y'] - glow_size,
-                                            p['x'] + glow_size, p['y'] + glow_size,
-                                            fill=p['color'],
-                                            outline="",
-                                            width=0,
-                                            stipple='gray50'
-                                        )
-                                    
-                                    # 主粒子
-                                    if runner is not None and hasattr(runner, 'draw_particle_oval'):
-                                        runner.draw_particle_oval(canvas, p['x'] - p['size'], p['y'] - p['size'], p['x'] + p['size'], p['y'] + p['size'], fill=p['color'], width=0)
-                                    else:
-                                        canvas.create_oval(
-                                            p['x'] - p['size'], p['y'] - p['size'],
-                                            p['x'] + p['size'], p['y'] + p['size'],
-                                            fill=p['color'],
-                                            outline=""
-                                        )
-                                
+                                    splat(p['x'], p['y'], p['size'] * 1.8, p['color'], 0.5)
+                                    splat(p['x'], p['y'], p['size'], p['color'])
                                 elif p['type'] == 'star':
-                                    points = []
-                                    for i in range(5):
-                                        angle = math.radians(i * 72)
-                                        points.extend([
-                                            p['x'] + math.cos(angle) * p['size'],
-                                            p['y'] + math.sin(angle) * p['size']
-                                        ])
-                                    if runner is not None and hasattr(runner, 'draw_particle_polygon'):
-                                        runner.draw_particle_polygon(canvas, points, fill=p['color'], outline="")
-                                    else:
-                                        canvas.create_polygon(
-                                            points,
-                                            fill=p['color'],
-                                            outline=""
-                                        )
+                                    splat(p['x'], p['y'], p['size'] * 0.8, p['color'])
+                                else:
+                                    step_x = math.cos(p['angle']) * p['size']
+                                    step_y = math.sin(p['angle']) * p['size']
+                                    for k in range(3):
+                                        splat(p['x'] + step_x * k, p['y'] + step_y * k, 1, p['color'])
+                            elif p['type'] == 'circle':
+                                # 发光效果
+                                glow_size = p['size'] * 1.8
+                                # 绘制光晕：使用填充并取消 outline，以避免出现可见黑色边环
+                                if runner is not None and hasattr(runner, 'draw_particle_oval'):
+                                    runner.draw_particle_oval(canvas, p['x'] - glow_size, p['y'] - glow_size, p['x'] + glow_size, p['y'] + glow_size, fill=p['color'], stipple='gray50', width=0)
+                                else:
+                                    canvas.create_oval(
+                                        p['x'] - glow_size, p['y'] - glow_size,
+                                        p['x'] + glow_size, p['y'] + glow_size,
+                                        fill=p['color'],
+                                        outline="",
+                                        width=0,
+                                        stipple='gray50'
+                                    )
                                 
-                                else:  # spark
-                                    end_x = p['x'] + math.cos(p['angle']) * p['size'] * 2
-                                    end_y = p['y'] + math.sin(p['angle']) * p['size'] * 2
-                                    if runner is not None and hasattr(runner, 'draw_particle_line'):
-                                        runner.draw_particle_line(canvas, p['x'], p['y'], end_x, end_y, fill=p['color'], width=2)
-                                    else:
-                                        canvas.create_line(
-                                            p['x'], p['y'],
-                                            end_x, end_y,
-                                            fill=p['color'],
-                                            width=2
-                                        )
+                                # 主粒子
+                                if runner is not None and hasattr(runner, 'draw_particle_oval'):
+                                    runner.draw_particle_oval(canvas, p['x'] - p['size'], p['y'] - p['size'], p['x'] + p['size'], p['y'] + p['size'], fill=p['color'], width=0)
+                                else:
+                                    canvas.create_oval(
+                                        p['x'] - p['size'], p['y'] - p['size'],
+                                        p['x'] + p['size'], p['y'] + p['size'],
+                                        fill=p['color'],
+                                        outline=""
+                                    )
+                            
+                            elif p['type'] == 'star':
+                                points = []
+                                for i in range(5):
+                                    angle = math.radians(i * 72)
+                                    points.extend([
+                                        p['x'] + math.cos(angle) * p['size'],
+                                        p['y'] + math.sin(angle) * p['size']
+                                    ])
+                                if runner is not None and hasattr(runner, 'draw_particle_polygon'):
+                                    runner.draw_particle_polygon(canvas, points, fill=p['color'], outline="")
+                                else:
+                                    canvas.create_polygon(
+                                        points,
+                                        fill=p['color'],
+                                        outline=""
+                                    )
+                            
+                            else:  # spark
+                                end_x = p['x'] + math.cos(p['angle']) * p['size'] * 2
+                                end_y = p['y'] + math.sin(p['angle']) * p['size'] * 2
+                                if runner is not None and hasattr(runner, 'draw_particle_line'):
+                                    runner.draw_particle_line(canvas, p['x'], p['y'], end_x, end_y, fill=p['color'], width=2)
+                                else:
+                                    canvas.create_line(
+                                        p['x'], p['y'],
+                                        end_x, end_y,
+                                        fill=p['color'],
+                                        width=2
+                                    )
+                    
+                    death_particles = new_particles
+                    if compositor is not None:
+                        present_frame()
+                        compositor.clear_splats()
+                    if death_particles:
+                        window.after(16, update_death_particles)
+                    else:
+                        # 清除画布，重绘背景和蛇
+                        canvas.delete("all")
+                        layers.ensure_background(bg_image)
+                        draw_snake()
                         
-                        death_particles = new_particles
-                        if death_particles:
-                            window.after(16, update_death_particles)
-                        else:
-                            # 清除画布，重绘背景和蛇
+                        # 显示游戏结束文本（不显示长度和分数）
+                        high_score = load_high_score()
+                        if current_score > high_score:
+                            save_high_score(current_score)
+                            # 清除画布上的所有元素
                             canvas.delete("all")
-                            canvas.create_image(0, 0, anchor=tk.NW, image=bg_image)
-                            draw_snake()
+                            layers.ensure_background(bg_image)
                             
-                            # 显示游戏结束文本（不显示长度和分数）
-                            high_score = load_high_score()
-                            if current_score > high_score:
-                                save_high_score(current_score)
-                                # 清除画布上的所有元素
-                                canvas.delete("all")
-                                canvas.create_image(0, 0, anchor=tk.NW, image=bg_image)
-                                
-                                def create_elegant_effect(frame=0, max_frames=180):
-                                    if frame < max_frames:
-                                        progress = frame / max_frames
-                                        
-                                        # 预计算常用值
-                                        center_x, center_y = 200, 60
+                            def create_elegant_effect(frame=0, max_frames=180):
+                                if frame < max_frames:
+                                    progress = frame / max_frames
+                                    
+                                    # 预计算常用值
+                                    center_x, center_y = 200, 60
+                                    
+                                    # 闪烁光晕效果 - 使用预计算的sin值
+                                    sin_val = math.sin(frame * 0.1)
+                                    glow_radius = 50 + sin_val * 5
+                                    glow_alpha = int(128 * (1 - progress))
+                                    glow_color = f"#{glow_alpha:02x}FFD7"
+                                    
+                                    # 批量创建图形
+                                    items = []
+                                    
+                                    # 光晕
+                                    items.append(('oval', (
+                                        center_x - glow_radius, center_y - glow_radius,
+                                        center_x + glow_radius, center_y + glow_radius,
+                                        glow_color, ""
+                                    )))
+                                    
+                                    # NEW RECORD 标题
+                                    if frame > 20:
+                                        fade_in = min(1.0, (frame - 20) / 30)
+                                        text_color = f"#{int(255*fade_in):02x}FFFF"
+                                        items.append(('text', (
+                                            center_x, center_y, "NEW RECORD",
+                                            text_color, "#FFD700", ("Helvetica", 32, "bold")
+                                        )))
+                                    
+                                    # 动态分割线
+                                    if frame > 40:
+                                        line_progress = min(1.0, (frame - 40) / 40)
+                                        half_width = 80 * line_progress  # 直接计算半宽度,避免重复计算
+                                        y_base = 85  # 基准y坐标
                                         
-                                        # 闪烁光晕效果 - 使用预计算的sin值
-                                        sin_val = math.sin(frame * 0.1)
-                                        glow_radius = 50 + sin_val * 5
-                                        glow_alpha = int(128 * (1 - progress))
-                                        glow_color = f"#{glow_alpha:02x}FFD7"
+                                        # 一次性计算x坐标
+                                        x1 = center_x - half_width
+                                        x2 = center_x + half_width
                                         
-                                        # 批量创建图形
-                                        items = []
+                                        items.extend([
+                                            ('line', (x1, y_base - 1, x2, y_base - 1, "#FFD700", 1)),
+                                            ('line', (x1, y_base + 1, x2, y_base + 1, "#FFD700", 1))
+                                        ])
+                                    
+                                    # 分数显示
+                                    if frame > 60:
+                                        # 预先计算常用值
+                                        score_scale = min(1.0, (frame - 60) / 20)
+                                        font_size = int(42 * score_scale)
+                                        score_text = f"{current_score:,}"
+                                        font = ("Arial Black", font_size, "bold")
+                                        y_pos = 120
                                         
-                                        # 光晕
-                                        items.append(('oval', (
-                                            center_x - glow_radius, center_y - glow_radius,
-                                            center_x + glow_radius, center_y + glow_radius,
-                                            glow_color, ""
-                                        )))
+                                        # 阴影偏移量预先定义
+                                        shadow_offsets = ((2,2), (1,1), (-1,-1), (-2,-2))
                                         
-                                        # NEW RECORD 标题
-                                        if frame > 20:
-                                            fade_in = min(1.0, (frame - 20) / 30)
-                                            text_color = f"#{int(255*fade_in):02x}FFFF"
-                                            items.append(('text', (
-                                                center_x, center_y, "NEW RECORD",
-                                                text_color, "#FFD700", ("Helvetica", 32, "bold")
-                                            )))
+                                        # 批量添加阴影文本
+                                        shadow_items = [('text', (
+                                            center_x + offset_x, y_pos + offset_y,
+                                            score_text, "#000000", None, font
+                                        )) for offset_x, offset_y in shadow_offsets]
+                                        items.extend(shadow_items)
                                         
-                                        # 动态分割线
-                                        if frame > 40:
-                                            line_progress = min(1.0, (frame - 40) / 40)
-                                            half_width = 80 * line_progress  # 直接计算半宽度,避免重复计算
-                                            y_base = 85  # 基准y坐标
-                                            
-                                            # 一次性计算x坐标
-                                            x1 = center_x - half_width
-                                            x2 = center_x + half_width
-                                            
-                                            items.extend([
-                                                ('line', (x1, y_base - 1, x2, y_base - 1, "#FFD700", 1)),
-                                                ('line', (x1, y_base + 1, x2, y_base + 1, "#FFD700", 1))
-                                            ])
+                                        # 添加主体文本
+                                        text_items = [
+                                            ('text', (center_x, y_pos, score_text, color, None, font))
+                                            for color in ("#FFFFFF", "#FFD700")
+                                        ]
+                                        items.extend(text_items)
                                         
-                                        # 分数显示
-                                        if frame > 60:
-                                            # 预先计算常用值
-                                            score_scale = min(1.0, (frame - 60) / 20)
-                                            font_size = int(42 * score_scale)
-                                            score_text = f"{current_score:,}"
-                                            font = ("Arial Black", font_size, "bold")
-                                            y_pos = 120
-                                            
-                                            # 阴影偏移量预先定义
-                                            shadow_offsets = ((2,2), (1,1), (-1,-1), (-2,-2))
-                                            
-                                            # 批量添加阴影文本
-                                            shadow_items = [('text', (
-                                                center_x + offset_x, y_pos + offset_y,
-                                                score_text, "#000000", None, font
-                                            )) for offset_x, offset_y in shadow_offsets]
-                                            items.extend(shadow_items)
+                                        # 每4帧添加一次粒子
+                                        if frame % 4 == 0:
+                                            # 预定义x轴范围
+                                            x_ranges = [(120,160), (240,280)]
+                                            particle_x = fx_rng.randint(*fx_rng.choice(x_ranges))
+                                            particle_y = y_pos + fx_rng.randint(-20, 20)
+                                            particle_size = fx_rng.randint(2, 4)
                                             
-                                            # 添加主体文本
-                                            text_items = [
-                                                ('text', (center_x, y_pos, score_text, color, None, font))
-                                                for color in ("#FFFFFF", "#FFD700")
-                                            ]
-                                            items.extend(text_items)
-                                            
-                                            # 每4帧添加一次粒子
-                                            if frame % 4 == 0:
-                                                # 预定义x轴范围
-                                                x_ranges = [(120,160), (240,280)]
-                                                particle_x = random.randint(*random.choice(x_ranges))
-                                                particle_y = y_pos + random.randint(-20, 20)
-                                                particle_size = random.randint(2, 4)
-                                                
-                                                # 计算粒子坐标
-                                                p_coords = (
-                                                    particle_x - particle_size,
-                                                    particle_y - particle_size,
-                                                    particle_x + particle_size,
-                                                    particle_y + particle_size
-                                                )
-                                                items.append(('oval', (*p_coords, "#FFFACD", "")))
-                                        
-                                        # 批量绘制所有图形
-                                        for item_type, args in items:
-                                            if item_type == 'oval':
-                                                x1,y1,x2,y2,fill,outline = args
-                                                canvas.create_oval(x1,y1,x2,y2,fill=fill,outline=outline)
-                                            elif item_type == 'text':
-                                                x,y,text,fill,activefill,font = args
-                                                canvas.create_text(x,y,text=text,fill=fill,activefill=activefill,font=font)
-                                            elif item_type == 'line':
-                                                x1,y1,x2,y2,fill,width = args
-                                                canvas.create_line(x1,y1,x2,y2,fill=fill,width=width,capstyle=tk.ROUND)
-                                        
-                                        window.after(20, lambda: create_elegant_effect(frame + 1))
-                                
-                                # 启动优雅特效
-                                create_elegant_effect()
-                                def show_celebration(count=0):
-                                    if count >= 3:  # 只循环三次
-                                        return
-                                    
-                                    firework = CelebrationFirework(canvas, 200, 150)
-                                    def animate_firework():
-                                        if firework.update_and_draw():
-                                            window.after(16, animate_firework)
-                                    animate_firework()
+                                            # 计算粒子坐标
+                                            p_coords = (
+                                                particle_x - particle_size,
+                                                particle_y - particle_size,
+                                                particle_x + particle_size,
+                                                particle_y + particle_size
+                                            )
+                                            items.append(('oval', (*p_coords, "#FFFACD", "")))
                                     
-                                    # 播放烟花音效
-                                    try:
-                                        firework_sound = pygame.mixer.Sound(os.path.join(current_dir, "assets", "music", "firework.wav"))
-                                        firework_sound.play()
-                                    except Exception as e:
-                                        print(f"Sound play failed: {e}")
+                                    # 批量绘制所有图形
+                                    for item_type, args in items:
+                                        if item_type == 'oval':
+                                            x1,y1,x2,y2,fill,outline = args
+                                            canvas.create_oval(x1,y1,x2,y2,fill=fill,outline=outline)
+                                        elif item_type == 'text':
+                                            x,y,text,fill,activefill,font = args
+                                            canvas.create_text(x,y,text=text,fill=fill,activefill=activefill,font=font)
+                                        elif item_type == 'line':
+                                            x1,y1,x2,y2,fill,width = args
+                                            canvas.create_line(x1,y1,x2,y2,fill=fill,width=width,capstyle=tk.ROUND)
                                     
-                                    # 第一次和第二次间隔1.8s,第二次和第三次间隔3s
-                                    if count == 0:
-                                        window.after(1800, lambda: show_celebration(count + 1))
-                                    elif count == 1:
-                                        window.after(3100, lambda: show_celebration(count + 1))
-                                
-                                # 开始第一次烟花
-                                show_celebration()
-                            def blink_game_over_text():
-                                # 使用正弦函数创造梦幻效果
-                                t = time.time()
-                                # 第一行文字波动范围 0.87-1.0
-                                wave1 = math.sin(t * 3.0) * 0.065 + 0.935  # (0.87 到 1.0)
-                                # 第二行文字波动范围 0.95-1.0
-                                wave2 = math.sin(t * 3.0) * 0.025 + 0.975  # (0.95 到 1.0)
-                                
-                                # 删除旧文字
-                                canvas.delete("game_over_text")
-                                
-                                # 第一行文字使用原始粉色,但保持高亮度
-                                base_r, base_g, base_b = 255, 64, 129  # #FF4081的RGB值
-                                r = max(0, min(255, int(base_r * wave1)))
-                                g = max(0, min(255, int(base_g * wave1)))
-                                b = max(0, min(255, int(base_b * wave1)))
-                                
-                                color = f"#{r:02x}{g:02x}{b:02x}"
-                                
-                                canvas.create_text(
-                                    200, 200,
-                                    text="Yanami Anna かわい!",
-                                    fill=color,
-                                    font=("Impact", 24),
-                                    tags="game_over_text"
-                                )
+                                    window.after(20, lambda: create_elegant_effect(frame + 1))
+                            
+                            # 启动优雅特效
+                            create_elegant_effect()
+                            def show_celebration(count=0):
+                                if count >= 3:  # 只循环三次
+                                    return
                                 
-                                # 第二行文字使用明亮的白色
-                                white_value = int(255 * wave2)
-                                restart_color = f"#{white_value:02x}{white_value:02x}{white_value:02x}"
+                                firework = CelebrationFirework(canvas, 200, 150)
+                                def animate_firework():
+                                    if firework.update_and_draw():
+                                        window.after(16, animate_firework)
+                                animate_firework()
                                 
-                                canvas.create_text(
-                                    200, 250,
-                                    text="Press R to restart",
-                                    fill=restart_color,
-                                    font=("Impact", 18),
-                                    tags="game_over_text"
-                                )
+                                # 播放烟花音效
+                                try:
+                                    firework_sound = pygame.mixer.Sound(os.path.join(current_dir, "assets", "music", "firework.wav"))
+                                    firework_sound.play()
+                                except Exception as e:
+                                    print(f"Sound play failed: {e}")
                                 
-                                # 降低刷新率到10fps以进一步减少资源占用
-                                window.after(100, blink_game_over_text)  # 约10fps
-                            window.unbind("<Left>")
-                            window.unbind("<Right>")
-                            window.unbind("<Up>")
-                            window.unbind("<Down>")
-                            window.bind("<Left>", lambda e: move_window("Left"))
-                            window.bind("<Right>", lambda e: move_window("Right")) 
-                            window.bind("<Up>", lambda e: move_window("Up"))
-                            window.bind("<Down>", lambda e: move_window("Down"))
-                            # 开始闪烁动画
-                            blink_game_over_text()
-                    
-                    update_death_particles()
-                else:
-                    # 在星星动画过程中显示长度和分数
-                    canvas.create_text(
-                        50, 20,
-                        text=f"Length: {len(snake)}",
-                        fill="#FFD700",
-                        font=("Impact", 16)
-                    )
-                    canvas.create_text(
-                        180, 20,
-                        text=f"Score: {current_score}",
-                        fill="#FFD700",
-                        font=("Impact", 16)
-                    )
-                    window.after(20, animate_death)
-            
-            animate_death()
-            return
-
-        snake.append(new_head)
+                                # 第一次和第二次间隔1.8s,第二次和第三次间隔3s
+                                if count == 0:
+                                    window.after(1800, lambda: show_celebration(count + 1))
+                                elif count == 1:
+                                    window.after(3100, lambda: show_celebration(count + 1))
+                            
+                            # 开始第一次烟花
+                            show_celebration()
+                        def blink_game_over_text():
+                            # 使用正弦函数创造梦幻效果
+                            # 第一行文字亮度波动范围 0.87-1.0，第二行 0.95-1.0（两张颜色表共用一个下标）
+                            wave = pulse_level(time.time(), 3.0)
+                            
+                            # 删除旧文字
+                            canvas.delete("game_over_text")
+                            
+                            # 第一行文字使用原始粉色（#FF4081）,但保持高亮度
+                            color = GAME_OVER_PINK[wave]
+                            
+                            canvas.create_text(
+                                200, 200,
+                                text="Yanami Anna かわい!",
+                                fill=color,
+                                font=("Impact", 24),
+                                tags="game_over_text"
+                            )
+                            
+                            # 第二行文字使用明亮的白色
+                            restart_color = GAME_OVER_WHITE[wave]
+                            
+                            canvas.create_text(
+                                200, 250,
+                                text="Press R to restart",
+                                fill=restart_color,
+                                font=("Impact", 18),
+                                tags="game_over_text"
+                            )
+                            
+                            # 降低刷新率到10fps以进一步减少资源占用
+                            window.after(100, blink_game_over_text)  # 约10fps
+                        window.unbind("<Left>")
+                        window.unbind("<Right>")
+                        window.unbind("<Up>")
+                        window.unbind("<Down>")
+                        window.bind("<Left>", lambda e: move_window("Left"))
+                        window.bind("<Right>", lambda e: move_window("Right")) 
+                        window.bind("<Up>", lambda e: move_window("Up"))
+                        window.bind("<Down>", lambda e: move_window("Down"))
+                        # 开始闪烁动画
+                        blink_game_over_text()
+                
+                update_death_particles()
+            else:
+                # 在星星动画过程中显示长度和分数
+                canvas.create_text(
+                    50, 20,
+                    text=f"Length: {len(snake)}",
+                    fill="#FFD700",
+                    font=("Impact", 16)
+                )
+                canvas.create_text(
+                    180, 20,
+                    text=f"Score: {current_score}",
+                    fill="#FFD700",
+                    font=("Impact", 16)
+                )
+                window.after(20, animate_death)
         
-        # 检查是否吃到食物
-        if food and new_head == food.position:
-            # 播放吃食物音效
-            sound_manager.play('eat')
-            nonlocal color_chose
-            # 创建食物效果
-            create_food_effect(food.position[0], food.position[1], food.food_type)
-            
-            score_increase = food.properties[food.food_type]['score']
-            current_score += score_increase
-            
-            effect = food.properties[food.food_type]['effect']
-            if effect == 'speed_up':
-                snake_speed = max(70, snake_speed - 10)
-                print("speed up")
-                print(snake_speed)
-                #show_effect_message('speed_up')
-            elif effect == 'slow_down':
-                snake_speed = min(120, snake_speed + 10)
-                #show_effect_message('slow_down')
-            elif effect == 'rainbow':
-                snake_speed = max(70, snake_speed - 5)
-                nr = color_chose
-                color_chose = random.randint(0, 5)  # 随机切换颜色方案
-                #print("COLORRRRRRRR")
-                while nr == color_chose:
-                    color_chose = random.randint(0, 5)  # 随机切换颜色方案
-            elif effect == 'star_candy':
-                try:
-                    snake_speed = max(70, snake_speed - 2)
-                    nonlocal background_images, selected_bg, bg_image_path, bg_image, image, canvas
-                    
-                    # 保存当前背景以避免重复选择
-                    current_bg = selected_bg
-                    available_bgs = [bg for bg in background_images if bg != current_bg]
-                    
-                    # 从剩余背景中随机选择
-                    selected_bg = random.choice(available_bgs)
-                    bg_image_path = os.path.join(current_dir, "assets", "images", selected_bg)
-                    
-                    # 使用 with 语句确保文件正确关闭
-                    with Image.open(bg_image_path) as img:
-                        # 使用 LANCZOS 重采样进行高质量缩放
-                        image = img.resize((400, 400), Image.LANCZOS)
-                        bg_image = ImageTk.PhotoImage(image)
-                    
-                    # 清除画布并设置新背景
-                    canvas.delete("all")
-                    canvas.create_image(0, 0, anchor=tk.NW, image=bg_image)
-                    
-                    # 保持对背景图片的引用以防止垃圾回收
-                    canvas.bg_image = bg_image
-                    
-                    # 播放背景切换音效（如果有）
-                    try:
-                        sound_manager.play('background_change')
-                    except Exception as e:
-                        print(f"Sound play failed: {e}")
+        animate_death()
 
-                        
-                except Exception as e:
-                    print(f"背景切换失败: {str(e)}")
-                    # 如果切换失败，保持原有背景
-                    canvas.create_image(0, 0, anchor=tk.NW, image=canvas.bg_image)
-            generate_food()
-        else:
-            snake.pop(0)
-            
-        # 重绘所有内容
-        canvas.delete("all")
-        canvas.create_image(0, 0, anchor=tk.NW, image=bg_image)
-        draw_snake()
+
+    def draw_layers():
+        """按图层重画：背景项常驻，食物、蛇、分数各自只在状态变化时更新，最后把图层归位"""
+        layers.ensure_background(bg_image)
         draw_food()
+        draw_snake()
         draw_score()
-        
-        # 更新粒子效果
+        layers.restack()
+
+    def render_frame():
+        """重绘一帧，并把关键局部状态写回 runner"""
+        # 可见窗口跟随蛇头，只重画状态有变化的图层
+        viewport.follow(snake.head)
+        # 先更新粒子效果（特效层）：位图后端要在合成前排入粒子
         update_particles()
+        draw_layers()
         
         # 在每次移动后把关键局部状态写回 runner（如果存在），保持桥接同步
         _runner = getattr(MainGame, '_RUN_SELF', None)
         if _runner is not None:
-            try:
-                # 列出常用的可变运行时状态并写回到实例
-                for _name in ('snake', 'snake_direction', 'current_score', 'snake_speed', 'selected_bg', 'color_chose', 'food', 'game_running', 'game_paused', 'particles', 'ripple_particles', 'milestone_particles'):
-                    try:
-                        if _name in locals():
-                            setattr(_runner, _name, locals()[_name])
-                    except Exception:
-                        pass
-            except Exception:
-                pass
-
-        # 使用 snake_speed 作为主定时器（单位毫秒），保证速度与原逻辑一致
-        if game_running:
-            delay = max(1, int(snake_speed))
-            window.after(delay, move_snake)
+            _runner.snake = snake
+            _runner.snake_direction = snake_direction
+            _runner.current_score = current_score
+            _runner.snake_speed = snake_speed
+            _runner.selected_bg = selected_bg
+            _runner.color_chose = color_chose
+            _runner.food = food
+            _runner.game_running = game_running
+            _runner.game_paused = game_paused
+            _runner.particles = particles
+            _runner.ripple_particles = ripple_particles
+            _runner.milestone_particles = milestone_particles
 
     
     def change_direction(new_direction):
-        global last_direction_change_time
-        current_time = time.time()
-        print(current_time - last_direction_change_time)
-        # 检查时间间隔
-        if current_time - last_direction_change_time < direction_change_interval:
-            nonlocal snake
-                # 获取蛇头位置和方向    
-            head_x, head_y = snake[-1]
-            if new_direction == "Up":
-                new_head_ = (head_x, head_y - 20)
-            elif new_direction == "Down":
-                new_head_ = (head_x, head_y + 20)
-            elif new_direction == "Left":
-                new_head_ = (head_x - 20, head_y)
-            elif new_direction == "Right":
-                new_head_ = (head_x + 20, head_y)
-                
-            # 处理穿墙逻辑
-            global Game_Mode
-            if Game_Mode == "Pass":  # 可以穿墙
-                # 如果超出边界,从对面出现
-                new_head_ = (
-                    new_head_[0] % 400,  # x坐标取余
-                    new_head_[1] % 400   # y坐标取余
-                )
-            if new_head_ in snake:
-                return
-        nonlocal snake_direction
-        if new_direction == snake_direction:
-            return
-        if new_direction == "Up" and snake_direction != "Down":
-            snake_direction = "Up"
-            last_direction_change_time = current_time
-        elif new_direction == "Down" and snake_direction != "Up":
-            snake_direction = "Down"
-            last_direction_change_time = current_time
-        elif new_direction == "Left" and snake_direction != "Right":
-            snake_direction = "Left"
-            last_direction_change_time = current_time
-        elif new_direction == "Right" and snake_direction != "Left":
-            snake_direction = "Right"
-            last_direction_change_time = current_time
+        """键盘与鼠标共用的转向入口：只缓存到输入队列，由下一个时间步消费"""
+        if replay_cursor is not None:
+            return  # 播放回放时不接受输入
+        input_queue.push(new_direction, snake_direction)
+
+    def steer_autopilot():
+        """自动驾驶：在占用位图上寻路选出本步方向，和按键一样经 change_direction 进入输入队列"""
+        code = autopilot.decide(game_state)
+        input_queue.clear()  # 自动驾驶期间忽略按键缓存
+        change_direction(code)
+
+    def toggle_autopilot(event=None):
+        """开关自动驾驶（F6）；算法取 --autopilot 指定的，默认 A*。
+
+        hamilton 只能接手沿回路排列的蛇身（开局时），对局中途或读档后开启时改用 A*。
+        """
+        nonlocal autopilot
+        if autopilot is None:
+            autopilot = create_pilot(cols, rows, Game_Mode, AUTOPILOT or "astar")
+            if autopilot.algorithm == "hamilton" and not autopilot.can_follow(game_state):
+                print("蛇身不在哈密顿回路上，改用 A*")
+                autopilot = create_pilot(cols, rows, Game_Mode, "astar")
+            print(f"自动驾驶已开启（{autopilot.algorithm}）")
+        else:
+            autopilot = None
+            print("自动驾驶已关闭")
+    
+    def toggle_render_backend(event=None):
+        """切换绘制后端（F7）：画布项 / 单张位图合成"""
+        nonlocal compositor
+        if compositor is None:
+            compositor = FrameCompositor(CANVAS_WIDTH, CANVAS_HEIGHT, cell_size, SNAKE_SPRITES or "flat")
+            # 蛇与粒子改由位图合成，删掉它们的画布项
+            canvas.delete(SnakeRenderer.TAG, "fx")
+            for particle in particles:
+                particle.id = None
+                particle.trail = []
+            print("绘制后端：位图合成")
+        else:
+            # 蛇身画布项已被删除，下一次 sync 时整体重建
+            compositor = None
+            layers.set_background(bg_image)
+            print("绘制后端：画布项")
+        draw_layers()
     
     def draw_score():
+        """分数图层：长度或分数变化时重建文字，金色渐变只改主文字的颜色"""
         snake_length = len(snake)
         
-        # 使用时间创建微妙的颜色渐变
-        t = time.time()
-        # 预计算一些常用值
-        sin_value = math.sin(t * 2)
-        color_value = int(243 + 12 * sin_value)  # 减小渐变范围到235-255
-        color_value_80 = int(color_value * 0.8)
-        dynamic_gold = f"#{color_value:02x}{color_value_80:02x}00"
+        # 使用时间创建微妙的颜色渐变（预计算的金色颜色表）
+        dynamic_gold = HUD_GOLD[pulse_level(time.time(), 2)]
         
         # 复用文本内容
         length_text = f"Length: {snake_length}"
@@ -5851,43 +5867,37 @@ def _start_main_game_impl():
         FONT = ("Impact", 16)
         BLACK = "black"
         
-        # 显示Length和Score,添加柔和阴影
-        for text, x in ((length_text, 50), (score_text, 180)):
-            # 阴影
-            canvas.create_text(
-                x+1, 21,
-                text=text,
-                fill=BLACK,
-                font=FONT,
-                state="disabled"
-            )
-            # 主文本
-            canvas.create_text(
-                x, 20,
-                text=text,
-                fill=dynamic_gold,
-                font=FONT
-            )
+        if layers.changed("hud", (length_text, score_text)):
+            layers.clear("hud")
+            # 显示Length和Score,添加柔和阴影
+            for text, x in ((length_text, 50), (score_text, 180)):
+                # 阴影
+                canvas.create_text(
+                    x+1, 21,
+                    text=text,
+                    fill=BLACK,
+                    font=FONT,
+                    state="disabled",
+                    tags="hud"
+                )
+                # 主文本
+                canvas.create_text(
+                    x, 20,
+                    text=text,
+                    fill=dynamic_gold,
+                    font=FONT,
+                    tags=("hud", "hud_text")
+                )
+            layers.changed("hud_color", dynamic_gold)
+        elif layers.changed("hud_color", dynamic_gold):
+            canvas.itemconfigure("hud_text", fill=dynamic_gold)
         
         # 如果戏暂停，显示停文本
         if game_paused:
             def blink_text():
                 if game_paused:  # 只在暂停状态下继续闪烁
-                    # 使用正弦函数创造梦幻效果
-                    t = time.time() 
-                    wave = math.sin(t * 3.0) * 0.5 + 0.5  # 0.0 到 1.0
-                    
-                    # 扩大红色范围的变化
-                    r = int(200 + wave * 55)  # 200-255
-                    g = int(20 + wave * 70)   # 20-90
-                    b = int(80 + wave * 70)   # 80-150
-                    
-                    # 确保颜色值在有效范围内
-                    r = min(255, max(0, r))
-                    g = min(255, max(0, g))
-                    b = min(255, max(0, b))
-                    
-                    color = f"#{r:02x}{g:02x}{b:02x}"
+                    # 使用正弦函数创造梦幻效果：红色分量 200-255，绿 20-90，蓝 80-150
+                    color = PAUSE_BLINK[pulse_level(time.time(), 3.0)]
                     
                     # 删除旧文字
                     canvas.delete("pause_text")
@@ -5908,63 +5918,56 @@ def _start_main_game_impl():
             blink_text()
     def handle_click(event):
         """处理鼠标点击改变方向"""
-        nonlocal snake_direction
-        
         if game_paused:
             return
             
-        head_x, head_y = snake[-1]  # 修正:使用snake[-1]获取蛇头
-        # 每个蛇身块是20x20,所以中心点要加10
-        head_center_x = head_x + 10  # 20/2 = 10
-        head_center_y = head_y + 10  # 20/2 = 10
+        # 点击位置是画布坐标，需先把蛇头换算到可见窗口中
+        head_x, head_y = viewport.to_screen(snake.head)
+        head_center_x = head_x + half_cell
+        head_center_y = head_y + half_cell
         
         # 计算鼠标点击位置相对于蛇头中心点的位置
         dx = event.x - head_center_x
         dy = event.y - head_center_y
         
-        # 根据当前方向判断蛇头两侧
-        if snake_direction in ["Left", "Right"]:
+        # 根据缓存转向全部生效后的方向判断蛇头两侧
+        heading = input_queue.heading(snake_direction)
+        if heading >= LEFT:
             # 当前水平移动时,只考虑上下
             # 使用相对于蛇头中心的位置判断
-            new_direction = "Up" if dy < 0 else "Down"
+            new_direction = UP if dy < 0 else DOWN
         else:
             # 当前垂直移动时,只考虑左右
             # 使用相对于蛇头中心的位置判断
-            new_direction = "Left" if dx < 0 else "Right"
-        
-        # 防止反向移动
-        opposite_directions = {
-            "Left": "Right",
-            "Right": "Left", 
-            "Up": "Down",
-            "Down": "Up"
-        }
+            new_direction = LEFT if dx < 0 else RIGHT
         
-        if new_direction != opposite_directions.get(snake_direction):
-            snake_direction = new_direction
+        # 与键盘输入进入同一队列，反向过滤由队列负责
+        change_direction(new_direction)
             
     window.bind('<Button-1>', handle_click)
     window.bind('<Button-2>', handle_click)
     window.bind('<Button-3>', handle_click)
 
     # 添加新的按键绑定
-    window.bind("<Up>", lambda event: change_direction("Up"))
-    window.bind("<w>", lambda event: change_direction("Up"))
-    window.bind("<W>", lambda event: change_direction("Up"))
-    window.bind("<Down>", lambda event: change_direction("Down"))
-    window.bind("<s>", lambda event: change_direction("Down"))
-    window.bind("<S>", lambda event: change_direction("Down"))
-    window.bind("<Left>", lambda event: change_direction("Left"))
-    window.bind("<a>", lambda event: change_direction("Left"))
-    window.bind("<A>", lambda event: change_direction("Left"))
-    window.bind("<Right>", lambda event: change_direction("Right"))
-    window.bind("<d>", lambda event: change_direction("Right"))
-    window.bind("<D>", lambda event: change_direction("Right"))
+    window.bind("<Up>", lambda event: change_direction(UP))
+    window.bind("<w>", lambda event: change_direction(UP))
+    window.bind("<W>", lambda event: change_direction(UP))
+    window.bind("<Down>", lambda event: change_direction(DOWN))
+    window.bind("<s>", lambda event: change_direction(DOWN))
+    window.bind("<S>", lambda event: change_direction(DOWN))
+    window.bind("<Left>", lambda event: change_direction(LEFT))
+    window.bind("<a>", lambda event: change_direction(LEFT))
+    window.bind("<A>", lambda event: change_direction(LEFT))
+    window.bind("<Right>", lambda event: change_direction(RIGHT))
+    window.bind("<d>", lambda event: change_direction(RIGHT))
+    window.bind("<D>", lambda event: change_direction(RIGHT))
     window.bind("<p>", lambda event: toggle_pause())     # P 键暂停/继续
     window.bind("<P>", lambda event: toggle_pause())     # P 键暂停/继续
     window.bind("<space>", lambda event: toggle_pause()) # 空格键暂停/继续
     window.bind("<r>", lambda event: reset_game())       # R 键重新开始
     window.bind("<R>", lambda event: reset_game())       # R 键重新开始
+    window.bind("<F6>", toggle_autopilot)                # F6 自动驾驶开关
+    window.bind("<F7>", toggle_render_backend)           # F7 切换画布项 / 位图合成
     window.bind("<b>", lambda event: back_to_start())    # B 键返回主菜单
     window.bind("<B>", lambda event: back_to_start())    # B 键返回主菜单
     window.bind("<BackSpace>", lambda event: back_to_start())    # BackSpace 键返回主菜单
@@ -5973,8 +5976,106 @@ def _start_main_game_impl():
     canvas.bind("<Button-1>", create_ripple)
     canvas.bind("<Button-2>", create_ripple)
     canvas.bind("<Button-3>", create_ripple)
+    def capture_saved_game():
+        """在 Tk 线程上抓取当前对局的快照（只复制数组与随机数状态，打包写盘在后台完成）。
+
+        方向为蛇当前实际的移动方向；输入队列里尚未生效的转向不存档，读档后从该方向继续。
+        """
+        saved = saved_from_state(game_state, cell_size, fx_rng.getstate())
+        if food is not None:
+            saved = saved._replace(color_phase=food.color_phase)
+        return saved
+
+    def save_in_progress(event=None):
+        """保存进行中的对局；已结束的对局与正在播放的回放不保存"""
+        if not game_running or replay_cursor is not None:
+            return
+        saved = capture_saved_game()
+        future = SAVE_EXECUTOR.submit(save_game, get_save_path(), saved)
+        future.add_done_callback(
+            lambda f: f.exception() and print(f"保存存档失败: {f.exception()}"))
+
+    window.bind("<F5>", save_in_progress)                # F5 快速存档
+
+    def resume_saved_game():
+        """读取存档并恢复对局（存档读取后即删除）；成功返回 True"""
+        nonlocal snake, snake_direction, food, current_score, snake_speed, color_chose
+        nonlocal session_seed, game_state
+        global Game_Mode
+        path = get_save_path()
+        if not os.path.exists(path):
+            return False
+        try:
+            saved = load_game(path)
+        except (OSError, SaveError) as e:
+            print(f"读取存档失败: {e}")
+            return False
+        if (saved.cols, saved.rows, saved.cell_size) != (cols, rows, cell_size):
+            print(f"存档棋盘为 {saved.cols}x{saved.rows}（每格 {saved.cell_size} 像素），与当前棋盘不一致，忽略")
+            return False
+        try:
+            # 空闲格子按存档前的顺序排列，之后的食物位置与不中断的对局一致
+            restored = state_from_saved(saved)
+        except SaveError as e:
+            print(f"读取存档失败: {e}")
+            return False
+        os.remove(path)
+
+        Game_Mode = saved.mode
+        snake_direction = saved.direction
+        if saved.food >= 0:
+            food = Food((saved.food % cols * cell_size, saved.food // cols * cell_size), saved.food_type)
+            food.color_phase = saved.color_phase
+        else:
+            food = None
+        current_score = saved.score
+        snake_speed = saved.speed
+        color_chose = saved.color_chose
+        session_seed = saved.seed
+        rng.setstate(saved.rng_state)
+        fx_rng.setstate(saved.fx_rng_state)
+
+        set_background(saved.background)
+        # 模拟状态与界面共用同一个 rng
+        restored.rng = rng
+        game_state = restored
+        snake = SnakeBody(game_state, cell_size)
+        viewport.follow(snake.head)
+        print(f"已恢复存档：长度 {len(snake)}，分数 {current_score}")
+        return True
+
+    def begin_recording():
+        """开始记录本局的转向输入，对局结束后写入 last_run.replay"""
+        nonlocal replay_recorder, sim_ticks
+        sim_ticks = 0
+        replay_recorder = ReplayRecorder(session_seed, Game_Mode, cols, rows, color_chose,
+                                         background_images.index(selected_bg))
+
+    def begin_playback(replay):
+        """按回放头部设置模式、开局配色与背景，之后的转向全部取自回放"""
+        nonlocal replay_cursor, color_chose, sim_ticks
+        global Game_Mode
+        sim_ticks = 0
+        Game_Mode = replay.mode
+        color_chose = replay.color_chose
+        set_background(replay.background)
+        replay_cursor = InputCursor(replay.inputs, replay.count)
+
+    def finish_recording(died):
+        """结束记录并在后台线程写入回放"""
+        nonlocal replay_recorder
+        if replay_recorder is None:
+            return
+        recorded = replay_recorder.finish(sim_ticks, current_score, died)
+        replay_recorder = None
+        SAVE_EXECUTOR.submit(save_replay, get_replay_path(), recorded)
+
     def on_game_closing():
         """处理游戏窗口关闭事件"""
+        # 中途退出时保存对局，下次可用 --resume 继续；播放回放时既不存档也不覆盖回放文件
+        if replay_cursor is None:
+            save_in_progress()
+            finish_recording(False)
         try:
             # 停止游戏循环
             global game_running
@@ -6016,13 +6117,42 @@ def _start_main_game_impl():
     
     # 在游戏初始化分添加
     snake_speed = 100  # 初始速度
-    generate_food()    # 生成第一个食物
+    # 固定时间步时钟：按 snake_speed 毫秒推进模拟，与绘制耗时无关
+    game_clock = FixedTimestep(snake_speed)
+    loop_after_id = None
+    # 转向输入队列：按键先缓存，每个时间步消费一个
+    input_queue = InputQueue()
+    # 模拟层发出的事件，在每次唤醒的时间步结束后分发给表现层
+    game_events = EventBus()
+    game_events.subscribe(Ate, on_ate)
+    game_events.subscribe(Milestone, on_milestone)
+    game_events.subscribe(SpeedChanged, on_speed_changed)
+    game_events.subscribe(BackgroundChanged, on_background_changed)
+    game_events.subscribe(Died, on_died)
+    game_events.subscribe(Died, lambda event: finish_recording(True))
+    # 输入回放：sim_ticks 为本局成功移动的步数，录制与播放都以它为时间轴
+    sim_ticks = 0
+    replay_recorder = None
+    replay_cursor = None
+    autopilot = None
+    if PLAYBACK_REPLAY is not None:
+        begin_playback(PLAYBACK_REPLAY)
+        new_game_state()
+        generate_food()
+    elif RESUME_GAME and resume_saved_game():
+        pass  # 从存档恢复的对局没有完整的开局输入，不录制回放
+    else:
+        begin_recording()
+        new_game_state()
+        generate_food()    # 生成第一个食物
+    if AUTOPILOT is not None:
+        toggle_autopilot()  # 在恢复存档之后创建，使用存档中的模式
     draw_snake()      # 画蛇
     draw_food()       # 画食物
     draw_score()      # 显示分数
     
-    # 立即开始移动蛇
-    move_snake()      # 直接调用move_snake而不是使用after
+    # 开始主循环
+    start_game_loop()
 
     # 如果通过 MainGame.run 调用，则把局部可变状态写回 runner 实例，
     # 以便后续外部访问或持久化。
@@ -6048,7 +6178,59 @@ def _start_main_game_impl():
     window.mainloop()
 # 修改程序入口点
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Greedy Snake")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="固定随机种子：相同种子与相同操作会复现完全相同的对局")
+    parser.add_argument('--cols', type=int, default=None, help=f"棋盘列数（默认 {GRID_COLS}）")
+    parser.add_argument('--rows', type=int, default=None, help=f"棋盘行数（默认 {GRID_ROWS}）")
+    parser.add_argument('--cell-size', type=int, default=None, help=f"每格像素（默认 {CELL_SIZE}）")
+    parser.add_argument('--resume', action='store_true', help="继续上次中途退出（或 F5 存档）的对局")
+    parser.add_argument('--replay', metavar='PATH',
+                        help="按原速度播放输入回放（如数据目录下的 last_run.replay）")
+    parser.add_argument('--autopilot', choices=ALGORITHMS, default=None,
+                        help="开局即由自动驾驶寻路吃食物（游戏中按 F6 开关）；也是 --selfplay 使用的驾驶员")
+    parser.add_argument('--versus', action='store_true',
+                        help="同一键盘双人对战：WASD 对方向键（开始页面按 V 也可进入）")
+    parser.add_argument('--arena', type=int, nargs='?', const=arena.ARENA_SNAKES, metavar='SNAKES',
+                        default=None, help=f"机器人竞技场：SNAKES 条蛇（默认 {arena.ARENA_SNAKES}），"
+                        f"棋盘默认 {arena.ARENA_COLS}x{arena.ARENA_ROWS}，可拖动平移视野")
+    parser.add_argument('--sprites', choices=SPRITE_STYLES, default=None,
+                        help="蛇身改用 PIL 预渲染的贴图（flat 纯色、bevel 斜面、glow 柔光、rounded 圆角）")
+    parser.add_argument('--render', choices=("canvas", "bitmap"), default="canvas",
+                        help="绘制后端：canvas 每个图形一个画布项；bitmap 背景、蛇与粒子每帧合成一张位图（游戏中按 F7 切换）")
+    parser.add_argument('--selfplay', type=int, metavar='GAMES', default=None,
+                        help="不打开窗口，用多进程跑 GAMES 局自动驾驶对局并打印统计")
+    selfplay.add_arguments(parser)
+    args = parser.parse_args()
+    if args.selfplay:
+        selfplay.run(args.selfplay, args.autopilot or "astar", Game_Mode,
+                     args.cols or GRID_COLS, args.rows or GRID_ROWS,
+                     args.seed or 0, args.workers, args.chunk_size, args.max_ticks, args.csv)
+        sys.exit(0)
+    SESSION_SEED = args.seed
+    RESUME_GAME = args.resume
+    VERSUS_GAME = args.versus
+    ARENA_SNAKES = args.arena
+    AUTOPILOT = args.autopilot
+    SNAKE_SPRITES = args.sprites
+    RENDER_BACKEND = args.render
+    BOARD_COLS = args.cols or GRID_COLS
+    BOARD_ROWS = args.rows or GRID_ROWS
+    BOARD_CELL_SIZE = args.cell_size or CELL_SIZE
+    if args.replay:
+        # 回放决定种子与棋盘尺寸
+        PLAYBACK_REPLAY = load_replay(args.replay)
+        SESSION_SEED = PLAYBACK_REPLAY.seed
+        BOARD_COLS, BOARD_ROWS = PLAYBACK_REPLAY.cols, PLAYBACK_REPLAY.rows
+    init_audio()
     initialize_high_score_file()  # 确保文件存在
+    if VERSUS_GAME:
+        VersusGame().run()
+        sys.exit(0)
+    if ARENA_SNAKES:
+        # 竞技场的棋盘默认比单人模式大得多，只有显式指定时才使用 --cols/--rows/--cell-size
+        ArenaGame(ARENA_SNAKES, args.cols, args.rows, args.cell_size).run()
+        sys.exit(0)
     start_page = StartPage()
     start_page.window.mainloop()
 '''
@@ -0,0 +1,309 @@
+"""
+调色板模块
+游戏里用到的配色方案在导入时一次建好；食物呼吸光、分数金色渐变、暂停与结束文字的闪烁等
+随时间变化的颜色预先量化为 GLOW_LEVELS 级，每一级都是现成的 #rrggbb 字符串。
+绘制时只按时间算出下标查表，不再逐帧解析十六进制颜色或格式化新的颜色字符串。
+"""
+
+import math
+
+from foods import FOOD_SPECS
+
+# 随时间变化的颜色量化的级数（64 级时相邻两级的亮度差不到 1%，肉眼分辨不出）
+GLOW_LEVELS = 64
+_TOP = GLOW_LEVELS - 1
+
+
+def hex_to_rgb(color):
+    return int(color[1:3], 16), int(color[3:5], 16), int(color[5:7], 16)
+
+
+def rgb_to_hex(r, g, b):
+    return f'#{r:02x}{g:02x}{b:02x}'
+
+
+def scale_color(color, factor):
+    """把 color 的亮度乘以 factor（各分量截断到 0~255）"""
+    return rgb_to_hex(*(max(0, min(255, int(c * factor))) for c in hex_to_rgb(color)))
+
+
+def glow_table(color, low, high, levels=GLOW_LEVELS):
+    """color 的亮度从 low 倍到 high 倍均分为 levels 级的颜色表"""
+    return tuple(scale_color(color, low + (high - low) * i / (levels - 1)) for i in range(levels))
+
+
+def blend_table(start, end, levels=GLOW_LEVELS):
+    """从 RGB 分量 start 线性过渡到 end 的 levels 级颜色表"""
+    return tuple(rgb_to_hex(*(int(a + (b - a) * i / (levels - 1)) for a, b in zip(start, end)))
+                 for i in range(levels))
+
+
+def level(fraction):
+    """0~1 的比例 -> 颜色表下标（最近的一级）"""
+    return int(fraction * _TOP + 0.5)
+
+
+def pulse_level(t, speed):
+    """sin(t * speed) 从 -1 到 1 映射到颜色表下标"""
+    return int((math.sin(t * speed) + 1.0) * (_TOP / 2) + 0.5)
+
+
+def cycle_level(t, speed):
+    """相位 t * speed 在一个周期（2π）内的颜色表下标，用于循环变换的颜色"""
+    return int(t * speed * (GLOW_LEVELS / (2 * math.pi)) + 0.5) % GLOW_LEVELS
+
+
+# 蛇身配色：6 种配色方案，每种 3 套从头到尾的 4 色渐变
+SNAKE_COLOR_SCHEMES = (
+    [   # 第一组：梦幻晨曦组
+        [   # 晨曦粉紫
+            "#FF80ED",  # 梦幻起始粉
+            "#FF50B8",  # 晨曦过渡粉
+            "#FF2087",  # 玫瑰魅色
+            "#FF00AA"   # 魅影终点色
+        ],
+        [   # 晨曦青蓝
+            "#80FFFF",  # 晶莹起始青
+            "#40E5FF",  # 碧海过渡色
+            "#00CCFF",  # 深海梦境色
+            "#00A8FF"   # 深邃终点色
+        ],
+        [   # 晨曦金色
+            "#FFE566",  # 晨光起始金
+            "#FFD700",  # 璀璨过渡金                
+            "#FFAD1F",  # 琥珀过渡色
+            "#FF9912"   # 落日终点色
+        ]
+    ],
+    [   # 第二组：梦幻极光组（重新优化）
+        [   # 梦幻紫罗
+            "#E680FF",  # 梦幻起始紫
+            "#D355FF",  # 极光过渡紫
+            "#B82AFF",  # 魅影紫霞
+            "#9900FF"   # 深邃紫梦
+        ],
+        [   # 梦幻青碧
+            "#80FFE6",  # 梦幻起始青
+            "#40FFD4",  # 极光碧波
+            "#00FFB8",  # 深海之梦
+            "#00E5A0"   # 碧波尽头
+        ],
+        [   # 梦幻翠绿
+            "#80FF9E",  # 梦幻嫩绿
+            "#40FF8A",  # 极光翠绿
+            "#00FF76",  # 翡翠之梦
+            "#00E562"   # 碧绿深邃
+        ]
+    ],
+    [   # 第三组：赛博霓虹组（强对比版）
+        [   # 等离子脉冲
+            "#FF5555",  # 等离子起始（明亮赛博红）
+            "#FF2222",  # 脉冲过渡
+            "#FF0000",  # 能量聚焦
+            "#CC0066"   # 核心迸发（深邃玫红）
+        ],
+        [   # 量子极光
+            "#DD66FF",  # 量子起始（通透量子紫）
+            "#BB33FF",  # 极光弧光
+            "#9900FF",  # 量子跃迁
+            "#7700CC"   # 虚空之境
+        ],
+        [   # 全息青焰
+            "#66FFFF",  # 全息起始（明亮赛博青）
+            "#33FFFF",  # 离子之光
+            "#00FFFF",  # 数据流束
+            "#00CCFF"   # 矩阵深邃
+        ]
+    ],
+    [   # 第一组：梦幻星空
+        [   # 星云幻彩
+            "#FF99FF",  # 星云粉紫
+            "#FF66FF",  # 星尘闪烁
+            "#FF33FF",  # 星际光芒
+            "#CC00FF"   # 深空魔力
+        ],
+        [   # 银河之流
+            "#99FFFF",  # 银河起点
+            "#66FFFF",  # 星河波动
+            "#33FFFF",  # 星际之流
+            "#00CCFF"   # 深空之渊
+        ],
+        [   # 恒星之光
+            "#FFFF99",  # 恒星光辉
+            "#FFFF66",  # 星光闪耀
+            "#FFFF33",  # 光芒万丈
+            "#FFCC00"   # 永恒之星
+        ]
+    ],
+    [   # 第二组：霓虹都市
+        [   # 霓虹之夜
+            "#FF6699",  # 霓虹玫瑰
+            "#FF3366",  # 城市脉动
+            "#FF0033",  # 都市之心
+            "#CC0033"   # 暗夜之魂
+        ],
+        [   # 电子光辉
+            "#66FF99",  # 电子光芒
+            "#33FF66",  # 数据流光
+            "#00FF33",  # 矩阵能量
+            "#00CC33"   # 科技深邃
+        ],
+        [   # 赛博之焰
+            "#FF9966",  # 赛博烈焰
+            "#FF6633",  # 数码燃烧
+            "#FF3300",  # 信息之火
+            "#CC3300"   # 核心之炎
+        ]
+    ],
+    [   # 第三组：量子领域
+        [   # 量子之舞
+            "#9999FF",  # 量子起点
+            "#6666FF",  # 虚拟律动
+            "#3333FF",  # 数据洪流
+            "#0000CC"   # 信息之海
+        ],
+        [   # 矩阵绿光
+            "#99FF99",  # 矩阵光束
+            "#66FF66",  # 程序之光
+            "#33FF33",  # 代码闪耀
+            "#00CC00"   # 系统之芯
+        ],
+        [   # 超维空间
+            "#FF9999",  # 维度之门
+            "#FF6666",  # 空间涟漪
+            "#FF3333",  # 现实折射
+            "#CC0000"   # 终极真理
+        ]
+    ]
+)
+
+# 吃到食物时爆开的粒子颜色（按食物类型）
+FOOD_EFFECT_COLORS = {
+    'normal': [
+        "#FF0000", "#FF3333", "#FF4444", "#FF6666",  # 红色渐变系
+        "#FF1111", "#FF2222", "#FF5555"
+    ],
+    'golden': [
+        "#FFD700", "#FFC125", "#FFB90F", "#FFA500",  # 金色渐变系
+        "#FFD800", "#FFB800", "#FFA200"
+    ],
+    'special': [
+        "#9400D3", "#8A2BE2", "#9370DB", "#8B00FF",  # 紫罗兰渐变系
+        "#9932CC", "#BA55D3", "#9B30FF"
+    ],
+    'rainbow': ['#FF1493',  # 亮粉红 - 甜蜜的草莓味
+                '#FF69B4',  # 粉红色 - 柔和的樱桃味
+                '#00FFFF',  # 青色 - 清爽的薄荷味
+                '#1E90FF',  # 道奇蓝 - 清凉的蓝莓味
+                '#9370DB',  # 中紫色 - 浪漫的葡萄味
+                '#FF6EB4',  # 热粉红 - 可爱的树莓味
+                '#40E0D0'   # 绿松石色 - 清新的薄荷味
+                ]  # 添加彩虹颜色
+    ,
+    'star_candy': [
+        '#FF3366',  # 珊瑚玫瑰 - 充满活力不刺眼
+        '#00B8D4',  # 海洋蓝 - 清新深邃
+        '#7E57C2',  # 暮光紫 - 优雅神秘
+        '#26A69A',  # 青玉石 - 温和沉静
+        '#FF6B9C',  # 樱花粉 - 柔美甜蜜
+        '#5C6BC0',  # 星空蓝 - 深邃梦幻
+        '#2ECC71',  # 翡翠绿 - 生机盎然
+        '#9B59B6',  # 紫水晶 - 高贵典雅
+        '#16A085',  # 孔雀绿 - 沉稳优雅
+        '#F39C12'   # 琥珀金 - 温暖明亮
+    ]
+}
+
+# 里程碑特效的配色方案（随机挑选其一，保持插入顺序以免改变随机序列）
+MILESTONE_SCHEMES = {
+    'cyber_pink': {
+        'primary': ["#FF1493", "#FF0090", "#FF0070", "#FF0050", "#FF0030"],  # 更鲜艳的粉红色
+        'glow': "#FF1493",
+        'accent': ["#FFFFFF", "#FF1493", "#FF0090"]
+    },
+    'quantum_blue': {
+        'primary': ["#00FFFF", "#00B7FF", "#0090FF", "#0066FF", "#003CFF"],  # 更明亮的蓝色
+        'glow': "#00FFFF", 
+        'accent': ["#FFFFFF", "#00FFFF", "#00B7FF"]
+    },
+    'neon_purple': {
+        'primary': ["#9932CC", "#8B00FF", "#7B00FF", "#6A00FF", "#5900FF"],  # 更深邃的紫色
+        'glow': "#9932CC",
+        'accent': ["#FFFFFF", "#9932CC", "#8B00FF"]
+    },
+    'toxic_green': {
+        'primary': ["#00FF00", "#00DD00", "#00BB00", "#009900", "#007700"],
+        'glow': "#00FF00",
+        'accent': ["#FFFFFF", "#00FF00", "#00DD00"]
+    },
+    'plasma_gold': {
+        'primary': ["#FFD700", "#FFC125", "#FFB90F", "#FFA500", "#FF8C00"],  # 更温暖的金色
+        'glow': "#FFD700",
+        'accent': ["#FFFFFF", "#FFD700", "#FFC125"]
+    },
+    'inferno_red': {
+        'primary': ["#FF3030", "#FF0000", "#CD0000", "#8B0000", "#800000"],  # 更热烈的红色
+        'glow': "#FF3030",
+        'accent': ["#FFFFFF", "#FF3030", "#FF0000"]
+    },
+    'ocean_blue': {
+        'primary': ["#00FFFF", "#00C0FF", "#0090FF", "#0060FF", "#0030FF"],
+        'glow': "#00FFFF",
+        'accent': ["#FFFFFF", "#00FFFF", "#00C0FF"]
+    },
+    'electric_blue': {
+        'primary': ["#87CEFA", "#1E90FF", "#0000FF", "#0000CD", "#00008B"],  # 更明亮的电光蓝
+        'glow': "#87CEFA",
+        'accent': ["#FFFFFF", "#87CEFA", "#1E90FF"]
+    },
+    'void_violet': {
+        'primary': ["#9400D3", "#8A2BE2", "#9370DB", "#7B68EE", "#6A5ACD"],  # 更神秘的紫罗兰
+        'glow': "#9400D3",
+        'accent': ["#FFFFFF", "#9400D3", "#8A2BE2"]
+    },
+    'solar_orange': {
+        'primary': ["#FFA500", "#FF8C00", "#FF7F00", "#FF6347", "#FF4500"],  # 更温暖的橙色
+        'glow': "#FFA500",
+        'accent': ["#FFFFFF", "#FFA500", "#FF8C00"]
+    },
+    'aqua_teal': {
+        'primary': ["#40E0D0", "#48D1CC", "#00CED1", "#20B2AA", "#008B8B"],  # 更清新的青色
+        'glow': "#40E0D0",
+        'accent': ["#FFFFFF", "#40E0D0", "#48D1CC"]
+    },
+    'acid_lime': {
+        'primary': ["#32CD32", "#98FB98", "#90EE90", "#7CCD7C", "#66CD00"],  # 更活力的青柠色
+        'glow': "#32CD32",
+        'accent': ["#FFFFFF", "#32CD32", "#98FB98"]
+    },
+    'rainbow_burst': {
+        'primary': ["#FF69B4", "#FF1493", "#FF00FF", "#9400D3", "#4B0082"],  # 更绚丽的彩虹色
+        'glow': "#FF69B4",
+        'accent': ["#FFFFFF", "#FF69B4", "#FF1493"]
+    },
+    'prismatic_flow': {
+        'primary': ["#FF00FF", "#EE00EE", "#CD00CD", "#8B008B", "#800080"],  # 更梦幻的棱镜色
+        'glow': "#FF00FF",
+        'accent': ["#FFFFFF", "#FF00FF", "#EE00EE"]
+    }
+}
+
+
+# 食物的呼吸光：亮度在 0.8~1.0 倍之间，按 level(|sin|) 取色
+FOOD_GLOW = {spec.name: glow_table(spec.color, 0.8, 1.0) for spec in FOOD_SPECS}
+
+# 星星糖：RGB 三个分量相位各差 2 弧度的正弦循环，按 cycle_level 取色
+STAR_CANDY_CYCLE = tuple(
+    rgb_to_hex(*(int(128 + 127 * math.sin(2 * math.pi * i / GLOW_LEVELS + shift)) for shift in (0.0, 2.0, 4.0)))
+    for i in range(GLOW_LEVELS))
+
+# 分数文字的金色渐变：红色分量 231~255，绿色为红色的 0.8 倍，按 pulse_level 取色
+HUD_GOLD = tuple(rgb_to_hex(v, int(v * 0.8), 0)
+                 for v in (int(243 + 12 * (2 * i / _TOP - 1)) for i in range(GLOW_LEVELS)))
+
+# 暂停文字的闪烁：暗玫红到亮粉红
+PAUSE_BLINK = blend_table((200, 20, 80), (255, 90, 150))
+
+# 结束画面两行文字的闪烁：粉色亮度 0.87~1.0 倍，白色 0.95~1.0 倍
+GAME_OVER_PINK = glow_table("#FF4081", 0.87, 1.0)
+GAME_OVER_WHITE = glow_table("#FFFFFF", 0.95, 1.0)
@@ -0,0 +1,288 @@
+"""
+画布绘制模块
+常驻画布项的蛇身绘制器：可见窗口内的每一节蛇身对应一个一直存在的矩形画布项，不再每帧 delete("all") 后重建。
+
+每步只把离开的尾巴那一项移到新蛇头（一次 coords，必要时一次 itemconfigure 改色），
+长大时才新建一项；蛇头与四个眼睛椭圆同样常驻，方向不变时整体 move 一次。
+可见窗口外的蛇身没有画布项，因此画布项数与每步的画布操作次数都与蛇长无关。
+只依赖画布对象的方法，不导入 Tk。
+
+CanvasLayers 用标签把画布项分成背景、食物、蛇、分数与特效几层，固定上下顺序，
+每帧只重画状态发生变化的图层。
+"""
+
+from grid import CELL_SIZE
+
+# 蛇头眼睛：按方向编码（UP、DOWN、LEFT、RIGHT）索引的四个椭圆（20 像素格子下的偏移），
+# 依次为右眼白、右瞳孔、左眼白、左瞳孔
+EYE_OVALS = (
+    ((5, 4, 8, 8), (6, 5, 7, 7), (12, 4, 15, 8), (13, 5, 14, 7)),
+    ((5, 12, 8, 16), (6, 13, 7, 15), (12, 12, 15, 16), (13, 13, 14, 15)),
+    ((4, 5, 8, 8), (5, 6, 7, 7), (4, 12, 8, 15), (5, 13, 7, 14)),
+    ((12, 5, 16, 8), (13, 6, 15, 7), (12, 12, 16, 15), (13, 13, 15, 14)),
+)
+EYE_COLORS = ("#F8F8F8", "#2196F3", "#F8F8F8", "#2196F3")
+
+# 画布图层（同名标签），自下而上；不属于任何图层的画布项（涟漪、里程碑等一次性特效）位于最上方
+LAYERS = ("bg", "food", "snake", "hud", "fx")
+
+
+class CanvasLayers:
+    """按标签管理的画布图层。
+
+    每层记录上次绘制时的状态键，`changed` 判断该层是否需要重画；重画过的图层
+    新建的画布项位于最上方，`restack` 再按 LAYERS 的顺序整体归位。
+    背景图只创建一次，换图时 itemconfigure；画布被外部 delete("all") 清空后
+    （背景项随之消失）下一次 `ensure_background` 重建背景并作废所有状态键。
+    """
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.bg_item = None
+        self.bg_image = None
+        self.keys = {}
+        self.stacked = True
+
+    def changed(self, name, key):
+        """name 的状态键与上次不同时记下新键并返回 True"""
+        if name in self.keys and self.keys[name] == key:
+            return False
+        self.keys[name] = key
+        return True
+
+    def clear(self, layer):
+        """删除一层的全部画布项，准备重画"""
+        self.canvas.delete(layer)
+        self.stacked = False
+
+    def mark_restack(self):
+        """图层外部新建了画布项（例如蛇身整体重建），下一次 restack 时归位"""
+        self.stacked = False
+
+    def ensure_background(self, image):
+        """背景项不存在时（开局或画布被清空）创建它并作废所有状态键；返回是否新建"""
+        if self.bg_item is not None and self.canvas.type(self.bg_item):
+            return False
+        self.bg_item = self.canvas.create_image(0, 0, anchor="nw", image=image, tags="bg")
+        self.bg_image = image
+        self.keys.clear()
+        self.stacked = False
+        return True
+
+    def set_background(self, image):
+        """换背景图：已有背景项时只改它的图片（与当前图片相同时什么也不做）"""
+        if not self.ensure_background(image) and image is not self.bg_image:
+            self.canvas.itemconfigure(self.bg_item, image=image)
+            self.bg_image = image
+
+    def restack(self):
+        """有图层重画过时按 LAYERS 的顺序归位（自上而下逐层压到最底）"""
+        if self.stacked:
+            return
+        for layer in reversed(LAYERS):
+            self.canvas.tag_lower(layer)
+        self.stacked = True
+
+
+class SnakeRenderer:
+    """把 grid.SnakeBody 落在可见窗口内的部分增量同步到画布上的常驻画布项。
+
+    只有可见的蛇身节才有画布项（按推入序号索引），大棋盘上的长蛇也只占可见窗口那么多项。
+    可见窗口不动时每步只处理新推入的蛇头与弹出的尾巴：离开的项回收给进入的节复用
+    （一次 coords，必要时一次 itemconfigure 改色）；可见窗口移动时整体 move 一次，
+    再按可见区域对账，移出窗口的项回收、移入的节补上，代价与可见格子数成正比，与蛇长无关。
+
+    蛇身各节的颜色由它被蛇头推入时的序号决定（`colors[序号 % len(colors)]`），
+    一节一旦画出就不必再改色；每节带有 `snake` 与 `snake<相位>` 两个标签，
+    换配色时每个相位一次 itemconfigure 即可。
+
+    画布被外部 delete("all") 清空、或换成另一条蛇（重开、读档）时自动整体重建。
+
+    传入 atlas（sprites.SpriteAtlas）时每节蛇身改为引用缓存贴图的图片项，
+    蛇头连同眼睛也只是一个图片项；改色即换一张贴图。
+    """
+    TAG = "snake"
+    HEAD_TAG = "snake_head"
+
+    def __init__(self, canvas, cell_size=CELL_SIZE, atlas=None):
+        self.canvas = canvas
+        self.cell_size = cell_size
+        self.atlas = atlas
+        # 推入序号 -> 画布项，只含可见的蛇身节
+        self.items = {}
+        self.head_item = None
+        self.eye_items = ()
+        self.snake = None
+        self.pushed = 0
+        self.tail_order = 0
+        self.colors = None
+        self.direction = None
+        self.head = None
+        self.offset = (0, 0)
+        self.bounds = None
+        # 最近一次 sync 的画布操作次数，供性能统计
+        self.ops = 0
+
+    def _view(self, snake, viewport):
+        """可见窗口左上角的棋盘像素坐标与覆盖的格子矩形；viewport 为 None 时整个棋盘可见"""
+        if viewport is None:
+            return (0, 0), (0, 0, snake.cols, snake.rows)
+        return (viewport.x, viewport.y), viewport.cell_bounds(self.cell_size)
+
+    def _in_bounds(self, pos):
+        col0, row0, col1, row1 = self.bounds
+        size = self.cell_size
+        return col0 * size <= pos[0] < col1 * size and row0 * size <= pos[1] < row1 * size
+
+    def _rect(self, pos):
+        """pos 所在格子的画布坐标：矩形项为四个值，贴图（左上角锚点）为两个值"""
+        x = pos[0] - self.offset[0]
+        y = pos[1] - self.offset[1]
+        if self.atlas is not None:
+            return x, y
+        return x, y, x + self.cell_size, y + self.cell_size
+
+    def _create(self, rect, color, tags):
+        if self.atlas is None:
+            return self.canvas.create_rectangle(*rect, fill=color, outline="", tags=tags)
+        return self.canvas.create_image(*rect, anchor="nw", image=self.atlas.segment(color), tags=tags)
+
+    def _paint(self, target, color, **options):
+        if self.atlas is None:
+            self.canvas.itemconfigure(target, fill=color, **options)
+        else:
+            self.canvas.itemconfigure(target, image=self.atlas.segment(color), **options)
+
+    def _paint_head(self):
+        if self.atlas is None:
+            self.canvas.itemconfigure(self.head_item, fill=self.colors[0])
+        else:
+            self.canvas.itemconfigure(self.head_item, image=self.atlas.head(self.colors[0], self.direction))
+
+    def _tags(self, order):
+        return (self.TAG, f"{self.TAG}{order % len(self.colors)}")
+
+    def _valid(self, snake):
+        return (snake is self.snake and self.head_item is not None
+                and self.canvas.type(self.head_item))
+
+    def rebuild(self, snake, direction, colors, viewport=None):
+        """删除旧的画布项并按当前蛇身的可见部分全部重建（开局、读档或画布被清空时）"""
+        canvas = self.canvas
+        canvas.delete(self.TAG)
+        self.snake = snake
+        self.colors = colors
+        self.offset, self.bounds = self._view(snake, viewport)
+        self.pushed = snake.pushed
+        self.tail_order = snake.pushed - len(snake) + 1
+        ncolors = len(colors)
+        self.items = {}
+        for pos, index in snake.segments_in_view(*self.bounds):
+            order = self.tail_order + index
+            self.items[order] = self._create(self._rect(pos), colors[order % ncolors], self._tags(order))
+        head_tags = (self.TAG, self.HEAD_TAG)
+        self.direction = direction
+        self.head = snake.head
+        if self.atlas is None:
+            self.head_item = canvas.create_rectangle(*self._rect(snake.head), fill=colors[0],
+                                                     outline="", tags=head_tags)
+            self.eye_items = tuple(canvas.create_oval(0, 0, 0, 0, fill=color, tags=head_tags)
+                                   for color in EYE_COLORS)
+        else:
+            # 眼睛已画在蛇头贴图里
+            self.head_item = canvas.create_image(*self._rect(snake.head), anchor="nw",
+                                                 image=self.atlas.head(colors[0], direction),
+                                                 tags=head_tags)
+            self.eye_items = ()
+        self._place_eyes(snake.head)
+        self.ops = len(self.items) + 1 + len(self.eye_items)
+
+    def _place_eyes(self, head):
+        x, y = head[0] - self.offset[0], head[1] - self.offset[1]
+        s = self.cell_size / CELL_SIZE
+        coords = self.canvas.coords
+        for item, (x1, y1, x2, y2) in zip(self.eye_items, EYE_OVALS[self.direction]):
+            coords(item, x + x1 * s, y + y1 * s, x + x2 * s, y + y2 * s)
+
+    def _place(self, order, pos, spare):
+        """为进入可见窗口的一节取一个画布项：优先复用 spare 中回收的项，返回画布操作次数"""
+        colors = self.colors
+        ncolors = len(colors)
+        rect = self._rect(pos)
+        if spare:
+            old_order, item = spare.pop()
+            self.canvas.coords(item, *rect)
+            self.items[order] = item
+            if (order - old_order) % ncolors:
+                self._paint(item, colors[order % ncolors], tags=self._tags(order))
+                return 2
+            return 1
+        item = self._create(rect, colors[order % ncolors], self._tags(order))
+        # 新建项在整个画布最上方，压到蛇头之下，蛇仍留在自己的图层里
+        self.canvas.tag_lower(item, self.head_item)
+        self.items[order] = item
+        return 2
+
+    def sync(self, snake, direction, colors, viewport=None):
+        """把画布更新为 snake 的当前状态；viewport 为 grid.Viewport（None 表示整个棋盘都可见）。
+
+        自上次同步以来可能推进了多步（固定时间步一帧补多步），逐个处理新推入的蛇头。
+        整体重建时返回 True（新建的画布项位于最上方，调用方可能需要重新排列图层）。
+        """
+        if not self._valid(snake) or snake.pushed - self.pushed > len(snake):
+            self.rebuild(snake, direction, colors, viewport)
+            return True
+        canvas = self.canvas
+        items = self.items
+        ops = 0
+        offset, bounds = self._view(snake, viewport)
+        if offset != self.offset:
+            canvas.move(self.TAG, self.offset[0] - offset[0], self.offset[1] - offset[1])
+            self.offset = offset
+            ops += 1
+        if colors is not self.colors:
+            self.colors = colors
+            for phase, color in enumerate(colors):
+                self._paint(f"{self.TAG}{phase}", color)
+            self._paint_head()
+            ops += len(colors) + 1
+
+        tail_order = snake.pushed - len(snake) + 1
+        if bounds != self.bounds:
+            # 可见窗口移动：按新的可见区域对账，代价与可见格子数成正比
+            self.bounds = bounds
+            visible = {tail_order + index: pos for pos, index in snake.segments_in_view(*bounds)}
+            spare = [(order, items.pop(order)) for order in [order for order in items if order not in visible]]
+            for order, pos in visible.items():
+                if order not in items:
+                    ops += self._place(order, pos, spare)
+        else:
+            # 只有弹出的尾巴离开、新推入的蛇头进入
+            spare = [(order, items.pop(order)) for order in range(self.tail_order, tail_order)
+                     if order in items]
+            for back in range(min(snake.pushed - self.pushed, len(snake)), 0, -1):
+                pos = snake[-back]
+                if self._in_bounds(pos):
+                    ops += self._place(snake.pushed - back + 1, pos, spare)
+        if spare:
+            canvas.delete(*(item for _, item in spare))
+            ops += 1
+        self.tail_order = tail_order
+        self.pushed = snake.pushed
+
+        head = snake.head
+        if direction != self.direction:
+            self.direction = direction
+            canvas.coords(self.head_item, *self._rect(head))
+            if self.atlas is not None:
+                self._paint_head()
+                ops += 1
+            self._place_eyes(head)
+            ops += 1 + len(self.eye_items)
+        elif head != self.head:
+            # 方向没变：蛇头与眼睛一起平移
+            canvas.move(self.HEAD_TAG, head[0] - self.head[0], head[1] - self.head[1])
+            ops += 1
+        self.head = head
+        self.ops = ops
+        return False
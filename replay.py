@@ -0,0 +1,210 @@
+"""
+输入回放模块
+对局完全由（种子、开局配色与背景、每步的转向输入）决定，因此只需记录这些即可复现整局：
+每个转向编码为一个 varint `(距上一次转向的步数 << 2) | 方向编码`，通常 1~2 字节。
+
+回放时把输入按步喂给 engine.step，可以无界面全速快进，
+也可以在 Tk 游戏中用 `--replay` 按原速度带画面播放。
+
+    python replay.py last_run.replay      # 无界面快进并校验结果
+"""
+
+import argparse
+import struct
+import time
+from collections import namedtuple
+
+import engine
+from grid import GRID_COLS, GRID_ROWS
+
+MAGIC = b'GSRP'
+VERSION = 1
+
+# 魔数、版本、模式、列、行、开局配色、开局背景、标志、种子、总步数、最终分数、转向数
+_HEADER = struct.Struct('<4sBBHHBBBqIII')
+_MODES = ("Pass", "Forbid")
+_FLAG_HAS_SEED = 1
+_FLAG_DIED = 2
+_SEED_MIN, _SEED_MAX = -(1 << 63), (1 << 63) - 1
+
+
+class ReplayError(ValueError):
+    """回放文件损坏或版本不支持"""
+
+
+# ticks 为成功移动的步数，died 表示最后一步撞死；inputs 为 varint 编码的转向流
+Replay = namedtuple('Replay', (
+    'mode', 'cols', 'rows', 'color_chose', 'background', 'seed',
+    'ticks', 'score', 'died', 'count', 'inputs',
+))
+
+
+def _write_varint(out, value):
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, pos):
+    """从 data[pos] 读取一个 varint，返回 (值, 下一个位置)"""
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def iter_inputs(data, count):
+    """解码转向流，逐个产生 (步数, 方向编码)"""
+    tick = 0
+    pos = 0
+    for _ in range(count):
+        value, pos = read_varint(data, pos)
+        tick += value >> 2
+        yield tick, value & 3
+
+
+class ReplayRecorder:
+    """边玩边记录转向输入；record 的步数必须单调不减"""
+    __slots__ = ('mode', 'cols', 'rows', 'color_chose', 'background', 'seed',
+                 'data', 'count', 'last_tick')
+
+    def __init__(self, seed, mode="Pass", cols=GRID_COLS, rows=GRID_ROWS,
+                 color_chose=0, background=0):
+        self.mode = mode
+        self.cols = cols
+        self.rows = rows
+        self.color_chose = color_chose
+        self.background = background
+        self.seed = seed
+        self.data = bytearray()
+        self.count = 0
+        self.last_tick = 0
+
+    def record(self, tick, direction):
+        """记录在第 tick 步（从 0 开始，即此前已成功移动的步数）生效的转向（方向编码）"""
+        _write_varint(self.data, (tick - self.last_tick) << 2 | direction)
+        self.last_tick = tick
+        self.count += 1
+
+    def finish(self, ticks, score, died):
+        """结束记录，返回 Replay"""
+        return Replay(self.mode, self.cols, self.rows, self.color_chose, self.background,
+                      self.seed, ticks, score, died, self.count, bytes(self.data))
+
+
+def pack(replay):
+    has_seed = replay.seed is not None and _SEED_MIN <= replay.seed <= _SEED_MAX
+    flags = (_FLAG_HAS_SEED if has_seed else 0) | (_FLAG_DIED if replay.died else 0)
+    header = _HEADER.pack(
+        MAGIC, VERSION, _MODES.index(replay.mode), replay.cols, replay.rows,
+        replay.color_chose, replay.background, flags, replay.seed if has_seed else 0,
+        replay.ticks, replay.score, replay.count,
+    )
+    return header + replay.inputs
+
+
+def unpack(data):
+    try:
+        (magic, version, mode, cols, rows, color_chose, background, flags, seed,
+         ticks, score, count) = _HEADER.unpack_from(data)
+    except struct.error as e:
+        raise ReplayError(f"回放头部不完整: {e}") from None
+    if magic != MAGIC:
+        raise ReplayError("不是贪吃蛇回放")
+    if version != VERSION:
+        raise ReplayError(f"不支持的回放版本: {version}")
+    return Replay(_MODES[mode], cols, rows, color_chose, background,
+                  seed if flags & _FLAG_HAS_SEED else None, ticks, score,
+                  bool(flags & _FLAG_DIED), count, bytes(data[_HEADER.size:]))
+
+
+def save_replay(path, replay):
+    with open(path, 'wb') as file:
+        file.write(pack(replay))
+
+
+def load_replay(path):
+    with open(path, 'rb') as file:
+        return unpack(file.read())
+
+
+class InputCursor:
+    """按步取出转向流中的转向；turn_at 的步数必须单调不减。
+
+    游标的位置完全由 (offset, index, base_tick) 决定：下一个未消费转向的字节位置、
+    它的序号以及上一个转向的步数，据此可以从转向流中间任意位置重新创建游标。
+    """
+    __slots__ = ('data', 'count', 'offset', 'index', 'base_tick', '_pos',
+                 'next_tick', 'next_direction')
+
+    def __init__(self, data, count, offset=0, index=0, base_tick=0):
+        self.data = data
+        self.count = count
+        self.index = index
+        self.base_tick = base_tick
+        self._pos = offset
+        self._advance()
+
+    def _advance(self):
+        self.offset = self._pos
+        if self.index >= self.count:
+            self.next_tick, self.next_direction = -1, None
+            return
+        value, self._pos = read_varint(self.data, self._pos)
+        self.next_tick = self.base_tick + (value >> 2)
+        self.next_direction = value & 3
+
+    def turn_at(self, tick):
+        """第 tick 步生效的转向（方向编码）；没有则返回 None"""
+        if tick != self.next_tick:
+            return None
+        direction = self.next_direction
+        self.base_tick = tick
+        self.index += 1
+        self._advance()
+        return direction
+
+
+def new_game(replay):
+    """按回放头部创建开局状态"""
+    return engine.new_game(replay.mode, replay.seed, replay.cols, replay.rows,
+                           replay.color_chose, replay.background)
+
+
+def play(replay, until_tick=None, events=None):
+    """无界面全速回放，返回 (最终的 engine.GameState, 是否撞死)。
+
+    until_tick 为 None 时一直播放到记录结束（包括最后撞死的那一步）。
+    是否撞死取自最后一步的 STEP_DIED：占满棋盘的完美通关同样 alive 为 False，但不算撞死。
+    """
+    state = new_game(replay)
+    cursor = InputCursor(replay.inputs, replay.count)
+    if until_tick is None:
+        until_tick = replay.ticks + replay.died
+    step = engine.step
+    result = engine.STEP_MOVED
+    while state.alive and state.ticks < until_tick:
+        result = step(state, cursor.turn_at(state.ticks), events)
+    return state, result == engine.STEP_DIED
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="无界面快进播放贪吃蛇回放并校验结果")
+    parser.add_argument('path', help="回放文件")
+    args = parser.parse_args()
+
+    replay = load_replay(args.path)
+    start = time.perf_counter()
+    state, died = play(replay)
+    elapsed = time.perf_counter() - start
+    ok = (state.ticks, state.score, died) == (replay.ticks, replay.score, replay.died)
+    print(f"seed {replay.seed}, {replay.cols}x{replay.rows} {replay.mode}, "
+          f"{replay.count} turns in {len(replay.inputs)} bytes")
+    print(f"{state.ticks} ticks in {elapsed * 1e3:.1f} ms -> {state.ticks / max(elapsed, 1e-9):,.0f} ticks/s")
+    print(f"score {state.score} (recorded {replay.score}): {'OK' if ok else 'MISMATCH'}")
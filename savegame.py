@@ -0,0 +1,176 @@
+"""
+存档模块
+把进行中的一局压缩为带版本号的二进制存档：定长头部 + 蛇身格子下标数组 + 两个随机数流的内部状态，
+读档只需几次 struct 解包与一次数组拷贝。不依赖 Tk，可在后台线程中打包与写盘。
+
+格式（小端）：
+    头部      _HEADER（魔数、版本、模式、棋盘尺寸、方向、配色、背景、分数、速度、食物、种子、蛇长、空闲格数）
+    蛇身      length 个格子下标，从尾到头；格子总数不超过 65536 时为 uint16，否则为 uint32
+    空闲格子  free_count 个格子下标，按空闲格子索引（grid.FreeCells）中的原始顺序，类型同上；
+              读档后食物的随机抽取才与不中断的对局一致
+    随机数流  玩法流与外观流各一个 _RNG_STATE（Mersenne Twister 状态 + gauss_next）
+"""
+
+import os
+import struct
+import sys
+from array import array
+from collections import namedtuple
+
+from engine import GameState
+
+MAGIC = b'GSNK'
+VERSION = 2
+
+_HEADER = struct.Struct('<4sBBHHHBBBBIHiBBqII')
+_RNG_STATE = struct.Struct('<625IBd')
+RNG_STATE_SIZE = _RNG_STATE.size
+
+_MODES = ("Pass", "Forbid")
+_FLAG_HAS_SEED = 1
+_FLAG_WIDE_CELLS = 2
+_SEED_MIN, _SEED_MAX = -(1 << 63), (1 << 63) - 1
+
+
+class SaveError(ValueError):
+    """存档损坏、版本不支持或与当前棋盘不兼容"""
+
+
+# 一局存档的全部内容；body 为 array 格子下标（尾 -> 头），direction 为方向编码，
+# food 为格子下标（-1 表示无食物），rng_state / fx_rng_state 为 random.Random.getstate() 的返回值，
+# free 为空闲格子索引中按原顺序排列的格子下标
+SavedGame = namedtuple('SavedGame', (
+    'mode', 'cols', 'rows', 'cell_size', 'body', 'direction', 'food', 'food_type',
+    'color_phase', 'score', 'speed', 'color_chose', 'background', 'seed',
+    'rng_state', 'fx_rng_state', 'free',
+))
+
+
+def _cell_typecode(cols, rows):
+    return 'H' if cols * rows <= 1 << 16 else 'I'
+
+
+def pack_rng_state(state):
+    """random.Random.getstate() -> RNG_STATE_SIZE 字节"""
+    version, internal, gauss_next = state
+    if version != 3 or len(internal) != 625:
+        raise SaveError(f"不支持的随机数状态版本: {version}")
+    has_gauss = gauss_next is not None
+    return _RNG_STATE.pack(*internal, has_gauss, gauss_next if has_gauss else 0.0)
+
+
+def unpack_rng_state(data, offset=0):
+    """从 data[offset:] 解出可供 random.Random.setstate() 使用的状态"""
+    values = _RNG_STATE.unpack_from(data, offset)
+    gauss_next = values[626] if values[625] else None
+    return (3, values[:625], gauss_next)
+
+
+def _cell_array(cells, typecode):
+    """格子下标 -> 小端字节序的 array"""
+    values = cells if getattr(cells, 'typecode', None) == typecode else array(typecode, cells)
+    if sys.byteorder != 'little':
+        values = array(typecode, values)
+        values.byteswap()
+    return values
+
+
+def pack(saved):
+    """SavedGame -> bytes"""
+    typecode = _cell_typecode(saved.cols, saved.rows)
+    body = _cell_array(saved.body, typecode)
+    free = _cell_array(saved.free, typecode)
+    has_seed = saved.seed is not None and _SEED_MIN <= saved.seed <= _SEED_MAX
+    flags = (_FLAG_HAS_SEED if has_seed else 0) | (_FLAG_WIDE_CELLS if typecode == 'I' else 0)
+    header = _HEADER.pack(
+        MAGIC, VERSION, _MODES.index(saved.mode), saved.cols, saved.rows, saved.cell_size,
+        saved.direction, saved.color_chose, saved.background, flags,
+        saved.score, saved.speed, saved.food, saved.food_type, saved.color_phase,
+        saved.seed if has_seed else 0, len(body), len(free),
+    )
+    return b''.join((header, body.tobytes(), free.tobytes(), pack_rng_state(saved.rng_state),
+                     pack_rng_state(saved.fx_rng_state)))
+
+
+def unpack(data):
+    """bytes -> SavedGame；格式不对时抛出 SaveError"""
+    try:
+        (magic, version, mode, cols, rows, cell_size, direction, color_chose, background, flags,
+         score, speed, food, food_type, color_phase, seed, length, free_count) = _HEADER.unpack_from(data)
+    except struct.error as e:
+        raise SaveError(f"存档头部不完整: {e}") from None
+    if magic != MAGIC:
+        raise SaveError("不是贪吃蛇存档")
+    if version != VERSION:
+        raise SaveError(f"不支持的存档版本: {version}")
+
+    offset = _HEADER.size
+    typecode = 'I' if flags & _FLAG_WIDE_CELLS else 'H'
+    body = array(typecode)
+    free = array(typecode)
+    body_end = offset + length * body.itemsize
+    end = body_end + free_count * free.itemsize
+    if len(data) != end + 2 * _RNG_STATE.size:
+        raise SaveError("存档长度不正确")
+    body.frombytes(data[offset:body_end])
+    free.frombytes(data[body_end:end])
+    if sys.byteorder != 'little':
+        body.byteswap()
+        free.byteswap()
+    return SavedGame(
+        _MODES[mode], cols, rows, cell_size, body, direction, food, food_type,
+        color_phase, score, speed, color_chose, background,
+        seed if flags & _FLAG_HAS_SEED else None,
+        unpack_rng_state(data, end), unpack_rng_state(data, end + _RNG_STATE.size), free,
+    )
+
+
+def save_game(path, saved):
+    """打包并原子地写入存档（先写临时文件再替换），中途退出不会留下半个存档"""
+    data = pack(saved)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as file:
+        file.write(data)
+    os.replace(tmp_path, path)
+
+
+def load_game(path):
+    with open(path, 'rb') as file:
+        return unpack(file.read())
+
+
+def saved_from_state(state, cell_size, fx_rng_state=None):
+    """engine.GameState -> SavedGame（无界面对局与机器人使用）"""
+    rng_state = state.rng.getstate()
+    typecode = _cell_typecode(state.cols, state.rows)
+    return SavedGame(
+        state.mode, state.cols, state.rows, cell_size,
+        array(typecode, state.cells()),
+        state.direction, state.food, state.food_type, 0, state.score,
+        state.speed, state.color_chose, state.background, state.seed,
+        rng_state, fx_rng_state or rng_state, array(typecode, state.free.cells),
+    )
+
+
+def restore_free_cells(free, saved):
+    """按存档中的顺序重排空闲格子索引 free（grid.FreeCells，须已按存档的蛇身占好格子）"""
+    if len(saved.free) != len(free) or set(saved.free) != set(free.cells):
+        raise SaveError("存档中的空闲格子与蛇身不一致")
+    free.assign(saved.free)
+
+
+def state_from_saved(saved):
+    """SavedGame -> engine.GameState"""
+    state = GameState(saved.cols, saved.rows, saved.mode, seed=saved.seed)
+    for cell in saved.body:
+        state.push_head(cell)
+    restore_free_cells(state.free, saved)
+    state.direction = saved.direction
+    state.food = saved.food
+    state.food_type = saved.food_type
+    state.score = saved.score
+    state.speed = saved.speed
+    state.color_chose = saved.color_chose
+    state.background = saved.background
+    state.rng.setstate(saved.rng_state)
+    return state
@@ -0,0 +1,219 @@
+"""
+自我对局模块
+用 ProcessPoolExecutor 在所有 CPU 核上并行跑成千上万局无界面对局（engine + 自动驾驶 + 种子），
+用于调参与统计。
+
+- 任务按块提交：每个任务只携带（驾驶员、棋盘、起始种子、局数），不传输任何对局状态
+- 每局结果压缩为一条定长 struct 记录，一块结果合成一个 bytes 返回
+- 父进程只保留固定数量的在途任务，结果到达即汇总进流式统计，内存与总局数无关
+
+    python selfplay.py 10000 --bot astar                 # 也可以用 python main.py --selfplay 10000
+    python selfplay.py 2000 --bot hamilton --csv runs.csv
+
+经 main.py 启动时，工作进程会重新导入 main.py 的界面依赖（不会初始化混音器），启动稍慢；
+大批量对局建议直接运行本模块。
+"""
+
+import argparse
+import math
+import os
+import struct
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import engine
+from autopilot import ALGORITHMS, create_pilot
+from grid import GRID_COLS, GRID_ROWS
+
+# 一局的结束原因
+CAUSE_SELF = 0    # 撞到自己
+CAUSE_WALL = 1    # 撞墙（Forbid 模式）
+CAUSE_FULL = 2    # 填满棋盘
+CAUSE_LIMIT = 3   # 达到步数上限
+CAUSE_NAMES = ("self", "wall", "full", "limit")
+
+# 种子、分数、蛇长、步数、结束原因、CPU 耗时（秒）、其中决策耗时（秒）
+_RESULT = struct.Struct('<qIIIBdd')
+
+GameResult = namedtuple('GameResult', 'seed score length ticks cause elapsed decide_time')
+
+
+def play_game(pilot, mode, cols, rows, seed, max_ticks):
+    """用 pilot 无界面下完一局，返回 GameResult"""
+    clock = time.perf_counter
+    step = engine.step
+    decide = pilot.decide
+    pilot.reset()
+    # 用进程 CPU 时间计整局耗时，进程数多于核数时也能得到真实的并行加速比
+    start = time.process_time()
+    decide_time = 0.0
+    state = engine.new_game(mode, seed, cols, rows, 0, 0)
+    result = engine.STEP_MOVED
+    while state.ticks < max_ticks:
+        t0 = clock()
+        action = decide(state)
+        decide_time += clock() - t0
+        result = step(state, action)
+        if result == engine.STEP_DIED or result == engine.STEP_FULL:
+            break
+    if result == engine.STEP_FULL:
+        cause = CAUSE_FULL
+    elif result == engine.STEP_DIED:
+        # 死亡时蛇头没有移动：沿当前方向的下一格越过墙壁即为撞墙
+        ahead = state.neighbors[state.head * 4 + state.direction]
+        cause = CAUSE_WALL if ahead < 0 else CAUSE_SELF
+    else:
+        cause = CAUSE_LIMIT
+    return GameResult(seed, state.score, state.length, state.ticks, cause,
+                      time.process_time() - start, decide_time)
+
+
+def play_chunk(bot, mode, cols, rows, first_seed, count, max_ticks):
+    """工作进程入口：下完种子 first_seed ~ first_seed+count-1 的各局，返回打包后的结果"""
+    pilot = create_pilot(cols, rows, mode, bot)
+    out = bytearray()
+    for seed in range(first_seed, first_seed + count):
+        out += _RESULT.pack(*play_game(pilot, mode, cols, rows, seed, max_ticks))
+    return bytes(out)
+
+
+def iter_results(data):
+    """解包 play_chunk 的返回值，逐个产生 GameResult"""
+    for fields in _RESULT.iter_unpack(data):
+        yield GameResult._make(fields)
+
+
+class _Running:
+    """单个指标的流式统计（Welford 算法求均值与方差）"""
+    __slots__ = ('count', 'mean', 'm2', 'min', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def stdev(self):
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def __str__(self):
+        return f"avg {self.mean:.1f} ± {self.stdev:.1f}, min {self.min:g}, max {self.max:g}"
+
+
+class SelfPlayStats:
+    """逐局汇总的统计；不保存单局结果"""
+
+    def __init__(self):
+        self.games = 0
+        self.score = _Running()
+        self.length = _Running()
+        self.ticks = _Running()
+        self.causes = [0] * len(CAUSE_NAMES)
+        self.total_ticks = 0
+        self.cpu_time = 0.0
+        self.decide_time = 0.0
+
+    def add(self, result):
+        self.games += 1
+        self.score.add(result.score)
+        self.length.add(result.length)
+        self.ticks.add(result.ticks)
+        self.causes[result.cause] += 1
+        self.total_ticks += result.ticks
+        self.cpu_time += result.elapsed
+        self.decide_time += result.decide_time
+
+    def report(self, wall_time):
+        print(f"{self.games} games, {self.total_ticks:,} ticks in {wall_time:.1f} s "
+              f"({self.games / wall_time:,.1f} games/s, {self.total_ticks / wall_time:,.0f} ticks/s)")
+        print(f"  score  : {self.score}")
+        print(f"  length : {self.length}")
+        print(f"  ticks  : {self.ticks}")
+        print("  end    : " + ", ".join(f"{name} {count} ({count / self.games:.1%})"
+                                         for name, count in zip(CAUSE_NAMES, self.causes)))
+        print(f"  worker : {self.cpu_time:.1f} s CPU in games "
+              f"(parallel speedup {self.cpu_time / wall_time:.2f}x), "
+              f"{self.decide_time / max(self.total_ticks, 1) * 1e6:.1f} us per decision")
+
+
+def run(games, bot="astar", mode="Pass", cols=GRID_COLS, rows=GRID_ROWS, seed=0,
+        workers=None, chunk_size=None, max_ticks=100000, csv_path=None):
+    """在进程池中下完 games 局（种子 seed ~ seed+games-1），流式汇总并打印统计，返回 SelfPlayStats"""
+    if bot not in ALGORITHMS:
+        raise ValueError(f"未知的驾驶员: {bot}")
+    workers = workers or os.cpu_count() or 1
+    if chunk_size is None:
+        # 每个工作进程约分到 8 块：块足够大以摊薄调度开销，又足够多以均衡负载
+        chunk_size = max(1, min(256, games // (workers * 8)))
+    chunks = ((first, min(chunk_size, seed + games - first))
+              for first in range(seed, seed + games, chunk_size))
+
+    stats = SelfPlayStats()
+    csv_file = open(csv_path, 'w') if csv_path else None
+    if csv_file:
+        csv_file.write("seed,score,length,ticks,cause,elapsed,decide_time\n")
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = set()
+            exhausted = False
+            while True:
+                # 在途任务保持为工作进程数的两倍，避免一次性提交全部任务
+                while not exhausted and len(pending) < workers * 2:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        exhausted = True
+                        break
+                    pending.add(pool.submit(play_chunk, bot, mode, cols, rows, *chunk, max_ticks))
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for result in iter_results(future.result()):
+                        stats.add(result)
+                        if csv_file:
+                            csv_file.write(f"{result.seed},{result.score},{result.length},"
+                                           f"{result.ticks},{CAUSE_NAMES[result.cause]},"
+                                           f"{result.elapsed:.6f},{result.decide_time:.6f}\n")
+    finally:
+        if csv_file:
+            csv_file.close()
+    wall_time = time.perf_counter() - start
+    print(f"{bot} on {cols}x{rows} {mode}, {workers} workers, {chunk_size} games per chunk")
+    stats.report(wall_time)
+    return stats
+
+
+def add_arguments(parser):
+    """自我对局的命令行参数（main.py 的 --selfplay 复用其中一部分）"""
+    parser.add_argument('--workers', type=int, default=None, help="工作进程数（默认 CPU 核数）")
+    parser.add_argument('--chunk-size', type=int, default=None, help="每个任务的局数")
+    parser.add_argument('--max-ticks', type=int, default=100000, help="单局步数上限")
+    parser.add_argument('--csv', metavar='PATH', default=None, help="逐局结果写入 CSV")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="多进程无界面自我对局")
+    parser.add_argument('games', type=int)
+    parser.add_argument('--bot', choices=ALGORITHMS, default="astar")
+    parser.add_argument('--mode', choices=("Pass", "Forbid"), default="Pass")
+    parser.add_argument('--cols', type=int, default=GRID_COLS)
+    parser.add_argument('--rows', type=int, default=GRID_ROWS)
+    parser.add_argument('--seed', type=int, default=0, help="第一局的种子")
+    add_arguments(parser)
+    args = parser.parse_args()
+    run(args.games, args.bot, args.mode, args.cols, args.rows, args.seed,
+        args.workers, args.chunk_size, args.max_ticks, args.csv)
@@ -0,0 +1,109 @@
+"""
+蛇身贴图模块
+用 PIL 预先画好蛇身一节与蛇头（连同眼睛）的小图，画布上每节蛇身只是一个引用缓存 PhotoImage 的图片项，
+蛇头加眼睛也只需一个图片项。
+
+贴图按需生成并缓存：某个颜色（蛇头还要加上方向）第一次用到时才绘制，
+开局只画当前配色的几张小图，不会预先生成 6 组 x 3 套 x 4 色 x 4 个方向的整张图集。
+
+样式：
+    flat      纯色方块（与原来的矩形画布项一致）
+    bevel     斜面：左上亮边、右下暗边
+    glow      实心方块外一圈同色柔光（光晕留在格子内，不会盖住相邻格子）
+    rounded   圆角方块
+"""
+
+from functools import lru_cache
+
+from PIL import Image, ImageDraw, ImageFilter, ImageTk
+
+from grid import CELL_SIZE
+from palette import hex_to_rgb
+from renderer import EYE_COLORS, EYE_OVALS
+
+SPRITE_STYLES = ("flat", "bevel", "glow", "rounded")
+
+
+def _shade(rgb, factor):
+    return tuple(min(255, int(c * factor)) for c in rgb) + (255,)
+
+
+@lru_cache(maxsize=None)
+def segment_image(color, size=CELL_SIZE, style="flat"):
+    """一节蛇身的 RGBA 小图（color 为 #RRGGBB）"""
+    rgb = hex_to_rgb(color)
+    solid = rgb + (255,)
+    if style == "flat":
+        return Image.new("RGBA", (size, size), solid)
+    image = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+    last = size - 1
+    if style == "bevel":
+        edge = max(1, size // 8)
+        draw.rectangle((0, 0, last, last), fill=solid)
+        draw.polygon([(0, 0), (last, 0), (last - edge, edge), (edge, edge), (edge, last - edge), (0, last)],
+                     fill=_shade(rgb, 1.35))
+        draw.polygon([(last, last), (0, last), (edge, last - edge), (last - edge, last - edge),
+                      (last - edge, edge), (last, 0)], fill=_shade(rgb, 0.65))
+    elif style == "glow":
+        # 只模糊透明度：光晕保持原色，由实心逐渐变透明
+        margin = max(1, size // 5)
+        mask = Image.new("L", (size, size), 0)
+        ImageDraw.Draw(mask).rectangle((margin, margin, last - margin, last - margin), fill=255)
+        mask = mask.filter(ImageFilter.GaussianBlur(margin / 2))
+        mask.paste(255, (margin, margin, size - margin, size - margin))
+        image = Image.new("RGBA", (size, size), solid)
+        image.putalpha(mask)
+    elif style == "rounded":
+        draw.rounded_rectangle((0, 0, last, last), radius=max(1, size // 4), fill=solid)
+    else:
+        raise ValueError(f"未知的贴图样式: {style}")
+    return image
+
+
+@lru_cache(maxsize=None)
+def head_image(color, direction, size=CELL_SIZE, style="flat"):
+    """朝 direction（方向编码）的蛇头小图：蛇身小图加上两只眼睛"""
+    image = segment_image(color, size, style).copy()
+    draw = ImageDraw.Draw(image)
+    s = size / CELL_SIZE
+    for (x1, y1, x2, y2), eye_color in zip(EYE_OVALS[direction], EYE_COLORS):
+        # 与画布上的椭圆项一致：默认一像素黑色轮廓
+        draw.ellipse((x1 * s, y1 * s, x2 * s, y2 * s), fill=eye_color, outline="#000000")
+    return image
+
+
+class SpriteAtlas:
+    """按需生成并缓存的蛇身贴图（Tk 的 PhotoImage），供 renderer.SnakeRenderer 使用。
+
+    PIL 小图在模块级缓存（与格子大小、样式一起作为键），PhotoImage 属于某个 Tk 解释器，
+    缓存在图集对象上，同时保持引用，防止被垃圾回收后画布上的图片项变成空白。
+    """
+
+    def __init__(self, cell_size=CELL_SIZE, style="flat", master=None):
+        if style not in SPRITE_STYLES:
+            raise ValueError(f"未知的贴图样式: {style}")
+        self.cell_size = cell_size
+        self.style = style
+        self.master = master
+        self._segments = {}
+        self._heads = {}
+
+    def segment(self, color):
+        photo = self._segments.get(color)
+        if photo is None:
+            photo = self._segments[color] = ImageTk.PhotoImage(
+                segment_image(color, self.cell_size, self.style), master=self.master)
+        return photo
+
+    def head(self, color, direction):
+        key = (color, direction)
+        photo = self._heads.get(key)
+        if photo is None:
+            photo = self._heads[key] = ImageTk.PhotoImage(
+                head_image(color, direction, self.cell_size, self.style), master=self.master)
+        return photo
+
+    def __len__(self):
+        """已生成的贴图数"""
+        return len(self._segments) + len(self._heads)
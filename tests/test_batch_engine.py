@@ -0,0 +1,70 @@
+"""batch_engine.BatchEngine 与 engine.step 的一致性测试（需要 NumPy）"""
+
+import random
+import unittest
+
+import engine
+
+try:
+    import numpy as np
+    from batch_engine import BatchEngine, NO_ACTION
+except ImportError:
+    np = None
+
+
+@unittest.skipIf(np is None, "需要 NumPy")
+class BatchEngineTest(unittest.TestCase):
+
+    def run_against_engine(self, mode, boards=16, cols=6, rows=6, ticks=300):
+        """两者的食物随机数流不同：每次生成食物后都把批量引擎的食物抄给逐局引擎"""
+        batch = BatchEngine(boards, mode, seed=5, cols=cols, rows=rows)
+        states = []
+        for i in range(boards):
+            state = engine.GameState(cols, rows, mode, seed=i)
+            engine.place_snake(state)
+            states.append(state)
+        rng = random.Random(11)
+        for _ in range(ticks):
+            for i, state in enumerate(states):
+                if state.alive:
+                    state.food = int(batch.food[i])
+                    state.food_type = int(batch.food_type[i])
+            actions = [rng.choice((NO_ACTION, NO_ACTION, 0, 1, 2, 3)) for _ in range(boards)]
+            was_alive = [state.alive for state in states]
+            results = [engine.step(state, None if action == NO_ACTION else action)
+                       for state, action in zip(states, actions)]
+            ate, died = batch.step(np.array(actions, dtype=np.int8))
+            for i, (state, result) in enumerate(zip(states, results)):
+                if not was_alive[i]:
+                    self.assertFalse(ate[i] or died[i])
+                    continue
+                self.assertEqual(bool(ate[i]), result in (engine.STEP_ATE, engine.STEP_FULL))
+                self.assertEqual(bool(died[i]), result == engine.STEP_DIED)
+                self.assertEqual(bool(batch.alive[i]), state.alive)
+                self.assertEqual(int(batch.length[i]), state.length)
+                self.assertEqual(int(batch.score[i]), state.score)
+                self.assertEqual(int(batch.speed[i]), state.speed)
+                self.assertEqual(int(batch.ticks[i]), state.ticks)
+                body = batch.body[i]
+                cells = [int(body[(batch.tail_idx[i] + k) % batch.cells])
+                         for k in range(batch.length[i])]
+                self.assertEqual(cells, list(state.cells()))
+                self.assertEqual(np.flatnonzero(batch.occupied[i]).tolist(),
+                                 sorted(state.cells()))
+                if state.alive:
+                    self.assertEqual(int(batch.direction[i]), state.direction)
+            if not batch.alive.any():
+                break
+        return batch
+
+    def test_pass_matches_engine(self):
+        batch = self.run_against_engine("Pass")
+        self.assertGreater(int(batch.score.sum()), 0)
+
+    def test_forbid_matches_engine(self):
+        batch = self.run_against_engine("Forbid")
+        self.assertFalse(batch.alive.all())
+
+
+if __name__ == "__main__":
+    unittest.main()
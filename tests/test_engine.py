@@ -0,0 +1,163 @@
+"""engine.step 与 InputQueue 的测试"""
+
+import unittest
+
+import engine
+from foods import FOOD_SPECS, FOOD_TYPE_IDS
+from grid import UP, DOWN, LEFT, RIGHT
+
+
+def make_state(cells, direction, cols=5, rows=5, mode="Pass", seed=0):
+    """按给定格子（从尾到头）摆放蛇身；食物由调用方设置"""
+    state = engine.GameState(cols, rows, mode, seed=seed)
+    for cell in cells:
+        state.push_head(cell)
+    state.direction = direction
+    return state
+
+
+class StepTest(unittest.TestCase):
+
+    def test_move(self):
+        state = make_state([0, 1, 2], RIGHT)
+        state.food = 24
+        state.food_type = 0
+        self.assertEqual(engine.step(state), engine.STEP_MOVED)
+        self.assertEqual(list(state.cells()), [1, 2, 3])
+        self.assertEqual(state.ticks, 1)
+        self.assertFalse(state.occupied[0])
+        self.assertIn(0, state.free)
+        self.assertNotIn(3, state.free)
+
+    def test_reverse_action_ignored(self):
+        state = make_state([0, 1, 2], RIGHT)
+        state.food = 24
+        state.food_type = 0
+        self.assertEqual(engine.step(state, LEFT), engine.STEP_MOVED)
+        self.assertEqual(state.direction, RIGHT)
+        self.assertEqual(state.head, 3)
+
+    def test_eat(self):
+        state = make_state([0, 1, 2], RIGHT)
+        food_type = FOOD_TYPE_IDS['golden']
+        state.food = 3
+        state.food_type = food_type
+        self.assertEqual(engine.step(state), engine.STEP_ATE)
+        self.assertEqual(list(state.cells()), [0, 1, 2, 3])
+        self.assertEqual(state.score, FOOD_SPECS[food_type].score)
+        self.assertEqual(state.speed, engine.effect_speed('speed_up', engine.INITIAL_SPEED))
+        self.assertGreaterEqual(state.food, 0)
+        self.assertFalse(state.occupied[state.food])
+
+    def test_wall_kills_in_forbid(self):
+        state = make_state([10, 5, 0], UP, mode="Forbid")
+        state.food = 24
+        state.food_type = 0
+        self.assertEqual(engine.step(state), engine.STEP_DIED)
+        self.assertFalse(state.alive)
+        self.assertEqual(state.ticks, 0)
+        self.assertEqual(list(state.cells()), [10, 5, 0])
+        # 死后继续推进不再改变状态
+        self.assertEqual(engine.step(state, RIGHT), engine.STEP_DIED)
+        self.assertEqual(state.head, 0)
+
+    def test_wrap_in_pass(self):
+        state = make_state([10, 5, 0], UP)
+        state.food = 24
+        state.food_type = 0
+        self.assertEqual(engine.step(state), engine.STEP_MOVED)
+        self.assertEqual(state.head, 20)
+        state = make_state([2, 3, 4], RIGHT)
+        state.food = 24
+        state.food_type = 0
+        engine.step(state)
+        self.assertEqual(state.head, 0)
+
+    def test_self_collision(self):
+        # 蛇头 6 向下走进 11，11 属于蛇身
+        state = make_state([5, 10, 11, 12, 7, 6], LEFT)
+        state.food = 24
+        state.food_type = 0
+        self.assertEqual(engine.step(state, DOWN), engine.STEP_DIED)
+        self.assertFalse(state.alive)
+
+    def test_tail_cell_is_blocked(self):
+        # 与原游戏一致：碰撞在尾巴移动之前检查，走进当前尾巴所在格同样撞死
+        state = make_state([5, 0, 1, 6], DOWN)
+        state.food = 24
+        state.food_type = 0
+        self.assertEqual(engine.step(state, LEFT), engine.STEP_DIED)
+        self.assertEqual(list(state.cells()), [5, 0, 1, 6])
+
+    def test_board_full(self):
+        state = make_state([0, 1], RIGHT, cols=3, rows=1)
+        state.food = 2
+        state.food_type = 0
+        self.assertEqual(engine.step(state), engine.STEP_FULL)
+        self.assertFalse(state.alive)
+        self.assertEqual(state.length, 3)
+        self.assertEqual(state.food, -1)
+        self.assertEqual(len(state.free), 0)
+
+    def test_same_seed_same_game(self):
+        first = engine.new_game(seed=7)
+        second = engine.new_game(seed=7)
+        actions = [RIGHT, None, None, UP, None, LEFT, None, DOWN] * 10
+        for action in actions:
+            self.assertEqual(engine.step(first, action), engine.step(second, action))
+        self.assertEqual(list(first.cells()), list(second.cells()))
+        self.assertEqual((first.food, first.score), (second.food, second.score))
+
+    def test_clone_replays_food_sequence(self):
+        state = engine.new_game(seed=3)
+        clone = state.clone()
+        for _ in range(40):
+            engine.step(state)
+            engine.step(clone)
+        self.assertEqual(list(state.cells()), list(clone.cells()))
+        self.assertEqual(state.food, clone.food)
+        self.assertEqual(list(state.free.cells), list(clone.free.cells))
+
+
+class InputQueueTest(unittest.TestCase):
+
+    def test_rejects_reversal(self):
+        queue = engine.InputQueue()
+        self.assertFalse(queue.push(UP, DOWN))
+        self.assertTrue(queue.push(LEFT, DOWN))
+        # 与队尾（而非当前方向）比较：左之后的右是反向，上则合法
+        self.assertFalse(queue.push(RIGHT, DOWN))
+        self.assertTrue(queue.push(UP, DOWN))
+        self.assertEqual(list(queue.pending), [LEFT, UP])
+
+    def test_merges_repeats(self):
+        queue = engine.InputQueue()
+        self.assertFalse(queue.push(DOWN, DOWN))
+        self.assertTrue(queue.push(RIGHT, DOWN))
+        self.assertFalse(queue.push(RIGHT, DOWN))
+        self.assertEqual(len(queue), 1)
+        self.assertEqual(queue.heading(DOWN), RIGHT)
+
+    def test_capacity(self):
+        queue = engine.InputQueue()
+        self.assertEqual(queue.capacity, 3)
+        for direction in (LEFT, UP, RIGHT):
+            self.assertTrue(queue.push(direction, DOWN))
+        self.assertFalse(queue.push(DOWN, DOWN))
+        self.assertEqual([queue.pop() for _ in range(4)], [LEFT, UP, RIGHT, None])
+
+    def test_quick_u_turn_survives(self):
+        # 快速连按 右+上：两步各消费一个转向，蛇掉头而不撞到自己
+        state = make_state([5, 10, 15], DOWN)
+        state.food = 0
+        state.food_type = 0
+        state.inputs.push(RIGHT, state.direction)
+        state.inputs.push(UP, state.direction)
+        self.assertEqual(engine.step(state), engine.STEP_MOVED)
+        self.assertEqual(engine.step(state), engine.STEP_MOVED)
+        self.assertEqual(list(state.cells()), [15, 16, 11])
+        self.assertEqual(len(state.inputs), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+"""grid.FreeCells 与 SnakeBody 视图的测试"""
+
+import random
+import unittest
+
+import engine
+from grid import FreeCells, SnakeBody, RIGHT
+
+
+class FreeCellsTest(unittest.TestCase):
+
+    def assertConsistent(self, free, size):
+        """cells 与 slots 互为逆映射，未出现在 cells 中的格子 slots 为 -1"""
+        self.assertEqual(len(set(free.cells)), len(free.cells))
+        for slot, cell in enumerate(free.cells):
+            self.assertEqual(free.slots[cell], slot)
+        listed = set(free.cells)
+        for cell in range(size):
+            self.assertEqual(cell in free, cell in listed)
+            if cell not in listed:
+                self.assertEqual(free.slots[cell], -1)
+
+    def test_swap_remove_keeps_slots(self):
+        size = 64
+        free = FreeCells(size)
+        rng = random.Random(1)
+        taken = set()
+        for _ in range(500):
+            cell = rng.randrange(size)
+            if rng.random() < 0.6:
+                free.remove(cell)
+                taken.add(cell)
+            else:
+                free.add(cell)
+                taken.discard(cell)
+            self.assertConsistent(free, size)
+            self.assertEqual(len(free), size - len(taken))
+
+    def test_remove_last_and_repeat(self):
+        free = FreeCells(4)
+        free.remove(3)
+        free.remove(3)
+        free.add(0)
+        self.assertEqual(list(free.cells), [0, 1, 2])
+        self.assertConsistent(free, 4)
+
+    def test_choice(self):
+        free = FreeCells(8)
+        for cell in range(7):
+            free.remove(cell)
+        rng = random.Random(0)
+        self.assertEqual(free.choice(rng), 7)
+        free.remove(7)
+        self.assertEqual(free.choice(rng), -1)
+
+    def test_assign_copy_restore(self):
+        free = FreeCells(6)
+        free.assign([4, 0, 2])
+        self.assertEqual(list(free.cells), [4, 0, 2])
+        self.assertConsistent(free, 6)
+        saved = free.copy()
+        free.remove(4)
+        free.add(5)
+        self.assertEqual(list(saved.cells), [4, 0, 2])
+        free.restore(saved)
+        self.assertEqual(list(free.cells), [4, 0, 2])
+        self.assertConsistent(free, 6)
+
+
+class SnakeBodyTest(unittest.TestCase):
+
+    def make_ring(self):
+        """8x8 穿墙棋盘，长 7 的蛇在第 0 行循环前进，食物放在不会经过的格子"""
+        state = engine.GameState(8, 8, "Pass")
+        for cell in range(7):
+            state.push_head(cell)
+        state.direction = RIGHT
+        state.food = 63
+        state.food_type = 0
+        return state, SnakeBody(state, 10)
+
+    def assertViewMatches(self, state, view):
+        expected = [(cell % 8 * 10, cell // 8 * 10) for cell in state.cells()]
+        self.assertEqual(list(view), expected)
+        self.assertEqual(len(view), state.length)
+        self.assertEqual(view.head, expected[-1])
+        self.assertEqual(view.tail, expected[0])
+        self.assertEqual(view[-1], expected[-1])
+        ranks = {pos: i for i, pos in enumerate(expected)}
+        # 整个棋盘（遍历蛇身）与比蛇短的窗口（扫描占用位图）两条路径
+        for window in ((0, 0, 8, 8), (0, 0, 3, 2), (4, 0, 8, 1)):
+            for pos, rank in view.segments_in_view(*window):
+                self.assertEqual(ranks[pos], rank)
+
+    def test_follows_state(self):
+        state, view = self.make_ring()
+        self.assertViewMatches(state, view)
+        # 走过多圈，环形缓冲区下标回绕；隔几步才读取一次视图
+        for tick in range(1, 200):
+            self.assertEqual(engine.step(state), engine.STEP_MOVED)
+            if tick % 5 == 0:
+                self.assertViewMatches(state, view)
+                self.assertEqual(view.pushed, 7 + tick)
+        self.assertIn(view.head, view)
+        self.assertNotIn((70, 70), view)
+        with self.assertRaises(IndexError):
+            view[7]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+"""replay 输入回放格式的测试"""
+
+import unittest
+
+import engine
+import replay
+from autopilot import create_pilot
+
+
+def record_game(seed=2, cols=10, rows=8, mode="Pass", algorithm="astar", max_ticks=3000):
+    """让驾驶员玩一局并录制，返回 (Replay, 结束时的 GameState)"""
+    state = engine.new_game(mode, seed, cols, rows, color_chose=4, background=1)
+    recorder = replay.ReplayRecorder(seed, mode, cols, rows, 4, 1)
+    pilot = create_pilot(cols, rows, mode, algorithm)
+    result = engine.STEP_MOVED
+    while state.alive and state.ticks < max_ticks:
+        turn = pilot.decide(state)
+        if turn is not None and turn != state.direction:
+            recorder.record(state.ticks, turn)
+        result = engine.step(state, turn)
+    return recorder.finish(state.ticks, state.score, result == engine.STEP_DIED), state
+
+
+class VarintTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        values = [0, 1, 127, 128, 255, 300, 16383, 16384, 1 << 31, (1 << 63) + 5]
+        out = bytearray()
+        for value in values:
+            replay._write_varint(out, value)
+        pos = 0
+        for value in values:
+            decoded, pos = replay.read_varint(out, pos)
+            self.assertEqual(decoded, value)
+        self.assertEqual(pos, len(out))
+
+    def test_sizes(self):
+        for value, size in ((0, 1), (127, 1), (128, 2), (16383, 2), (16384, 3)):
+            out = bytearray()
+            replay._write_varint(out, value)
+            self.assertEqual(len(out), size)
+
+    def test_iter_inputs(self):
+        recorder = replay.ReplayRecorder(0)
+        turns = [(0, 3), (0, 1), (5, 2), (200, 0), (40000, 1)]
+        for tick, direction in turns:
+            recorder.record(tick, direction)
+        self.assertEqual(list(replay.iter_inputs(recorder.data, recorder.count)), turns)
+        cursor = replay.InputCursor(bytes(recorder.data), recorder.count)
+        self.assertEqual(cursor.turn_at(0), 3)
+        self.assertEqual(cursor.turn_at(0), 1)
+        self.assertIsNone(cursor.turn_at(4))
+        self.assertEqual(cursor.turn_at(5), 2)
+
+
+class ReplayTest(unittest.TestCase):
+
+    def test_pack_round_trip(self):
+        recorded, _ = record_game()
+        self.assertEqual(replay.unpack(replay.pack(recorded)), recorded)
+        self.assertEqual(replay.unpack(replay.pack(recorded._replace(seed=None))).seed, None)
+        with self.assertRaises(replay.ReplayError):
+            replay.unpack(b'GSRP')
+
+    def test_play_reproduces_game(self):
+        recorded, final = record_game(mode="Forbid")
+        self.assertTrue(recorded.died)
+        state, died = replay.play(recorded)
+        self.assertTrue(died)
+        self.assertEqual((state.ticks, state.score), (final.ticks, final.score))
+        self.assertEqual(list(state.cells()), list(final.cells()))
+        self.assertEqual(state.food, final.food)
+
+    def test_play_until_tick(self):
+        recorded, _ = record_game()
+        state, died = replay.play(recorded, until_tick=50)
+        self.assertEqual(state.ticks, 50)
+        self.assertFalse(died)
+
+    def test_perfect_game_is_not_a_death(self):
+        recorded, final = record_game(cols=6, rows=6, algorithm="hamilton")
+        self.assertEqual(final.length, 36)
+        self.assertFalse(recorded.died)
+        state, died = replay.play(recorded)
+        self.assertFalse(died)
+        self.assertFalse(state.alive)
+        self.assertEqual(state.score, recorded.score)
+
+
+if __name__ == "__main__":
+    unittest.main()
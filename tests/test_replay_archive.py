@@ -0,0 +1,69 @@
+"""replay_archive 关键帧归档的测试：随机跳转与从头线性播放结果一致"""
+
+import os
+import tempfile
+import unittest
+
+import engine
+import replay
+from replay_archive import ArchiveError, ReplayArchive, build_archive
+from tests.test_replay import record_game
+
+
+class ReplayArchiveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'game.replayarchive')
+
+    def assertSameState(self, state, expected):
+        self.assertEqual(state.ticks, expected.ticks)
+        self.assertEqual(list(state.cells()), list(expected.cells()))
+        self.assertEqual(bytes(state.occupied), bytes(expected.occupied))
+        self.assertEqual(list(state.free.cells), list(expected.free.cells))
+        self.assertEqual(list(state.free.slots), list(expected.free.slots))
+        self.assertEqual((state.direction, state.food, state.food_type, state.alive),
+                         (expected.direction, expected.food, expected.food_type, expected.alive))
+        self.assertEqual((state.score, state.speed, state.color_chose, state.background),
+                         (expected.score, expected.speed, expected.color_chose, expected.background))
+        self.assertEqual(state.rng.getstate(), expected.rng.getstate())
+
+    def test_seek_matches_linear_play(self):
+        recorded, _ = record_game(mode="Forbid")
+        self.assertGreater(recorded.ticks, 40)
+        build_archive(self.path, recorded, interval=16)
+        end = recorded.ticks + recorded.died
+        with ReplayArchive(self.path) as archive:
+            self.assertEqual(archive.keyframe_count, recorded.ticks // 16 + 1)
+            self.assertEqual(archive.to_replay(), recorded)
+            for tick in sorted(set(range(0, end + 1, 5)) | {15, 16, 17, end - 1, end}):
+                state, _ = archive.seek(tick)
+                expected, _ = replay.play(recorded, until_tick=tick)
+                self.assertSameState(state, expected)
+            # 超出范围时夹到记录结束
+            state, _ = archive.seek(end + 100)
+            self.assertFalse(state.alive)
+
+    def test_cursor_continues_playback(self):
+        recorded, final = record_game()
+        build_archive(self.path, recorded, interval=32)
+        with ReplayArchive(self.path) as archive:
+            state, cursor = archive.seek(recorded.ticks // 2)
+            while state.alive and state.ticks < recorded.ticks + recorded.died:
+                engine.step(state, cursor.turn_at(state.ticks))
+            self.assertSameState(state, final)
+
+    def test_rejects_truncated_file(self):
+        recorded, _ = record_game()
+        build_archive(self.path, recorded, interval=32)
+        with open(self.path, 'rb') as file:
+            data = file.read()
+        with open(self.path, 'wb') as file:
+            file.write(data[:-1])
+        with self.assertRaises(ArchiveError):
+            ReplayArchive(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
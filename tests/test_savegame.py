@@ -0,0 +1,70 @@
+"""savegame 存档格式（第 2 版）的测试"""
+
+import random
+import unittest
+
+import engine
+import savegame
+from autopilot import create_pilot
+
+
+def play_some(seed=4, ticks=150, cols=12, rows=10, mode="Pass"):
+    """让自动驾驶玩一段，使空闲格子索引被打乱成非平凡的顺序"""
+    state = engine.new_game(mode, seed, cols, rows)
+    pilot = create_pilot(cols, rows, mode)
+    for _ in range(ticks):
+        if engine.step(state, pilot.decide(state)) not in (engine.STEP_MOVED, engine.STEP_ATE):
+            break
+    return state
+
+
+class SaveGameTest(unittest.TestCase):
+
+    def test_pack_round_trip(self):
+        state = play_some()
+        self.assertGreater(state.score, 0)
+        fx_rng = random.Random(9)
+        saved = savegame.saved_from_state(state, 20, fx_rng.getstate())._replace(color_phase=17)
+        loaded = savegame.unpack(savegame.pack(saved))
+        self.assertEqual(loaded, saved)
+        self.assertEqual(list(loaded.free), list(state.free.cells))
+        self.assertEqual(list(loaded.body), list(state.cells()))
+        self.assertEqual(loaded.direction, state.direction)
+        self.assertEqual(loaded.fx_rng_state, fx_rng.getstate())
+
+    def test_wide_cells_and_no_seed(self):
+        state = engine.new_game("Forbid", None, 300, 300)
+        saved = savegame.saved_from_state(state, 2)._replace(seed=None)
+        loaded = savegame.unpack(savegame.pack(saved))
+        self.assertEqual(loaded.body.typecode, 'I')
+        self.assertEqual(loaded, saved)
+
+    def test_restored_game_continues_identically(self):
+        state = play_some()
+        loaded = savegame.state_from_saved(
+            savegame.unpack(savegame.pack(savegame.saved_from_state(state, 20))))
+        self.assertEqual(list(loaded.free.cells), list(state.free.cells))
+        # 相同的空闲格子顺序与随机数状态：之后生成的食物序列一致
+        pilot = create_pilot(state.cols, state.rows, state.mode)
+        for _ in range(200):
+            action = pilot.decide(state)
+            result = engine.step(state, action)
+            self.assertEqual(engine.step(loaded, action), result)
+            self.assertEqual((loaded.food, loaded.food_type), (state.food, state.food_type))
+            if not state.alive:
+                break
+        self.assertEqual(list(loaded.cells()), list(state.cells()))
+        self.assertEqual(loaded.score, state.score)
+
+    def test_rejects_bad_data(self):
+        data = savegame.pack(savegame.saved_from_state(engine.new_game(seed=1), 20))
+        with self.assertRaises(savegame.SaveError):
+            savegame.unpack(b'XXXX' + data[4:])
+        with self.assertRaises(savegame.SaveError):
+            savegame.unpack(data[:-1])
+        with self.assertRaises(savegame.SaveError):
+            savegame.unpack(data[:10])
+
+
+if __name__ == "__main__":
+    unittest.main()
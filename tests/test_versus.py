@@ -0,0 +1,88 @@
+"""versus 对战模式碰撞结算的测试"""
+
+import unittest
+
+import versus
+from grid import UP, DOWN, LEFT, RIGHT
+
+
+def make_versus(*snakes, cols=10, rows=10, mode="Forbid"):
+    """snakes 为 (尾 -> 头的格子下标, 方向编码)；食物放在右下角"""
+    state = versus.VersusState(cols, rows, mode, seed=0)
+    for cells, direction in snakes:
+        state.add_snake(cells, direction)
+    state.food = cols * rows - 1
+    state.food_type = 0
+    return state
+
+
+class CollisionTest(unittest.TestCase):
+
+    def test_head_on_same_cell(self):
+        state = make_versus(([0, 1, 2], RIGHT), ([6, 5, 4], LEFT))
+        self.assertTrue(versus.step(state))
+        self.assertFalse(any(snake.alive for snake in state.snakes))
+        self.assertIsNone(state.winner())
+        # 撞死的蛇不前进，占用网格保持不变
+        self.assertEqual(state.owner[3], versus.EMPTY)
+        self.assertEqual(state.owner[2], 1)
+        self.assertEqual(state.owner[4], 2)
+
+    def test_heads_swap(self):
+        state = make_versus(([0, 1, 2], RIGHT), ([5, 4, 3], LEFT))
+        self.assertTrue(versus.step(state))
+        self.assertIsNone(state.winner())
+
+    def test_shared_claim_among_three(self):
+        first, second, third = (([0, 1, 2], RIGHT), ([6, 5, 4], LEFT), ([70, 60, 50], UP))
+        state = make_versus(first, second, third)
+        survivors = versus.resolve_moves(state)
+        self.assertEqual([(snake.owner, target) for snake, target in survivors], [(3, 40)])
+        self.assertEqual([snake.alive for snake in state.snakes], [False, False, True])
+
+    def test_winner_after_claim(self):
+        state = make_versus(([0, 1, 2], RIGHT), ([6, 5, 4], LEFT), ([70, 60, 50], UP))
+        self.assertTrue(versus.step(state))
+        self.assertIs(state.winner(), state.snakes[2])
+        self.assertEqual(state.snakes[2].head, 40)
+
+    def test_into_other_tail(self):
+        # 与单人模式一致：对方的尾巴在本步移动之前仍算占用
+        state = make_versus(([0, 1, 2], RIGHT), ([3, 13, 23], DOWN))
+        self.assertTrue(versus.step(state))
+        self.assertIs(state.winner(), state.snakes[1])
+        self.assertEqual(list(state.snakes[1].cells()), [13, 23, 33])
+        self.assertEqual(state.snakes[1].last_tail, 3)
+
+    def test_into_other_body(self):
+        state = make_versus(([10, 11, 12], RIGHT), ([3, 13, 23], DOWN))
+        self.assertTrue(versus.step(state))
+        self.assertIs(state.winner(), state.snakes[1])
+
+    def test_wall_in_forbid(self):
+        state = make_versus(([20, 10, 0], UP), ([55, 56, 57], RIGHT))
+        self.assertTrue(versus.step(state))
+        self.assertIs(state.winner(), state.snakes[1])
+
+    def test_parallel_moves_continue(self):
+        state = make_versus(([0, 1, 2], RIGHT), ([20, 21, 22], RIGHT))
+        self.assertFalse(versus.step(state, [None, DOWN]))
+        self.assertEqual((state.snakes[0].head, state.snakes[1].head), (3, 32))
+        self.assertTrue(all(snake.alive for snake in state.snakes))
+
+
+class NewVersusTest(unittest.TestCase):
+
+    def test_plays_to_the_end(self):
+        state = versus.new_versus("Forbid", seed=3)
+        self.assertEqual(len(state.snakes), 2)
+        self.assertEqual(state.owner[state.food], versus.EMPTY)
+        ticks = 0
+        while not versus.step(state):
+            ticks += 1
+            self.assertLess(ticks, 100)
+        self.assertLess(len(state.alive), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,225 @@
+"""
+多蛇对战模块
+多条蛇在同一棋盘上对战（Tk 中为同一键盘的双人模式）：所有蛇共用一张按归属记录的占用网格
+`owner`（每格一个字节，0 为空，否则为占用该格的蛇的编号），碰撞检测只需一次下标访问。
+
+每个时间步先算出所有蛇的新蛇头，再按移动前的占用网格统一结算：
+撞墙、撞到任何蛇身（包括对方）或两个蛇头进入同一格都会死亡，之后存活的蛇同时前进。
+因此各条蛇的移动是原子的，结果与处理顺序无关。
+
+对战只计分，食物不改变速度、配色或背景。不依赖 Tk，绘制由 main.VersusGame 负责。
+碰撞结算 `resolve_moves` 与状态类也供 arena 的多机器人竞技场复用。
+"""
+
+import random
+from array import array
+
+from engine import INITIAL_SPEED, InputQueue, session_rngs
+from foods import FOOD_SPECS, pick_food_type
+from grid import DOWN, UP, FreeCells, GRID_COLS, GRID_ROWS, neighbor_table
+
+# owner 网格中空格的编号；蛇的编号从 1 开始
+EMPTY = 0
+MAX_SNAKES = 255
+
+
+class Snake:
+    """对战中的一条蛇：环形缓冲区蛇身 + 方向、得分与自己的输入队列。
+
+    `last_tail` 为本步腾出的尾巴格子（吃到食物或没有移动时为 -1），供绘制层增量更新。
+    蛇身缓冲区按需倍增，上百条蛇同场时不必每条都预留整个棋盘大小。
+    """
+    __slots__ = ('owner', 'body', 'head_idx', 'tail_idx', 'length', 'direction', 'alive',
+                 'score', 'inputs', 'moved', 'last_tail')
+
+    def __init__(self, owner, capacity, direction):
+        self.owner = owner
+        self.body = array('i', bytes(4 * capacity))
+        self.head_idx = -1
+        self.tail_idx = 0
+        self.length = 0
+        self.direction = direction
+        self.alive = True
+        self.score = 0
+        self.inputs = InputQueue()
+        self.moved = False
+        self.last_tail = -1
+
+    @property
+    def head(self):
+        return self.body[self.head_idx]
+
+    @property
+    def tail(self):
+        return self.body[self.tail_idx]
+
+    def cells(self):
+        """蛇身格子下标迭代器（从尾到头）"""
+        body = self.body
+        size = len(body)
+        tail_idx = self.tail_idx
+        for i in range(self.length):
+            index = tail_idx + i
+            yield body[index - size if index >= size else index]
+
+    def _grow(self):
+        """缓冲区已满：按尾 -> 头重新排列并扩容一倍"""
+        body = array('i', self.cells())
+        body.frombytes(bytes(4 * len(body)))
+        self.body = body
+        self.tail_idx = 0
+        self.head_idx = self.length - 1
+
+    def turn(self, direction):
+        """缓存一个转向（方向编码），规则同单人模式的 InputQueue"""
+        return self.inputs.push(direction, self.direction)
+
+    def __len__(self):
+        return self.length
+
+
+class VersusState:
+    """一局对战的全部状态"""
+    __slots__ = ('cols', 'rows', 'mode', 'neighbors', 'owner', 'free', 'snakes', 'food',
+                 'food_type', 'speed', 'rng', 'seed', 'ticks', 'over')
+
+    def __init__(self, cols=GRID_COLS, rows=GRID_ROWS, mode="Pass", rng=None, seed=None):
+        self.cols = cols
+        self.rows = rows
+        self.mode = mode
+        self.neighbors = neighbor_table(cols, rows, mode == "Pass")
+        self.owner = bytearray(cols * rows)
+        self.free = FreeCells(cols * rows)
+        self.snakes = []
+        self.food = -1
+        self.food_type = -1
+        self.speed = INITIAL_SPEED
+        self.rng = rng if rng is not None else random.Random(seed)
+        self.seed = seed
+        self.ticks = 0
+        self.over = False
+
+    def add_snake(self, cells, direction=DOWN):
+        """按尾 -> 头的格子下标加入一条蛇（direction 为方向编码），返回 Snake"""
+        if len(self.snakes) >= MAX_SNAKES:
+            raise ValueError(f"最多 {MAX_SNAKES} 条蛇")
+        snake = Snake(len(self.snakes) + 1, max(16, 2 * len(cells)), direction)
+        self.snakes.append(snake)
+        for cell in cells:
+            self._push_head(snake, cell)
+        return snake
+
+    def _push_head(self, snake, cell):
+        if snake.length == len(snake.body):
+            snake._grow()
+        head_idx = snake.head_idx + 1
+        if head_idx == len(snake.body):
+            head_idx = 0
+        snake.head_idx = head_idx
+        snake.body[head_idx] = cell
+        snake.length += 1
+        self.owner[cell] = snake.owner
+        self.free.remove(cell)
+
+    def _pop_tail(self, snake):
+        tail_idx = snake.tail_idx
+        cell = snake.body[tail_idx]
+        tail_idx += 1
+        snake.tail_idx = 0 if tail_idx == len(snake.body) else tail_idx
+        snake.length -= 1
+        self.owner[cell] = EMPTY
+        self.free.add(cell)
+        return cell
+
+    def spawn_food(self):
+        """在空闲格子中生成食物；棋盘已满返回 False"""
+        cell = self.free.choice(self.rng)
+        if cell < 0:
+            self.food = -1
+            self.food_type = -1
+            return False
+        self.food = cell
+        self.food_type = pick_food_type(self.rng)
+        return True
+
+    @property
+    def alive(self):
+        return [snake for snake in self.snakes if snake.alive]
+
+    def winner(self):
+        """对局结束后唯一存活的蛇；同归于尽或尚未结束时为 None"""
+        survivors = self.alive
+        return survivors[0] if self.over and len(survivors) == 1 else None
+
+
+def new_versus(mode="Pass", seed=None, cols=GRID_COLS, rows=GRID_ROWS):
+    """双人开局：1 号蛇在左上角向下，2 号蛇在右下角向上"""
+    seed, rng, _ = session_rngs(seed)
+    state = VersusState(cols, rows, mode, rng, seed)
+    state.add_snake([row * cols + 1 for row in (1, 2, 3)], DOWN)
+    state.add_snake([row * cols + cols - 2 for row in (rows - 2, rows - 3, rows - 4)], UP)
+    state.spawn_food()
+    return state
+
+
+def resolve_moves(state, actions=None):
+    """碰撞结算：应用转向并算出每条存活的蛇的新蛇头，撞死的蛇标记为死亡。
+
+    actions 为与 state.snakes 对齐的方向编码序列（None 表示取该蛇输入队列中的转向）；
+    不传时全部取自输入队列。返回本步可以前进的 [(snake, 新蛇头格子)]，尚未修改占用网格。
+    """
+    neighbors = state.neighbors
+    owner = state.owner
+
+    # 第一阶段：按移动前的占用网格算出每条蛇的新蛇头（-1 为撞墙）
+    moves = []
+    claims = {}
+    for index, snake in enumerate(state.snakes):
+        snake.moved = False
+        snake.last_tail = -1
+        if not snake.alive:
+            continue
+        action = actions[index] if actions is not None else None
+        if action is None:
+            action = snake.inputs.pop()
+        if action is not None and action != snake.direction ^ 1:
+            snake.direction = action
+        target = neighbors[snake.body[snake.head_idx] * 4 + snake.direction]
+        if target >= 0:
+            claims[target] = claims.get(target, 0) + 1
+        moves.append((snake, target))
+
+    # 第二阶段：统一判定死亡（与单人模式一致，尾巴在移动前仍算占用）
+    survivors = []
+    for snake, target in moves:
+        if target < 0 or owner[target] != EMPTY or claims[target] > 1:
+            snake.alive = False
+        else:
+            survivors.append((snake, target))
+    return survivors
+
+
+def step(state, actions=None):
+    """所有存活的蛇同时前进一步（actions 见 resolve_moves）。
+
+    存活的蛇不足两条（或棋盘已满）时对局结束，返回 state.over。
+    """
+    if state.over:
+        return True
+
+    # 第三阶段：存活的蛇同时前进
+    ate = False
+    for snake, target in resolve_moves(state, actions):
+        state._push_head(snake, target)
+        snake.moved = True
+        if target == state.food:
+            snake.score += FOOD_SPECS[state.food_type].score
+            ate = True
+        else:
+            snake.last_tail = state._pop_tail(snake)
+    state.ticks += 1
+
+    full = ate and not state.spawn_food()
+    if full or sum(snake.alive for snake in state.snakes) < 2:
+        state.over = True
+    return state.over